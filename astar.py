@@ -1,62 +1,84 @@
-from search_algorithms import SearchAlgorithms
+from search_algorithms import SearchAlgorithms, SearchEvent
 from collections import defaultdict
-import heapq
+from priority_queue import HEAPS
 from utils import make_heuristics
 import math
 
 class AS(SearchAlgorithms):
-    def search(self, step_callback=None):
-        h = make_heuristics(self.coords, self.goals)
+    def __init__(self, graph, precompute_heuristics=False, landmarks=None, euclidean=True, queue='lazy'):
+        super().__init__(graph)
+        if queue not in HEAPS:
+            raise ValueError(f"Unknown queue: {queue}")
+        # 'lazy' (heapq) or 'heap' (indexed, fewer entries queued but slower); both pop in the same order
+        self.queue = queue
+        self.precompute_heuristics = precompute_heuristics
+        # Optional landmarks.LandmarkTable for the ALT bound (see utils.make_heuristics)
+        self.landmarks = landmarks
+        self.euclidean = euclidean
+        # Most nodes queued at once during the last search()
+        self.max_queue_size = 0
+
+    def steps(self, observe):
+        with self.stats_phase('heuristics'):
+            h = self.observe_heuristic(make_heuristics(self.coords, self.goals, precompute=self.precompute_heuristics,
+                                                       landmarks=self.landmarks, euclidean=self.euclidean))
         g_cost = defaultdict(lambda: math.inf)
         g_cost[self.start] = 0.0
 
+        # parent[n] is the predecessor of n on the cheapest known path. g only ever
+        # decreases along parent links, so nodes on that path are never re-added
+        parent = {self.start: None}
+
         counter = 0
 
-        # priority queue: (g(n) + h(n), h(n), node, counter, path)
-        min_heap = []
+        # priority queue keyed (g(n) + h(n), h(n), counter); a cheaper route lowers a queued node's key
+        min_heap = HEAPS[self.queue]()
         h_0 = h(self.start) 
         f_0 = g_cost[self.start] + h_0
 
-        heapq.heappush(min_heap, (f_0, h_0, counter, self.start, [self.start]))
+        min_heap.push(self.start, (f_0, h_0, counter))
+        push, pop = self.observe_queue(min_heap.push, min_heap.pop, min_heap.__len__)
         number_of_nodes = 1
+        # entry_of[n] is the event entry (counter) of n's latest, cheapest generation, kept only when observed
+        if observe:
+            entry_of = {self.start: 0}
+            yield SearchEvent('generate', self.start, 0, g=0.0, h=h_0)
 
         while min_heap:
-            _f, _h, _counter, current_node, path = heapq.heappop(min_heap)
-
-
-            self.frontier.remove(current_node)
+            key, current_node = pop()
 
             is_goal = current_node in self.goals
 
             
             if is_goal:
-                for node in min_heap:
-                    if node[3] not in self.frontier:
-                        self.frontier.append(node[3])
-                if step_callback:
-                    step_callback(current_node, None, path, self.frontier, is_goal, g_cost[current_node], h(current_node))
-                return [number_of_nodes, path, current_node]
+                path = self.trace_path(parent, current_node)
+                if observe:
+                    yield SearchEvent('goal', current_node, entry_of[current_node], g=g_cost[current_node], h=key[1], path=path)
+                self.max_queue_size = min_heap.max_size
+                return self.finish_stats([number_of_nodes, path, current_node], parents=(parent,))
+            if observe:
+                yield SearchEvent('expand', current_node, entry_of[current_node], g=g_cost[current_node], h=key[1])
             
 
                 # return u, number_of_nodes, reconstruct(start, u)
             for neighbor, path_cost in self.graph['adjacency_list'][current_node]:
                 
-                if neighbor in path:
-                    continue
                 total_cost = g_cost[current_node] + path_cost
                 if total_cost < g_cost[neighbor]:
                     g_cost[neighbor] = total_cost
+                    parent[neighbor] = current_node
                     h_n = h(neighbor)
                     f_neighbor = total_cost + h_n # total cost represents g(n)
-                    new_path = path + [neighbor]
 
                     counter += 1
-                    heapq.heappush(min_heap, (f_neighbor, h_n, counter, neighbor, new_path))
+                    inserted = push(neighbor, (f_neighbor, h_n, counter))
                     number_of_nodes += 1
 
-                    for node in min_heap:
-                        if node[3] not in self.frontier:
-                            self.frontier.append(node[3])
-                    if step_callback:
-                        step_callback(current_node, neighbor, new_path, self.frontier, is_goal, g_cost[neighbor], h_n)
-        return [number_of_nodes, None, None]
\ No newline at end of file
+                    if observe:
+                        if not inserted:
+                            # The queued node's key was lowered: it now stands for a new route
+                            yield SearchEvent('prune', neighbor, entry_of[neighbor])
+                        entry_of[neighbor] = counter
+                        yield SearchEvent('generate', neighbor, counter, entry_of[current_node], g=total_cost, h=h_n)
+        self.max_queue_size = min_heap.max_size
+        return self.finish_stats([number_of_nodes, None, None], parents=(parent,))
@@ -0,0 +1,146 @@
+from concurrent.futures import ProcessPoolExecutor
+import json
+import sys
+import time
+
+from cli import create_searcher, heuristic_options
+from contraction import load_hierarchy
+from dijkstra import ShortestPathTreeCache
+from graph import CSRGraph
+from loader import load_graph
+
+
+def parse_queries(lines):
+    """Parse query lines of the form "<origin> <dest>[; <dest>...] <method>".
+
+    Blank lines and lines starting with '#' are skipped. Yields (origin, destinations, method).
+    """
+    for line_number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        fields = line.split()
+        if len(fields) < 3:
+            raise ValueError(f"Query line {line_number}: expected '<origin> <destinations> <method>', got {line!r}")
+        try:
+            origin = int(fields[0])
+            destinations = [int(d) for d in ' '.join(fields[1:-1]).replace(',', ';').split(';') if d.strip()]
+        except ValueError:
+            raise ValueError(f"Query line {line_number}: node IDs must be integers, got {line!r}")
+        yield origin, destinations, fields[-1]
+
+
+def query_graph(graph, origin, destinations):
+    """graph with its Origin/Destinations replaced; shares all node and edge data with graph"""
+    if isinstance(graph, CSRGraph):
+        try:
+            return graph.with_endpoints(graph.index_of(origin), [graph.index_of(d) for d in destinations])
+        except KeyError as e:
+            raise ValueError(f"Unknown node: {e.args[0]}")
+
+    for node in [origin] + destinations:
+        if node not in graph['adjacency_list'] and node not in graph['nodes']:
+            raise ValueError(f"Unknown node: {node}")
+    return dict(graph, origin=origin, destinations=destinations)
+
+
+def run_query(graph, query, graph_search=False, precompute_heuristics=False, tree_cache=None,
+              landmarks=None, euclidean=True, hierarchy=None):
+    """Answer one (origin, destinations, method) query; returns a JSON-ready result dict"""
+    origin, destinations, method = query
+    result = {'origin': origin, 'destinations': destinations, 'method': method}
+    start_time = time.perf_counter()
+    try:
+        searcher = create_searcher(method, query_graph(graph, origin, destinations),
+                                   graph_search, precompute_heuristics, tree_cache, landmarks, euclidean, hierarchy)
+        number_of_nodes, path, goal = searcher.search()
+    except (ValueError, SystemExit) as e:
+        result['error'] = str(e)
+        return result
+
+    if isinstance(graph, CSRGraph):
+        path = graph.to_ids(path)
+        goal = graph.to_id(goal)
+    result.update(goal=goal, nodes=number_of_nodes, path=path,
+                  ms=round((time.perf_counter() - start_time) * 1000, 3))
+    return result
+
+
+def make_tree_cache(spt_cache_mb):
+    """A ShortestPathTreeCache with a budget of spt_cache_mb megabytes, or None when not set"""
+    if not spt_cache_mb:
+        return None
+    return ShortestPathTreeCache(int(spt_cache_mb * 1024 * 1024))
+
+
+# Per-process state for the worker pool: each worker loads the graph once
+worker_graph = None
+worker_options = {}
+
+
+def init_worker(file_path, csr, cache, options, spt_cache_mb=None, landmarks=None, heuristic=None, contract=False):
+    global worker_graph, worker_options
+    worker_graph, _stats = load_graph(file_path, csr=csr, cache=cache)
+    table, euclidean = heuristic_options(file_path, landmarks, heuristic, worker_graph)
+    hierarchy = load_hierarchy(file_path, worker_graph) if contract else None
+    worker_options = dict(options, tree_cache=make_tree_cache(spt_cache_mb), landmarks=table, euclidean=euclidean,
+                          hierarchy=hierarchy)
+
+
+def run_worker_query(query):
+    return run_query(worker_graph, query, **worker_options)
+
+
+def run_batch(file_path, queries, workers=1, csr=False, cache=False, graph_search=False,
+              precompute_heuristics=False, graph=None, spt_cache_mb=None, landmarks=None, heuristic=None):
+    """Yield one result dict per query, in query order, loading the graph once per process.
+
+    With workers > 1 the queries are spread over a process pool whose workers each
+    load file_path themselves (with cache=True they all map the same cache file).
+    spt_cache_mb gives every process a shortest-path-tree cache of that size for dijkstra queries.
+    landmarks and heuristic are the CLI's --landmarks and --heuristic options.
+    """
+    options = {'graph_search': graph_search, 'precompute_heuristics': precompute_heuristics}
+    queries = list(queries)
+    contract = any(method == 'ch' for _origin, _destinations, method in queries)
+    if workers <= 1:
+        if graph is None:
+            graph, _stats = load_graph(file_path, csr=csr, cache=cache)
+        table, euclidean = heuristic_options(file_path, landmarks, heuristic, graph)
+        hierarchy = load_hierarchy(file_path, graph) if contract else None
+        tree_cache = make_tree_cache(spt_cache_mb)
+        for query in queries:
+            yield run_query(graph, query, tree_cache=tree_cache, landmarks=table, euclidean=euclidean,
+                            hierarchy=hierarchy, **options)
+        return
+
+    # Build the landmark and hierarchy files once here, so the workers only map them
+    heuristic_options(file_path, landmarks, heuristic)
+    if contract:
+        load_hierarchy(file_path)
+    chunksize = max(1, len(queries) // (workers * 8))
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                             initargs=(file_path, csr, cache, options, spt_cache_mb, landmarks, heuristic,
+                                       contract)) as executor:
+        yield from executor.map(run_worker_query, queries, chunksize=chunksize)
+
+
+def batch(file_path, query_file='-', workers=1, csr=False, cache=False, graph_search=False,
+          precompute_heuristics=False, spt_cache_mb=None, landmarks=None, heuristic=None, out=sys.stdout):
+    """CLI batch mode: answer every query in query_file ('-' for stdin), one JSON line each"""
+    start_time = time.perf_counter()
+    if query_file == '-':
+        queries = list(parse_queries(sys.stdin))
+    else:
+        with open(query_file, 'r') as file:
+            queries = list(parse_queries(file))
+
+    count = 0
+    for result in run_batch(file_path, queries, workers, csr, cache, graph_search, precompute_heuristics,
+                            spt_cache_mb=spt_cache_mb, landmarks=landmarks, heuristic=heuristic):
+        out.write(json.dumps(result) + '\n')
+        count += 1
+
+    elapsed = time.perf_counter() - start_time
+    rate = count / elapsed if elapsed else float('inf')
+    print(f"{count} queries in {elapsed * 1000:.2f} ms ({rate:.0f} queries/s, {workers} worker(s))", file=sys.stderr)
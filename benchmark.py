@@ -0,0 +1,401 @@
+from astar import AS
+from dijkstra import CUS1
+from cli import ALGORITHM_MAP, create_searcher
+from contraction import CH, ContractionHierarchy
+from generator import generate
+from graph import CSRGraph, integer_cost_bound
+from loader import load_graph
+from utils import make_heuristics
+from collections import defaultdict
+import csv
+import gc
+import heapq
+import json
+import math
+import os
+import random
+import signal
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Columns of a bench result row, in CSV order
+BENCH_FIELDS = (
+    'graph', 'nodes', 'edges', 'method', 'status', 'runs', 'median_ms', 'p95_ms', 'min_ms',
+    'number_of_nodes', 'expansions_per_sec', 'path_length', 'peak_kb', 'preprocess_s', 'index_kb',
+)
+
+
+def dense_graph(nodes, degree, seed=0):
+    """Random dict graph on a 1000x1000 plane with degree out-edges per node.
+
+    Edge costs are the rounded-up straight-line length times a factor in [1, 2),
+    so the straight-line heuristic stays admissible.
+    """
+    rng = random.Random(seed)
+    coords = {node: (rng.randrange(1000), rng.randrange(1000)) for node in range(1, nodes + 1)}
+    adjacency_list = {}
+    for node in coords:
+        edges = {}
+        for neighbor in rng.sample(range(1, nodes + 1), min(degree + 1, nodes)):
+            if neighbor != node and len(edges) < degree:
+                distance = math.dist(coords[node], coords[neighbor])
+                edges[neighbor] = math.ceil(distance * (1 + rng.random()))
+        adjacency_list[node] = sorted(edges.items())
+    max_cost = integer_cost_bound(cost for neighbors in adjacency_list.values() for _neighbor, cost in neighbors)
+    return {'nodes': coords, 'adjacency_list': adjacency_list, 'origin': 1, 'destinations': [nodes],
+            'max_edge_cost': max_cost}
+
+
+def lazy_dijkstra(graph):
+    """CUS1.search as it was with a lazy heapq, returning (result, most entries queued at once)"""
+    start, goals = graph['origin'], set(graph['destinations'])
+    distances = defaultdict(lambda: math.inf)
+    distances[start] = 0.0
+    parent = {start: None}
+    number_of_nodes = 1
+    counter = 0
+    min_heap = [(0, counter, start)]
+    max_size = 1
+
+    while min_heap:
+        cost, _counter, current_node = heapq.heappop(min_heap)
+        if current_node in goals:
+            path = []
+            node = current_node
+            while node is not None:
+                path.append(node)
+                node = parent[node]
+            return [number_of_nodes, path[::-1], current_node], max_size
+
+        for neighbor, edge_cost in graph['adjacency_list'][current_node]:
+            new_cost = cost + edge_cost
+            if new_cost < distances[neighbor]:
+                number_of_nodes += 1
+                distances[neighbor] = new_cost
+                parent[neighbor] = current_node
+                counter += 1
+                heapq.heappush(min_heap, (new_cost, counter, neighbor))
+                max_size = max(max_size, len(min_heap))
+    return [number_of_nodes, None, None], max_size
+
+
+def lazy_astar(graph):
+    """AS.search as it was with a lazy heapq, returning (result, most entries queued at once)"""
+    start, goals = graph['origin'], set(graph['destinations'])
+    h = make_heuristics(graph['nodes'], goals)
+    g_cost = defaultdict(lambda: math.inf)
+    g_cost[start] = 0.0
+    parent = {start: None}
+    counter = 0
+    h_0 = h(start)
+    min_heap = [(h_0, h_0, counter, start)]
+    number_of_nodes = 1
+    max_size = 1
+
+    while min_heap:
+        _f, _h, _counter, current_node = heapq.heappop(min_heap)
+        if current_node in goals:
+            path = []
+            node = current_node
+            while node is not None:
+                path.append(node)
+                node = parent[node]
+            return [number_of_nodes, path[::-1], current_node], max_size
+
+        for neighbor, path_cost in graph['adjacency_list'][current_node]:
+            total_cost = g_cost[current_node] + path_cost
+            if total_cost < g_cost[neighbor]:
+                g_cost[neighbor] = total_cost
+                parent[neighbor] = current_node
+                h_n = h(neighbor)
+                counter += 1
+                heapq.heappush(min_heap, (total_cost + h_n, h_n, counter, neighbor))
+                number_of_nodes += 1
+                max_size = max(max_size, len(min_heap))
+    return [number_of_nodes, None, None], max_size
+
+
+def heap_benchmark(nodes=20000, degree=32, queries=5, repeat=3, seed=0):
+    """Time CUS1 and AS against their lazy heapq versions on a dense random graph.
+
+    CUS1 runs on its lazy heap, indexed heap and bucket queue, AS on both heaps. Every query runs each
+    version repeat times; results must agree. Prints the median time per query and
+    the largest queue each version held.
+    """
+    graph = dense_graph(nodes, degree, seed)
+    rng = random.Random(seed)
+    endpoints = [(rng.randrange(1, nodes + 1), rng.randrange(1, nodes + 1)) for _ in range(queries)]
+    print(f"Dense graph: {nodes} nodes, {nodes * degree} edges, {queries} queries x {repeat}")
+
+    def run(search):
+        times, peaks = [], []
+        for origin, destination in endpoints:
+            query = dict(graph, origin=origin, destinations=[destination])
+            for _ in range(repeat):
+                start_time = time.perf_counter()
+                result, peak = search(query)
+                times.append(time.perf_counter() - start_time)
+            peaks.append(peak)
+        return statistics.median(times), max(peaks)
+
+    def queued(algorithm, **options):
+        def search(query):
+            searcher = algorithm(query, **options)
+            return searcher.search(), searcher.max_queue_size
+        return search
+
+    versions = (
+        ('dijkstra', 'lazy heapq', lazy_dijkstra),
+        ('dijkstra', 'lazy heap', queued(CUS1, queue='lazy')),
+        ('dijkstra', 'indexed heap', queued(CUS1, queue='heap')),
+        ('dijkstra', 'bucket queue', queued(CUS1, queue='buckets')),
+        ('astar', 'lazy heapq', lazy_astar),
+        ('astar', 'lazy heap', queued(AS, queue='lazy')),
+        ('astar', 'indexed heap', queued(AS, queue='heap')),
+    )
+    expected = {}
+    for name, queue, search in versions:
+        for origin, destination in endpoints:
+            query = dict(graph, origin=origin, destinations=[destination])
+            result = search(query)[0]
+            if expected.setdefault((name, origin, destination), result) != result:
+                raise AssertionError(f"{name}: {queue} result differs for {origin} -> {destination}")
+
+        elapsed, peak = run(search)
+        print(f"{name:9} {queue + ':':14} {elapsed * 1000:9.2f} ms  peak queue {peak}")
+
+
+class BenchTimeout(Exception):
+    pass
+
+
+def run_limited(function, seconds):
+    """function() under a wall-clock limit in seconds (None or 0 for none); BenchTimeout when it runs over.
+
+    The limit uses SIGALRM, so it only applies on platforms that have it.
+    """
+    if not seconds or not hasattr(signal, 'setitimer'):
+        return function()
+
+    def expire(_signum, _frame):
+        raise BenchTimeout()
+
+    previous = signal.signal(signal.SIGALRM, expire)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        return function()
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def parse_spec(spec):
+    """(kind, [int fields]) of a --generate spec; ValueError if it is malformed"""
+    kind, *fields = spec.split(':')
+    counts = {'random': (2, 3), 'geometric': (1, 2), 'grid': (1, 2), 'road': (1, 2)}
+    try:
+        if len(fields) in counts[kind]:
+            return kind, [int(field) for field in fields]
+    except (KeyError, ValueError):
+        pass
+    raise ValueError(f"Unknown graph spec: {spec}")
+
+
+def bench_corpus(files=(), specs=(), csr=False):
+    """(name, graph) for each problem file and generated graph spec.
+
+    random:NODES:DEGREE[:SEED] is built in memory; geometric, grid and road:NODES[:SEED]
+    are written by the generator module to a temporary file and loaded like any problem file.
+    """
+    for fname in files:
+        graph, _stats = load_graph(fname, csr=csr)
+        yield fname, graph
+    with tempfile.TemporaryDirectory() as directory:
+        for spec in specs:
+            kind, fields = parse_spec(spec)
+            if kind == 'random':
+                graph = dense_graph(*fields)
+                yield spec, CSRGraph.from_dict(graph) if csr else graph
+                continue
+            path = os.path.join(directory, spec.replace(':', '_') + '.txt')
+            generate(kind, path, nodes=fields[0], seed=fields[1] if len(fields) > 1 else 0)
+            graph, _stats = load_graph(path, csr=csr)
+            yield spec, graph
+
+
+def bench_methods(methods=None):
+    """Method names to run: the given ones, else one name per class in ALGORITHM_MAP"""
+    if methods:
+        for method in methods:
+            if method not in ALGORITHM_MAP:
+                raise ValueError(f"Unknown method: {method}")
+        return list(methods)
+    names = {}
+    for method, algorithm in ALGORITHM_MAP.items():
+        names.setdefault(algorithm, method)
+    return list(names.values())
+
+
+def bench_method(name, graph, method, warmup=1, repeat=5, time_limit=10.0, preprocess_limit=600.0):
+    """Time one method on one graph and return its result row (see BENCH_FIELDS).
+
+    A successful row also carries the method's SearchStats under 'stats', which only
+    the JSON report includes. time_limit applies to each search run and preprocess_limit to building a contraction hierarchy.
+    """
+    if isinstance(graph, CSRGraph):
+        nodes, edges = len(graph), graph.edge_count
+    else:
+        nodes, edges = len(graph['nodes']), sum(len(neighbors) for neighbors in graph['adjacency_list'].values())
+    row = dict.fromkeys(BENCH_FIELDS)
+    row.update(graph=name, nodes=nodes, edges=edges, method=method, status='ok', runs=0)
+
+    hierarchy = None
+    try:
+        if ALGORITHM_MAP[method] is CH:
+            # Built in memory, so benchmarking never writes a .ch file beside the problem files;
+            # build records the contraction time, which the timed runs below leave out
+            hierarchy = run_limited(lambda: ContractionHierarchy.build(graph), preprocess_limit)
+            row['preprocess_s'] = round(hierarchy.build_seconds, 3)
+            row['index_kb'] = round(hierarchy.nbytes() / 1024, 1)
+
+        def run(stats=None):
+            searcher = create_searcher(method, graph, hierarchy=hierarchy)
+            if stats is not None:
+                stats.append(searcher.enable_stats())
+            gc.collect()
+            start_time = time.perf_counter()
+            result = run_limited(searcher.search, time_limit)
+            return result, time.perf_counter() - start_time
+
+        for _ in range(warmup):
+            run()
+        times = []
+        for _ in range(repeat):
+            result, elapsed = run()
+            times.append(elapsed)
+
+        # Memory is measured on a separate run, so tracemalloc does not slow the timed ones
+        tracemalloc.start()
+        try:
+            run()
+            _current, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        # Likewise the search counters, which the timed runs leave disabled
+        stats = []
+        run(stats)
+        row['stats'] = stats[0].as_dict()
+    except BenchTimeout:
+        row['status'] = 'timeout'
+        return row
+    except (ValueError, RecursionError, MemoryError) as e:
+        row['status'] = f"error: {type(e).__name__}"
+        return row
+
+    number_of_nodes, path, _goal = result
+    median = statistics.median(times)
+    expansions = row['stats']['expansions']
+    row.update(
+        runs=len(times),
+        median_ms=round(median * 1000, 3),
+        p95_ms=round(percentile(times, 0.95) * 1000, 3),
+        min_ms=round(min(times) * 1000, 3),
+        number_of_nodes=number_of_nodes,
+        expansions_per_sec=round(expansions / median) if median else None,
+        path_length=len(path) if path else 0,
+        peak_kb=round(peak / 1024, 1),
+    )
+    return row
+
+
+def load_bench_rows(path):
+    """Result rows from a JSON or CSV file written by bench"""
+    with open(path, newline='') as file:
+        if path.endswith('.csv'):
+            rows = list(csv.DictReader(file))
+        else:
+            rows = json.load(file)['results']
+    for row in rows:
+        for field in ('median_ms', 'number_of_nodes', 'path_length'):
+            if row.get(field) not in (None, ''):
+                row[field] = float(row[field])
+    return rows
+
+
+def compare_rows(rows, baseline_rows, threshold=0.10):
+    """Regression messages for rows slower than the baseline by more than threshold, or with changed results"""
+    baseline = {(row['graph'], row['method']): row for row in baseline_rows}
+    regressions = []
+    for row in rows:
+        base = baseline.get((row['graph'], row['method']))
+        if base is None:
+            continue
+        name = f"{row['graph']} {row['method']}"
+        if row['status'] != base['status']:
+            regressions.append(f"{name}: status {base['status']} -> {row['status']}")
+            continue
+        if row['status'] != 'ok':
+            continue
+        for field in ('number_of_nodes', 'path_length'):
+            if float(row[field]) != base[field]:
+                regressions.append(f"{name}: {field} {base[field]:g} -> {row[field]}")
+        # A baseline median rounded to 0 ms is too fast to compare against
+        if base['median_ms'] > 0 and row['median_ms'] > base['median_ms'] * (1 + threshold):
+            regressions.append(f"{name}: median {base['median_ms']:.3f} -> {row['median_ms']:.3f} ms "
+                               f"(+{(row['median_ms'] / base['median_ms'] - 1) * 100:.0f}%)")
+    return regressions
+
+
+def bench(files=(), specs=(), methods=None, warmup=1, repeat=5, csr=False, time_limit=10.0, preprocess_limit=600.0,
+          json_path=None, csv_path=None, baseline=None, threshold=0.10):
+    """Run every method over the corpus, print a table, write JSON/CSV and check against a baseline.
+
+    Returns the list of regression messages (empty without a baseline).
+    """
+    methods = bench_methods(methods)
+    for spec in specs:
+        parse_spec(spec)
+    rows = []
+    print(f"{'graph':30} {'method':12} {'status':9} {'median ms':>11} {'p95 ms':>11} {'exp/s':>11} {'peak KB':>10}")
+    for name, graph in bench_corpus(files, specs, csr):
+        for method in methods:
+            row = bench_method(name, graph, method, warmup, repeat, time_limit, preprocess_limit)
+            rows.append(row)
+            if row['status'] == 'ok':
+                print(f"{os.path.basename(name)[:30]:30} {method:12} {'ok':9} {row['median_ms']:11.3f} "
+                      f"{row['p95_ms']:11.3f} {row['expansions_per_sec'] or 0:11} {row['peak_kb']:10.1f}", flush=True)
+            else:
+                print(f"{os.path.basename(name)[:30]:30} {method:12} {row['status']}", flush=True)
+            if row['preprocess_s'] is not None:
+                print(f"{'':30} {'':12} contraction {row['preprocess_s']:.3f} s, hierarchy {row['index_kb']} KB")
+
+    if json_path:
+        report = {
+            'python': sys.version.split()[0], 'csr': csr, 'warmup': warmup, 'repeat': repeat,
+            'time_limit': time_limit, 'preprocess_limit': preprocess_limit, 'results': rows,
+        }
+        with open(json_path, 'w') as file:
+            json.dump(report, file, indent=1)
+    if csv_path:
+        with open(csv_path, 'w', newline='') as file:
+            writer = csv.DictWriter(file, fieldnames=BENCH_FIELDS, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(rows)
+
+    regressions = []
+    if baseline:
+        regressions = compare_rows(rows, load_bench_rows(baseline), threshold)
+        for message in regressions:
+            print(f"REGRESSION {message}")
+        print(f"{len(regressions)} regression(s) against {baseline}")
+    return regressions
@@ -1,19 +1,33 @@
-from search_algorithms import SearchAlgorithms
+from search_algorithms import SearchAlgorithms, SearchEvent, TreePath
 from collections import deque
 
 class BFS(SearchAlgorithms):
-    def search(self, step_callback=None):
+    def __init__(self, graph, graph_search=False):
+        super().__init__(graph)
+        # Graph search generates each node at most once instead of only avoiding cycles on the current path
+        self.graph_search = graph_search
+
+    def steps(self, observe):
         
         number_of_nodes = 1  # Count the origin node
-        queue = deque([(self.start, [self.start])])  # (current_node, path_to_current_node)
+
+        # Search tree stored as parallel arrays, queue holds indices into them
+        tree_nodes = [self.start]
+        tree_parents = [-1]
+        tree_depths = [0]
+        queue = deque([0])
+        push, pop = self.observe_queue(queue.append, queue.popleft, queue.__len__)
+        reached = {self.start}
+        # Nodes on the path to the entry being expanded, for the cycle check in tree search
+        tree_path = TreePath(tree_nodes, tree_parents, tree_depths)
+        # Tree indices double as the event entries
+        if observe:
+            yield SearchEvent('generate', self.start, 0)
 
         while queue:
             
-            current_node, path = queue.popleft()
-
-           
-            self.frontier.remove(current_node)
-       
+            index = pop()
+            current_node = tree_nodes[index]
             
             # Check if goal is reached
             is_goal = current_node in self.goals
@@ -21,29 +35,35 @@ class BFS(SearchAlgorithms):
            
             # If goal is found, return immediately after showing the solution
             if is_goal:
-                for node in queue:
-                    if node[0] not in self.frontier:               
-                        self.frontier.append(node[0])
-                if step_callback:
-                    step_callback(current_node, None, path, self.frontier, is_goal)
-                return [number_of_nodes, path, current_node]
+                path = self.trace_tree_path(tree_nodes, tree_parents, index)
+                if observe:
+                    yield SearchEvent('goal', current_node, index, path=path)
+                return self.finish_stats([number_of_nodes, path, current_node], tree_parents=tree_parents)
+
+            if not self.graph_search:
+                on_path = tree_path.move_to(index)
+                depth = tree_depths[index] + 1
+
+            if observe:
+                yield SearchEvent('expand', current_node, index)
             
             # Explore neighbors
             for neighbor, cost in self.graph['adjacency_list'][current_node]:
-                if neighbor not in path:     
-                    number_of_nodes += 1
-                    
-
-                    new_path = path + [neighbor]
-                    queue.append((neighbor, new_path))
-                    for node in queue:
-                        if node[0] not in self.frontier:
-                            self.frontier.append(node[0])
-                    if step_callback:
-                        step_callback(current_node, neighbor, new_path, self.frontier, is_goal)
-                 
-        # If no path found, still show final state
-        if step_callback:
-            step_callback(current_node, None, path, [], False)
+                if self.graph_search:
+                    if neighbor in reached:
+                        continue
+                    reached.add(neighbor)
+                elif neighbor in on_path:
+                    continue
+
+                number_of_nodes += 1
+
+                tree_nodes.append(neighbor)
+                tree_parents.append(index)
+                if not self.graph_search:
+                    tree_depths.append(depth)
+                push(len(tree_nodes) - 1)
+                if observe:
+                    yield SearchEvent('generate', neighbor, len(tree_nodes) - 1, index)
             
-        return [number_of_nodes, None, None]  # No path found
\ No newline at end of file
+        return self.finish_stats([number_of_nodes, None, None], tree_parents=tree_parents)  # No path found
@@ -0,0 +1,122 @@
+from search_algorithms import SearchAlgorithms, SearchEvent
+from graph import reverse_adjacency
+from utils import make_heuristics
+from functools import partial
+import heapq
+import math
+
+
+class BiDijkstra(SearchAlgorithms):
+    """Bidirectional Dijkstra: one search forward from the origin and one backward
+    from every destination at once (over the reversed edges), meeting in the middle.
+
+    mu is the cheapest origin-to-destination path seen where the two searches touch.
+    Each step expands the side with the smaller queue, and the search stops once the
+    two queue minimums add up to at least mu, since no unexplored meeting can beat it.
+    """
+    heuristic = False
+
+    def __init__(self, graph, precompute_heuristics=False):
+        super().__init__(graph)
+        self.precompute_heuristics = precompute_heuristics
+
+    def steps(self, observe):
+        adjacency = (self.graph['adjacency_list'], reverse_adjacency(self.graph))
+        if self.heuristic:
+            # Average of the two straight-line estimates, so both sides share one
+            # consistent potential: the backward search uses -potential(n)
+            with self.stats_phase('heuristics'):
+                to_goal = make_heuristics(self.coords, self.goals, precompute=self.precompute_heuristics)
+                to_start = make_heuristics(self.coords, [self.start], precompute=self.precompute_heuristics)
+
+            def forward_h(n):
+                return (to_goal(n) - to_start(n)) / 2
+
+            def backward_h(n):
+                return (to_start(n) - to_goal(n)) / 2
+            h = (self.observe_heuristic(forward_h), self.observe_heuristic(backward_h))
+        else:
+            h = None
+
+        g_cost = ({self.start: 0.0}, {goal: 0.0 for goal in self.goals})
+        # parent[0][n] is n's predecessor towards the origin, parent[1][n] its successor towards a destination
+        parent = ({self.start: None}, {goal: None for goal in self.goals})
+
+        counter = 0
+        # priority queues: (key, counter, node, g(n) when pushed); key is g(n) or g(n) + h(n).
+        # counter doubles as the event entry, so both trees share one numbering
+        heaps = ([], [])
+        for side, roots in ((0, [self.start]), (1, sorted(self.goals))):
+            for node in roots:
+                key = h[side](node) if h else 0.0
+                heaps[side].append((key, counter, node, 0.0))
+                if observe:
+                    yield SearchEvent('generate', node, counter, g=0.0, h=key if h else None)
+                counter += 1
+            heapq.heapify(heaps[side])
+        number_of_nodes = counter
+
+        def queued():
+            return len(heaps[0]) + len(heaps[1])
+        # (push, pop) per side; an entry is stale once its node was re-pushed with a cheaper g
+        operations = [self.observe_queue(partial(heapq.heappush, heaps[side]), partial(heapq.heappop, heaps[side]), queued,
+                                         stale=lambda item, costs=g_cost[side]: item[3] > costs[item[2]])
+                      for side in (0, 1)]
+
+        mu = 0.0 if self.start in self.goals else math.inf
+        meet = self.start if self.start in self.goals else None
+
+        while heaps[0] and heaps[1]:
+            # The potentials cancel along any origin-destination path, so the sum of
+            # the two smallest keys bounds every path not yet seen
+            if heaps[0][0][0] + heaps[1][0][0] >= mu:
+                break
+
+            side = 0 if len(heaps[0]) <= len(heaps[1]) else 1
+            key, entry, current_node, g = operations[side][1]()
+            if g > g_cost[side][current_node]:
+                if observe:
+                    yield SearchEvent('prune', current_node, entry)
+                continue  # stale entry; the node was re-pushed with a cheaper g
+            if observe:
+                yield SearchEvent('expand', current_node, entry, g=g, h=key - g if h else None)
+
+            costs, other_costs = g_cost[side], g_cost[1 - side]
+            for neighbor, edge_cost in adjacency[side].get(current_node, ()):
+                new_cost = g + edge_cost
+                if new_cost < costs.get(neighbor, math.inf):
+                    costs[neighbor] = new_cost
+                    parent[side][neighbor] = current_node
+                    h_n = h[side](neighbor) if h else None
+                    counter += 1
+                    operations[side][0]((new_cost + h_n if h else new_cost, counter, neighbor, new_cost))
+                    if observe:
+                        yield SearchEvent('generate', neighbor, counter, entry, g=new_cost, h=h_n)
+                    number_of_nodes += 1
+
+                    if neighbor in other_costs and new_cost + other_costs[neighbor] < mu:
+                        mu = new_cost + other_costs[neighbor]
+                        meet = neighbor
+
+        if meet is None:
+            return self.finish_stats([number_of_nodes, None, None], goal_popped=False, parents=parent)
+
+        path = self.trace_path(parent[0], meet)
+        node = parent[1][meet]
+        while node is not None:
+            path.append(node)
+            node = parent[1][node]
+        if observe:
+            # The path joins the two trees at meet, so no single entry holds it
+            yield SearchEvent('goal', path[-1], g=mu, path=path)
+        return self.finish_stats([number_of_nodes, path, path[-1]], goal_popped=False, parents=parent)
+
+
+class BiAS(BiDijkstra):
+    """Bidirectional A*: BiDijkstra with each side's keys shifted by the average
+    potential (h_destination(n) - h_origin(n)) / 2 of the straight-line estimates.
+
+    Both sides then see the same non-negative reduced edge costs whenever straight-line
+    h is consistent, so BiDijkstra's stopping rule still applies unchanged.
+    """
+    heuristic = True
@@ -3,120 +3,249 @@ from dfs import DFS
 from dijkstra import CUS1
 from gbfs import GBFS
 from astar import AS
-from idastar import CUS2
+from idastar import BOUND_POLICIES, CUS2
+from bidirectional import BiDijkstra, BiAS
+from contraction import CH, load_hierarchy
+from graph import CSRGraph
+from loader import load_graph, precompile as precompile_graphs
+from search_algorithms import SearchStats
+from landmarks import DEFAULT_LANDMARKS, load_landmarks
+import cProfile
 import gc
+import json
+import os
+import pstats
+import statistics
 import time
 import tracemalloc
 
+ALGORITHM_MAP = {
+    'bfs': BFS,
+    'dfs': DFS,
+    'dijkstra': CUS1,
+    'gbfs': GBFS,
+    'astar': AS,
+    'a*': AS,
+    'idastar': CUS2,
+    'ida*': CUS2,
+    'bi-dijkstra': BiDijkstra,
+    'bi-astar': BiAS,
+    'bi-a*': BiAS,
+    'ch': CH
+}
+# Methods that take the graph_search option (the others never re-expand nodes)
+GRAPH_SEARCH_METHODS = {BFS, DFS, GBFS}
+# Methods that use the straight-line heuristic
+HEURISTIC_METHODS = {GBFS, AS, CUS2, BiAS}
+# Methods that can use an ALT landmark table
+LANDMARK_METHODS = {AS, CUS2}
+# CLI.search measurements: repeated wall/CPU timing, tracemalloc memory, or a cProfile run.
+# Each is taken on separate runs, so tracing never inflates the reported times
+# default prints the memory and execution time lines search.py always has, from two separate runs
+MEASURE_MODES = ('default', 'time', 'memory', 'profile')
+# Functions listed by the profile measurement
+PROFILE_LIMIT = 20
+
+
+def create_searcher(method, graph, graph_search=False, precompute_heuristics=False, tree_cache=None,
+                    landmarks=None, euclidean=True, hierarchy=None, transposition_size=0,
+                    bound_policy='exact', bound_growth=2.0):
+    """Instantiate the search class for method on graph; ValueError for unknown methods or unsupported options.
+
+    tree_cache is a dijkstra.ShortestPathTreeCache; only CUS1 uses it, other methods ignore it.
+    landmarks is a landmarks.LandmarkTable; euclidean=False uses its ALT bound alone.
+    hierarchy is a contraction.ContractionHierarchy for ch, which otherwise contracts graph itself.
+    transposition_size bounds the idastar transposition table (0 disables it).
+    bound_policy and bound_growth choose how the idastar bound grows (see idastar.BOUND_POLICIES).
+    """
+    try:
+        algorithm = ALGORITHM_MAP[method]
+    except KeyError:
+        raise ValueError(f"Unknown method: {method}")
+
+    options = {}
+    if graph_search:
+        if algorithm not in GRAPH_SEARCH_METHODS:
+            raise ValueError(f"Graph search mode is not supported by method: {method}")
+        options['graph_search'] = True
+    if precompute_heuristics:
+        if algorithm not in HEURISTIC_METHODS:
+            raise ValueError(f"Method {method} does not use a heuristic")
+        options['precompute_heuristics'] = True
+    if landmarks is not None:
+        if algorithm not in LANDMARK_METHODS:
+            raise ValueError(f"Landmark heuristics are not supported by method: {method}")
+        options['landmarks'] = landmarks
+        options['euclidean'] = euclidean
+    if transposition_size:
+        if algorithm is not CUS2:
+            raise ValueError(f"A transposition table is not supported by method: {method}")
+        options['transposition_size'] = transposition_size
+    if bound_policy != 'exact':
+        if algorithm is not CUS2:
+            raise ValueError(f"Bound policies are not supported by method: {method}")
+        if bound_policy not in BOUND_POLICIES:
+            raise ValueError(f"Unknown bound policy: {bound_policy}")
+        options['bound_policy'] = bound_policy
+        options['bound_growth'] = bound_growth
+    if tree_cache is not None and algorithm is CUS1:
+        options['tree_cache'] = tree_cache
+    if hierarchy is not None and algorithm is CH:
+        options['hierarchy'] = hierarchy
+    return algorithm(graph, **options)
+
+
+def heuristic_options(file_path, landmarks=None, heuristic=None, graph=None):
+    """(LandmarkTable or None, euclidean) for the --landmarks K / --heuristic {euclid,alt,max} options"""
+    if heuristic == 'euclid' or (heuristic is None and not landmarks):
+        return None, True
+    return load_landmarks(file_path, landmarks or DEFAULT_LANDMARKS, graph=graph), heuristic != 'alt'
+
+
 class CLI:
-    def __init__ (self, file_path, method):
-        self.graph = self.open_file(file_path)
+    def __init__ (self, file_path, method, graph_search=False, csr=False, cache=False, precompute_heuristics=False,
+                  landmarks=None, heuristic=None, transposition_size=0, bound_policy='exact', bound_growth=2.0):
+        self.graph, self.load_stats = load_graph(file_path, csr=csr, cache=cache)
+        self.landmarks, self.euclidean = heuristic_options(file_path, landmarks, heuristic, self.graph)
+        # ch answers from the sidecar hierarchy file, contracting the graph first if it is stale
+        self.hierarchy = load_hierarchy(file_path, self.graph) if ALGORITHM_MAP.get(method) is CH else None
         self.file_path = file_path
         self.method = method
-        self.algorithm_map = {
-            'bfs': BFS,
-            'dfs': DFS,
-            'dijkstra': CUS1,
-            'gbfs': GBFS,
-            'astar': AS,
-            'a*': AS,
-            'idastar': CUS2,
-            'ida*': CUS2
-        }
-
-    def open_file(self, fname):
-      graph = {
-            'nodes': {},
-            'adjacency_list': {},
-            'origin': None,
-            'destinations': []
-        }
-        
-      with open(fname, 'r') as file:
-        lines = file.readlines()
-        
-      current_section = None
-        
-      for line in lines:
-        line = line.strip()
-            
-        # Skip empty lines
-        if not line:
-            continue
-        
-        # Identify sections
-        if line == "Nodes:":
-            current_section = "nodes"
-            continue
-        elif line == "Edges:":
-            current_section = "edges"
-            continue
-        elif line == "Origin:":
-            current_section = "origin"
-            continue
-        elif line == "Destinations:":
-            current_section = "destinations"
-            continue
-        
-        # Parse based on current section
-        if current_section == "nodes":
-            # Format: "1: (4,1)"
-            parts = line.split(': ')
-            node_id = int(parts[0])
-            coords = parts[1].strip('()').split(',')
-            x, y = int(coords[0]), int(coords[1])
-            graph['nodes'][node_id] = (x, y)
-            # Initialize empty adjacency list for each node
-            graph['adjacency_list'][node_id] = []
-        
-        elif current_section == "edges":
-            # Format: "(2,1): 4"
-            parts = line.split(': ')
-            edge = parts[0].strip('()').split(',')
-            from_node = int(edge[0])
-            to_node = int(edge[1])
-            cost = int(parts[1])
-            
-            # Build adjacency list: store (neighbor, cost)
-            if from_node not in graph['adjacency_list']:
-                graph['adjacency_list'][from_node] = []
-            graph['adjacency_list'][from_node].append((to_node, cost))
-        
-        elif current_section == "origin":
-            graph['origin'] = int(line)
-        
-        elif current_section == "destinations":
-            # Format: "5; 4"
-            dest_list = line.split(';')
-            graph['destinations'] = [int(d.strip()) for d in dest_list]
-      
-      for node in graph['adjacency_list']:
-          graph['adjacency_list'][node].sort(key=lambda x: x[0])
-
-      return graph
-    
-
-    def search(self):
+        self.graph_search = graph_search
+        self.precompute_heuristics = precompute_heuristics
+        self.transposition_size = transposition_size
+        self.bound_policy = bound_policy
+        self.bound_growth = bound_growth
+        self.algorithm_map = ALGORITHM_MAP
+
+    def create_searcher(self):
         try:
-            searcher = self.algorithm_map[self.method](self.graph)
-        except KeyError:
-            raise SystemExit(f"Unknown method: {self.method}")
-        
-        gc.collect() # Force garbage collection before starting the timer
-        start_time = time.perf_counter()
+            return create_searcher(self.method, self.graph, self.graph_search, self.precompute_heuristics,
+                                   landmarks=self.landmarks, euclidean=self.euclidean, hierarchy=self.hierarchy,
+                                   transposition_size=self.transposition_size,
+                                   bound_policy=self.bound_policy, bound_growth=self.bound_growth)
+        except ValueError as e:
+            raise SystemExit(str(e))
+
+    def measure_time(self, repeat=1, warmup=0):
+        """Run a fresh searcher warmup + repeat times; returns (searcher, result, timing dict) of the last run.
+
+        Nothing is traced, so wall and CPU times are those of the search alone.
+        """
+        wall_times, cpu_times = [], []
+        for run in range(warmup + repeat):
+            searcher = self.create_searcher()
+            gc.collect() # Force garbage collection before starting the timer
+            start_time, start_cpu = time.perf_counter(), time.process_time()
+            result = searcher.search()
+            end_time, end_cpu = time.perf_counter(), time.process_time()
+            if run >= warmup:
+                wall_times.append((end_time - start_time) * 1000)
+                cpu_times.append((end_cpu - start_cpu) * 1000)
+
+        timing = {'runs': repeat, 'warmup': warmup}
+        for name, times in (('wall_ms', wall_times), ('cpu_ms', cpu_times)):
+            timing[name] = {
+                'median': statistics.median(times), 'mean': statistics.fmean(times),
+                'min': min(times), 'max': max(times),
+                'stdev': statistics.stdev(times) if len(times) > 1 else 0.0,
+            }
+        return searcher, result, timing
+
+    def measure_memory(self):
+        """One run under tracemalloc; returns (searcher, result, memory dict) in KB"""
+        searcher = self.create_searcher()
+        gc.collect()
         tracemalloc.start()
+        try:
+            result = searcher.search()
+            memory_used, peak_mem = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return searcher, result, {'total_kb': memory_used / 1024, 'peak_kb': peak_mem / 1024}
+
+    def measure_profile(self, profile_out=None, limit=PROFILE_LIMIT):
+        """One run under cProfile; returns (searcher, result, profile dict) with the top functions by cumulative time.
+
+        With profile_out the full stats are also dumped there for pstats or snakeviz.
+        """
+        searcher = self.create_searcher()
+        gc.collect()
+        profiler = cProfile.Profile()
+        result = profiler.runcall(searcher.search)
+        if profile_out:
+            profiler.dump_stats(profile_out)
+
+        stats = pstats.Stats(profiler)
+        functions = []
+        for (filename, line, name), (_primitive, calls, tottime, cumtime, _callers) in stats.stats.items():
+            functions.append({
+                'function': f"{os.path.basename(filename)}:{line}({name})",
+                'calls': calls, 'tottime_ms': tottime * 1000, 'cumtime_ms': cumtime * 1000,
+            })
+        functions.sort(key=lambda function: function['cumtime_ms'], reverse=True)
+        return searcher, result, {'total_ms': stats.total_tt * 1000, 'output': profile_out, 'top': functions[:limit]}
 
-        initial_mem = tracemalloc.get_traced_memory()[0]
-        number_of_nodes, path, goal = searcher.search() 
+    def measure_stats(self):
+        """One extra run with search counters enabled; returns its SearchStats as a dict.
 
-        end_time = time.perf_counter()
-        memory_used, peak_mem = tracemalloc.get_traced_memory()
+        Kept apart from the measured runs so the counters never add to their times.
+        """
+        searcher = self.create_searcher()
+        stats = searcher.enable_stats()
+        with stats.phase('search'):
+            searcher.search()
+        return stats.as_dict()
 
-        tracemalloc.stop()
+    def search(self, measure='default', repeat=1, warmup=0, profile_out=None, json_output=False, stats=False):
+        """Run the search and print the result with one kind of measurement (see MEASURE_MODES).
 
+        json_output prints a single JSON object instead of the text report; stats adds
+        the search counters, collected on one extra run.
+        """
         if self.method not in self.algorithm_map:
             raise SystemExit(f"Unknown method: {self.method}")
+        if measure == 'default':
+            # Memory from a traced run and time from an untraced one, so tracing never slows the timing
+            searcher, result, memory = self.measure_memory()
+            _searcher, _result, timing = self.measure_time()
+            measurement = {'memory': memory, 'time': timing}
+        elif measure == 'time':
+            if repeat < 1 or warmup < 0:
+                raise SystemExit("repeat must be at least 1 and warmup at least 0")
+            searcher, result, measurement = self.measure_time(repeat, warmup)
+        elif measure == 'memory':
+            searcher, result, measurement = self.measure_memory()
+        elif measure == 'profile':
+            searcher, result, measurement = self.measure_profile(profile_out)
+        else:
+            raise SystemExit(f"Unknown measurement mode: {measure}")
+        number_of_nodes, path, goal = result
+        search_stats = self.measure_stats() if stats else None
 
+        # CSR searches run over dense indices; report the IDs from the file
+        if isinstance(self.graph, CSRGraph):
+            path = self.graph.to_ids(path)
+            goal = self.graph.to_id(goal)
+
+        if json_output:
+            report = {
+                'file': self.file_path, 'method': self.algorithm_map[self.method].__name__,
+                'goal': goal, 'number_of_nodes': number_of_nodes, 'path': path,
+                'measure': measure, measure: measurement,
+                'load': {'bytes': self.load_stats.bytes_read, 'seconds': self.load_stats.seconds,
+                         'nodes': self.load_stats.nodes, 'edges': self.load_stats.edges,
+                         'cached': self.load_stats.cached},
+            }
+            if isinstance(searcher, CUS2):
+                report['idastar'] = dict(searcher.stats, bound_policy=searcher.bound_policy)
+            if self.hierarchy is not None:
+                report['hierarchy'] = {'shortcuts': self.hierarchy.shortcut_count, 'bytes': self.hierarchy.nbytes(),
+                                       'build_seconds': self.hierarchy.build_seconds}
+            if search_stats is not None:
+                report['stats'] = search_stats
+            print(json.dumps(report))
+            return
 
         if path is None:
             path = "Not found"
@@ -124,9 +253,57 @@ class CLI:
         print("Finished execution of search.py")
         print(f"Results: \n\n Filename: {self.file_path} \n Method: {self.algorithm_map[self.method].__name__} \n Goal: {goal} \n Number of Nodes: {number_of_nodes} \n Path: {path}")
 
-        print(f"Total memory usage: {memory_used / 1024} KB")
-        print(f"Peak memory usage: {peak_mem / 1024} KB")
-        print(f"Execution time: {(end_time - start_time) * 1000} milliseconds")
+        if measure == 'default':
+            print(f"Total memory usage: {measurement['memory']['total_kb']} KB")
+            print(f"Peak memory usage: {measurement['memory']['peak_kb']} KB")
+            print(f"Execution time: {measurement['time']['wall_ms']['median']} milliseconds")
+        elif measure == 'time':
+            wall, cpu = measurement['wall_ms'], measurement['cpu_ms']
+            print(f"Execution time: {wall['median']} milliseconds")
+            if measurement['runs'] > 1:
+                print(f"Over {measurement['runs']} runs: wall median {wall['median']:.3f} ms, mean {wall['mean']:.3f}, "
+                      f"min {wall['min']:.3f}, max {wall['max']:.3f}, stdev {wall['stdev']:.3f}; "
+                      f"CPU median {cpu['median']:.3f} ms")
+            else:
+                print(f"CPU time: {cpu['median']} milliseconds")
+        elif measure == 'memory':
+            print(f"Total memory usage: {measurement['total_kb']} KB")
+            print(f"Peak memory usage: {measurement['peak_kb']} KB")
+        else:
+            print(f"Profiled time: {measurement['total_ms']:.3f} milliseconds (slowed down by cProfile)")
+            print(f"{'cumulative ms':>14} {'own ms':>10} {'calls':>9}  function")
+            for function in measurement['top']:
+                print(f"{function['cumtime_ms']:14.3f} {function['tottime_ms']:10.3f} {function['calls']:9}  {function['function']}")
+            if profile_out:
+                print(f"Profile written to {profile_out}")
+        print(f"Graph load: {self.load_stats}")
+        if search_stats is not None:
+            phases = ', '.join(f"{name} {ms:.3f} ms" for name, ms in search_stats['phases_ms'].items())
+            print("Search stats: " + ', '.join(f"{counter.replace('_', ' ')}: {search_stats[counter]}"
+                                               for counter in SearchStats.COUNTERS) + f"; phases: {phases}")
+        if isinstance(searcher, CUS2):
+            stats = searcher.stats
+            print(f"IDA* iterations: {stats['iterations']}, expanded: {stats['expanded']}, "
+                  f"re-expanded: {stats['re_expanded']}, pruned: {stats['pruned']}, max depth: {stats['max_depth']}, "
+                  f"bound policy: {searcher.bound_policy}")
+        if self.hierarchy is not None:
+            print(f"Contraction hierarchy: {self.hierarchy.shortcut_count} shortcuts, "
+                  f"{self.hierarchy.nbytes() / 1024:.1f} KB, contracted in {self.hierarchy.build_seconds:.2f} s")
+
+
+def precompile(directory, force=False, landmarks=None):
+    """Build the binary graph cache (and with landmarks=K, the landmark table) for every problem file in a directory"""
+    count = 0
+    for fname, stats in precompile_graphs(directory, force=force):
+        status = "up to date" if stats.cached else "compiled"
+        print(f"{fname}: {status} ({stats})")
+        if landmarks:
+            start_time = time.perf_counter()
+            graph, _stats = load_graph(fname, cache=True)
+            table = load_landmarks(fname, landmarks, graph=graph, rebuild=force)
+            print(f"{fname}: {len(table.landmarks)} landmarks ready in {(time.perf_counter() - start_time) * 1000:.2f} ms")
+        count += 1
+    print(f"{count} problem file(s) in {directory}")
 
        
 
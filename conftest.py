@@ -0,0 +1,44 @@
+import random
+
+import pytest
+
+from batch import query_graph
+from generator import generate
+
+# (generator, seed) of the small random problem files the search tests run on
+PROBLEMS = [('geometric', 0), ('geometric', 1), ('road', 2)]
+
+
+@pytest.fixture(params=PROBLEMS, ids=[f'{kind}-{seed}' for kind, seed in PROBLEMS])
+def problem_file(request, tmp_path):
+    kind, seed = request.param
+    fname = str(tmp_path / f'{kind}-{seed}.txt')
+    generate(kind, fname, nodes=150, seed=seed)
+    return fname
+
+
+def random_queries(graph, count=12, seed=0):
+    """query_graph copies of graph for count random origins, each with one to three destinations (node IDs)"""
+    rng = random.Random(seed)
+    node_ids = sorted(graph.node_ids if hasattr(graph, 'node_ids') else graph['nodes'])
+    return [query_graph(graph, rng.choice(node_ids), rng.sample(node_ids, rng.randint(1, 3)))
+            for _ in range(count)]
+
+
+def path_cost(graph, path):
+    """Cost of following path's edges in graph; KeyError if one is missing"""
+    cost = 0
+    for from_node, to_node in zip(path, path[1:]):
+        cost += min(c for neighbor, c in graph['adjacency_list'][from_node] if neighbor == to_node)
+    return cost
+
+
+def assert_same_cost(graph, result, expected):
+    """result is a [number_of_nodes, path, goal] as cheap as the expected (CUS1) one"""
+    _count, path, goal = result
+    _count, expected_path, _goal = expected
+    if expected_path is None:
+        assert path is None
+        return
+    assert path[0] == graph['origin'] and path[-1] == goal and goal in graph['destinations']
+    assert path_cost(graph, path) == path_cost(graph, expected_path)
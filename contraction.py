@@ -0,0 +1,454 @@
+from array import array
+from functools import partial
+from itertools import accumulate
+import heapq
+import math
+import mmap
+import os
+import struct
+import sys
+import time
+
+from graph import CSRGraph
+from loader import file_digest, load_graph
+from search_algorithms import SearchAlgorithms, SearchEvent
+
+# Hierarchy file layout: HEADER, then node_ids q[n], rank q[n], up_offsets q[n + 1],
+# down_offsets q[n + 1], up_costs q[u], down_costs q[d], up_targets i[u], up_middles i[u],
+# down_sources i[d], down_middles i[d]; a middle of -1 marks an original edge
+HIERARCHY_MAGIC = b'CHGRAPH\x00'
+HIERARCHY_VERSION = 1
+HIERARCHY_HEADER = struct.Struct('=8sIIqqqqqd32s')
+HIERARCHY_SUFFIX = '.ch'
+# Witness searches give up after settling this many nodes and add the shortcut anyway
+WITNESS_SETTLE_LIMIT = 100
+
+
+class Contractor:
+    """Builds a ContractionHierarchy over a CSRGraph.
+
+    Nodes are contracted cheapest first by twice the edge difference (shortcuts added
+    minus edges removed) plus the number of already contracted neighbours, with lazy
+    re-evaluation. Contracting v adds a shortcut u -> w with middle v for every pair
+    of neighbours whose cheapest path runs through v, unless a bounded witness search
+    finds another path that is no more expensive.
+    """
+    def __init__(self, graph):
+        n = len(graph)
+        # out_edges[u][w] = in_edges[w][u] = (cost, middle) over the nodes not yet contracted
+        self.out_edges = [{} for _ in range(n)]
+        self.in_edges = [{} for _ in range(n)]
+        offsets, targets, costs = graph.offsets, graph.targets, graph.costs
+        for u in range(n):
+            out_u = self.out_edges[u]
+            for e in range(offsets[u], offsets[u + 1]):
+                w, cost = targets[e], costs[e]
+                if w != u and (w not in out_u or cost < out_u[w][0]):
+                    out_u[w] = (cost, -1)
+                    self.in_edges[w][u] = (cost, -1)
+        self.graph = graph
+        self.contracted_neighbors = [0] * n
+
+    def witness_distances(self, source, skip, limit):
+        """Distances from source to nodes within limit, avoiding skip; stops early past WITNESS_SETTLE_LIMIT"""
+        distances = {source: 0}
+        min_heap = [(0, source)]
+        settled = 0
+        while min_heap:
+            d, u = heapq.heappop(min_heap)
+            if d > distances[u]:
+                continue
+            settled += 1
+            if d > limit or settled > WITNESS_SETTLE_LIMIT:
+                break
+            for w, (cost, _middle) in self.out_edges[u].items():
+                new_distance = d + cost
+                if w != skip and new_distance < distances.get(w, math.inf):
+                    distances[w] = new_distance
+                    heapq.heappush(min_heap, (new_distance, w))
+        return distances
+
+    def shortcuts(self, v):
+        """(u, w, cost) for every shortcut contracting v needs"""
+        out_v = self.out_edges[v]
+        if not out_v:
+            return []
+        max_out = max(cost for cost, _middle in out_v.values())
+        needed = []
+        for u, (cost_in, _middle) in self.in_edges[v].items():
+            distances = self.witness_distances(u, v, cost_in + max_out)
+            for w, (cost_out, _middle) in out_v.items():
+                if w != u and distances.get(w, math.inf) > cost_in + cost_out:
+                    needed.append((u, w, cost_in + cost_out))
+        return needed
+
+    def priority(self, v):
+        """(priority, shortcuts) of contracting v next; lower is contracted first"""
+        shortcuts = self.shortcuts(v)
+        edge_difference = len(shortcuts) - len(self.in_edges[v]) - len(self.out_edges[v])
+        return 2 * edge_difference + self.contracted_neighbors[v], shortcuts
+
+    def build(self):
+        start_time = time.perf_counter()
+        n = len(self.graph)
+        rank = array('q', [0]) * n
+        up = [None] * n
+        down = [None] * n
+
+        queue = [(self.priority(v)[0], v) for v in range(n)]
+        heapq.heapify(queue)
+        order = 0
+        while queue:
+            _priority, v = heapq.heappop(queue)
+            # Lazy update: contract v only if it is still no worse than the next candidate
+            current, shortcuts = self.priority(v)
+            if queue and current > queue[0][0]:
+                heapq.heappush(queue, (current, v))
+                continue
+
+            for u, w, cost in shortcuts:
+                if cost < self.out_edges[u].get(w, (math.inf, -1))[0]:
+                    self.out_edges[u][w] = (cost, v)
+                    self.in_edges[w][u] = (cost, v)
+
+            # The remaining edges of v all lead to nodes contracted later, i.e. upwards
+            rank[v] = order
+            order += 1
+            up[v] = self.out_edges[v]
+            down[v] = self.in_edges[v]
+            for w in up[v]:
+                del self.in_edges[w][v]
+                self.contracted_neighbors[w] += 1
+            for u in down[v]:
+                del self.out_edges[u][v]
+                self.contracted_neighbors[u] += 1
+
+        hierarchy = ContractionHierarchy.from_edge_maps(self.graph.node_ids, rank, up, down)
+        hierarchy.build_seconds = time.perf_counter() - start_time
+        return hierarchy
+
+
+class ContractionHierarchy:
+    """Node ranks plus the upward and downward edges (original and shortcut) of every node.
+
+    up[u] holds edges u -> w and down[w] holds edges u -> w (listed by source u), each
+    only towards the node of higher rank, as CSR arrays. A shortcut's middle is the
+    contracted node it bypasses, so its two halves are down[middle] and up[middle].
+    """
+    def __init__(self, node_ids, rank, up_offsets, up_targets, up_costs, up_middles,
+                 down_offsets, down_sources, down_costs, down_middles, buffer=None):
+        self.node_ids = node_ids
+        self.rank = rank
+        self.up_offsets = up_offsets
+        self.up_targets = up_targets
+        self.up_costs = up_costs
+        self.up_middles = up_middles
+        self.down_offsets = down_offsets
+        self.down_sources = down_sources
+        self.down_costs = down_costs
+        self.down_middles = down_middles
+        self.buffer = buffer  # mmap backing the arrays when loaded from a file
+        self.build_seconds = 0.0
+        self.shortcut_count = sum(1 for middles in (up_middles, down_middles) for middle in middles if middle != -1)
+
+        n = len(node_ids)
+        self.contiguous = n == 0 or node_ids[n - 1] - node_ids[0] + 1 == n
+        self.id_index = None
+
+    @classmethod
+    def build(cls, graph):
+        """Contract a CSRGraph (or a dict graph, via CSRGraph.from_dict)"""
+        if not isinstance(graph, CSRGraph):
+            graph = CSRGraph.from_dict(graph)
+        return Contractor(graph).build()
+
+    @classmethod
+    def from_edge_maps(cls, node_ids, rank, up, down):
+        """Pack per-node {neighbor: (cost, middle)} maps into CSR arrays, neighbours in index order"""
+        def pack(edge_maps):
+            offsets = array('q', accumulate([0] + [len(edges) for edges in edge_maps]))
+            ends, costs, middles = array('i'), array('q'), array('i')
+            for edges in edge_maps:
+                for node in sorted(edges):
+                    cost, middle = edges[node]
+                    ends.append(node)
+                    costs.append(cost)
+                    middles.append(middle)
+            return offsets, ends, costs, middles
+
+        return cls(array('q', node_ids), rank, *pack(up), *pack(down))
+
+    def __len__(self):
+        return len(self.node_ids)
+
+    @property
+    def edge_count(self):
+        return len(self.up_targets) + len(self.down_sources)
+
+    def index_of(self, node_id):
+        node_ids = self.node_ids
+        if self.contiguous:
+            i = node_id - node_ids[0] if len(node_ids) else -1
+            if 0 <= i < len(node_ids):
+                return i
+            raise KeyError(node_id)
+        if self.id_index is None:
+            self.id_index = {node_id: i for i, node_id in enumerate(node_ids)}
+        return self.id_index[node_id]
+
+    def nbytes(self):
+        arrays = (self.node_ids, self.rank, self.up_offsets, self.up_targets, self.up_costs, self.up_middles,
+                  self.down_offsets, self.down_sources, self.down_costs, self.down_middles)
+        return sum(a.itemsize * len(a) for a in arrays)
+
+    def middle_of(self, a, b):
+        """Middle of the hierarchy edge a -> b (-1 for an original edge)"""
+        if self.rank[a] < self.rank[b]:
+            for e in range(self.up_offsets[a], self.up_offsets[a + 1]):
+                if self.up_targets[e] == b:
+                    return self.up_middles[e]
+        else:
+            for e in range(self.down_offsets[b], self.down_offsets[b + 1]):
+                if self.down_sources[e] == a:
+                    return self.down_middles[e]
+        raise KeyError((a, b))
+
+    def unpack(self, path):
+        """Expand every shortcut on a path of hierarchy edges into original edges"""
+        if not path:
+            return path
+        result = [path[0]]
+        for a, b in zip(path, path[1:]):
+            stack = [(a, b)]
+            while stack:
+                a, b = stack.pop()
+                middle = self.middle_of(a, b)
+                if middle == -1:
+                    result.append(b)
+                else:
+                    stack.append((middle, b))
+                    stack.append((a, middle))
+        return result
+
+    def save(self, path, source_key=(0, 0, b'')):
+        """Write the hierarchy file; source_key is (size, mtime_ns, digest) of the problem file"""
+        source_size, source_mtime_ns, source_digest = source_key
+        header = HIERARCHY_HEADER.pack(
+            HIERARCHY_MAGIC, HIERARCHY_VERSION, sys.byteorder == 'little',
+            len(self.node_ids), len(self.up_targets), len(self.down_sources),
+            source_size, source_mtime_ns, self.build_seconds, source_digest,
+        )
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, 'wb') as file:
+                file.write(header)
+                for a in (self.node_ids, self.rank, self.up_offsets, self.down_offsets, self.up_costs,
+                          self.down_costs, self.up_targets, self.up_middles, self.down_sources, self.down_middles):
+                    file.write(a)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    @staticmethod
+    def read_header(path):
+        """Header fields of a hierarchy file as a dict, or None if it is missing or unusable"""
+        try:
+            with open(path, 'rb') as file:
+                raw = file.read(HIERARCHY_HEADER.size)
+        except OSError:
+            return None
+        if len(raw) != HIERARCHY_HEADER.size:
+            return None
+        (magic, version, little_endian, n, up_count, down_count,
+         source_size, source_mtime_ns, build_seconds, source_digest) = HIERARCHY_HEADER.unpack(raw)
+        if magic != HIERARCHY_MAGIC or version != HIERARCHY_VERSION or little_endian != (sys.byteorder == 'little'):
+            return None
+        return {
+            'nodes': n, 'up_edges': up_count, 'down_edges': down_count,
+            'source_size': source_size, 'source_mtime_ns': source_mtime_ns,
+            'build_seconds': build_seconds, 'source_digest': source_digest,
+        }
+
+    @classmethod
+    def load(cls, path):
+        """Memory-map a hierarchy file written by save()"""
+        header = cls.read_header(path)
+        if header is None:
+            raise ValueError(f"Not a contraction hierarchy file: {path}")
+        n, up_count, down_count = header['nodes'], header['up_edges'], header['down_edges']
+
+        with open(path, 'rb') as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(buffer)
+        position = HIERARCHY_HEADER.size
+
+        def take(typecode, count):
+            nonlocal position
+            size = struct.calcsize(typecode) * count
+            if position + size > len(view):
+                raise ValueError(f"Truncated contraction hierarchy file: {path}")
+            a = view[position:position + size].cast(typecode)
+            position += size
+            return a
+
+        node_ids = take('q', n)
+        rank = take('q', n)
+        up_offsets = take('q', n + 1)
+        down_offsets = take('q', n + 1)
+        up_costs = take('q', up_count)
+        down_costs = take('q', down_count)
+        up_targets = take('i', up_count)
+        up_middles = take('i', up_count)
+        down_sources = take('i', down_count)
+        down_middles = take('i', down_count)
+        hierarchy = cls(node_ids, rank, up_offsets, up_targets, up_costs, up_middles,
+                        down_offsets, down_sources, down_costs, down_middles, buffer=buffer)
+        hierarchy.build_seconds = header['build_seconds']
+        return hierarchy
+
+
+def hierarchy_path(fname):
+    return fname + HIERARCHY_SUFFIX
+
+
+def load_hierarchy(fname, graph=None, rebuild=False):
+    """ContractionHierarchy for problem file fname, from its sidecar hierarchy file.
+
+    A missing or stale file is rebuilt (from graph if it is a CSRGraph, else from a
+    fresh CSR load) and saved; if it cannot be written the built hierarchy is still returned.
+    """
+    path = hierarchy_path(fname)
+    source = os.stat(fname)
+
+    header = None if rebuild else ContractionHierarchy.read_header(path)
+    if header and header['source_size'] == source.st_size and header['source_mtime_ns'] == source.st_mtime_ns:
+        return ContractionHierarchy.load(path)
+
+    if not isinstance(graph, CSRGraph):
+        graph, _stats = load_graph(fname, csr=True)
+    hierarchy = ContractionHierarchy.build(graph)
+    try:
+        hierarchy.save(path, (source.st_size, source.st_mtime_ns, file_digest(fname)))
+    except OSError:
+        pass
+    return hierarchy
+
+
+class CH(SearchAlgorithms):
+    """Shortest path query on a ContractionHierarchy.
+
+    A forward search from the origin follows only up edges and a backward search from
+    every destination follows only down edges (in reverse), so both climb towards
+    high-rank nodes. Each side stops once its smallest key reaches mu, the best
+    meeting cost so far; the meeting path's shortcuts are then unpacked.
+    """
+    def __init__(self, graph, hierarchy=None):
+        super().__init__(graph)
+        self.hierarchy = hierarchy if hierarchy is not None else ContractionHierarchy.build(graph)
+        # A dict graph is searched in the hierarchy's index space and mapped back to IDs
+        self.dense = isinstance(graph, CSRGraph)
+
+    def steps(self, observe):
+        hierarchy = self.hierarchy
+        if self.dense:
+            start, goals = self.start, sorted(self.goals)
+        else:
+            start, goals = hierarchy.index_of(self.start), sorted(map(hierarchy.index_of, self.goals))
+
+        sides = (
+            (hierarchy.up_offsets, hierarchy.up_targets, hierarchy.up_costs),
+            (hierarchy.down_offsets, hierarchy.down_sources, hierarchy.down_costs),
+        )
+        distances = ({start: 0}, {goal: 0 for goal in goals})
+        # parent[0][n] is n's predecessor towards the origin, parent[1][n] its successor towards a destination
+        parent = ({start: None}, {goal: None for goal in goals})
+        heaps = ([(0, start)], [(0, goal) for goal in goals])
+        number_of_nodes = 1 + len(goals)
+        # Events name nodes by ID; heap entries carry no counter, so entries are numbered here
+        if observe:
+            node_id = (lambda i: i) if self.dense else hierarchy.node_ids.__getitem__
+            entry_of = ({start: 0}, {goal: i for i, goal in enumerate(goals, 1)})
+            next_entry = 1 + len(goals)
+            for side in (0, 1):
+                for root, entry in entry_of[side].items():
+                    yield SearchEvent('generate', node_id(root), entry, g=0)
+
+        def queued():
+            return len(heaps[0]) + len(heaps[1])
+        # (push, pop) per side; an entry is stale once its node was reached more cheaply
+        operations = [self.observe_queue(partial(heapq.heappush, heaps[side]), partial(heapq.heappop, heaps[side]), queued,
+                                         stale=lambda item, own=distances[side]: item[0] > own[item[1]])
+                      for side in (0, 1)]
+
+        mu = 0 if start in distances[1] else math.inf
+        meet = start if start in distances[1] else None
+
+        while True:
+            # Each side stops once nothing left in it can beat mu
+            live = [side for side in (0, 1) if heaps[side] and heaps[side][0][0] < mu]
+            if not live:
+                break
+            side = min(live, key=lambda s: heaps[s][0][0])
+            d, u = operations[side][1]()
+            if d > distances[side][u]:
+                continue
+            if observe:
+                yield SearchEvent('expand', node_id(u), entry_of[side][u], g=d)
+
+            offsets, ends, costs = sides[side]
+            own, other = distances[side], distances[1 - side]
+            for e in range(offsets[u], offsets[u + 1]):
+                w = ends[e]
+                new_distance = d + costs[e]
+                if new_distance < own.get(w, math.inf):
+                    own[w] = new_distance
+                    parent[side][w] = u
+                    operations[side][0]((new_distance, w))
+                    number_of_nodes += 1
+                    if observe:
+                        if w in entry_of[side]:
+                            # The queued entry is stale now; its heap item is skipped when popped
+                            yield SearchEvent('prune', node_id(w), entry_of[side][w])
+                        entry_of[side][w] = next_entry
+                        yield SearchEvent('generate', node_id(w), next_entry, entry_of[side][u], g=new_distance)
+                        next_entry += 1
+                    if w in other and new_distance + other[w] < mu:
+                        mu = new_distance + other[w]
+                        meet = w
+
+        if meet is None:
+            return self.finish_stats([number_of_nodes, None, None], goal_popped=False, parents=parent)
+
+        path = self.trace_path(parent[0], meet)
+        node = parent[1][meet]
+        while node is not None:
+            path.append(node)
+            node = parent[1][node]
+        with self.stats_phase('unpack'):
+            path = hierarchy.unpack(path)
+
+        if not self.dense:
+            path = [hierarchy.node_ids[i] for i in path]
+        if observe:
+            yield SearchEvent('goal', path[-1], g=mu, path=path)
+        return self.finish_stats([number_of_nodes, path, path[-1]], goal_popped=False, parents=parent)
+
+
+def contract(fname, force=False):
+    """CLI contract mode: build (or check) the contraction hierarchy file for a problem file"""
+    path = hierarchy_path(fname)
+    header = ContractionHierarchy.read_header(path)
+    source = os.stat(fname)
+    fresh = (not force and header is not None and header['source_size'] == source.st_size
+             and header['source_mtime_ns'] == source.st_mtime_ns)
+
+    graph, _stats = load_graph(fname, cache=True)
+    start_time = time.perf_counter()
+    hierarchy = load_hierarchy(fname, graph=graph, rebuild=force)
+    elapsed = time.perf_counter() - start_time
+
+    status = "up to date" if fresh else "built"
+    print(f"{path}: {status} in {elapsed * 1000:.2f} ms (contraction took {hierarchy.build_seconds:.2f} s)")
+    print(f"{len(hierarchy)} nodes, {graph.edge_count} edges -> {hierarchy.edge_count} hierarchy edges "
+          f"({hierarchy.shortcut_count} shortcuts), {hierarchy.nbytes() / 1024:.1f} KB")
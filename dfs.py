@@ -1,18 +1,50 @@
-from search_algorithms import SearchAlgorithms
+from search_algorithms import SearchAlgorithms, SearchEvent
+from operator import itemgetter
 
 
 class DFS(SearchAlgorithms):
-    def search(self, step_callback=None):
+    def __init__(self, graph, graph_search=False):
+        super().__init__(graph)
+        # Graph search expands each node at most once instead of only avoiding cycles on the current path
+        self.graph_search = graph_search
+
+    def steps(self, observe):
         number_of_nodes = 1  # Count the origin node
      
 
         # LIFO stack for DFS
-        stack = [(self.start, [self.start])]  # (current_node, path_to_current_node)
+        stack = [(self.start, 0)]  # (current_node, depth_of_current_node)
+        push, pop = self.observe_queue(stack.append, stack.pop, stack.__len__, depth=itemgetter(1),
+                                       stale=(lambda item: item[0] in explored) if self.graph_search else None)
+
+        # The path to the node being expanded, kept in step with the stack pops
+        path = []
+        on_path = set()
+        explored = set()
+
+        # Event entries of the stack items, kept only when observed
+        if observe:
+            entries = [0]
+            next_entry = 1
+            yield SearchEvent('generate', self.start, 0)
 
         while stack:
-            current_node, path = stack.pop()
+            current_node, depth = pop()
+            if observe:
+                entry = entries.pop()
+
+            if self.graph_search:
+                if current_node in explored:
+                    if observe:
+                        yield SearchEvent('prune', current_node, entry)
+                    continue
+                explored.add(current_node)
 
-            self.frontier.remove(current_node)
+            # Unwind the path back to the parent of current_node
+            while len(path) > depth:
+                on_path.discard(path.pop())
+            path.append(current_node)
+            on_path.add(current_node)
             
             # Check if goal is reached
             is_goal = current_node in self.goals
@@ -20,28 +52,23 @@ class DFS(SearchAlgorithms):
            
             # If goal is found, return immediately after showing the solution
             if is_goal:
-                for node in stack:
-                    if node[0] not in self.frontier:
-                        self.frontier.append(node[0])
-                if step_callback:
-                    step_callback(current_node, None, path, self.frontier, is_goal)
-                return [number_of_nodes, path, current_node]
+                if observe:
+                    yield SearchEvent('goal', current_node, entry, path=list(path))
+                return self.finish_stats([number_of_nodes, path, current_node])
+            if observe:
+                yield SearchEvent('expand', current_node, entry)
             
             # Smaller valued nodes are processed first
             for neighbor, cost in reversed(self.graph['adjacency_list'][current_node]):
-                if neighbor not in path:
-                    number_of_nodes += 1
-                    new_path = path + [neighbor]
-                    
-
-                    
-                    stack.append((neighbor, new_path))
-
-                    for node in stack:
-                        if node[0] not in self.frontier:
-                          
-                            self.frontier.append(node[0])
-                    if step_callback:
-                        step_callback(current_node, neighbor, new_path, self.frontier, is_goal)
-
-        return [number_of_nodes, None, None]  # No path found
+                if neighbor in on_path or neighbor in explored:
+                    continue
+
+                number_of_nodes += 1
+                push((neighbor, depth + 1))
+
+                if observe:
+                    entries.append(next_entry)
+                    yield SearchEvent('generate', neighbor, next_entry, entry)
+                    next_entry += 1
+
+        return self.finish_stats([number_of_nodes, None, None])  # No path found
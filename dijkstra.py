@@ -1,51 +1,259 @@
-from search_algorithms import SearchAlgorithms
-import heapq
-from collections import defaultdict
+from search_algorithms import SearchAlgorithms, SearchEvent
+from priority_queue import HEAPS, BucketQueue
+from graph import CSRGraph, max_edge_cost
+from array import array
+from collections import OrderedDict, defaultdict
 import math
+import sys
+import threading
+
+# 'auto' picks a bucket queue only for edge costs up to DIAL_MAX_COST that are also small
+# next to the search: a pop may scan up to max_cost empty buckets, which only pays off
+# when at least DIAL_NODES_PER_COST nodes per cost value can be settled
+DIAL_MAX_COST = 256
+DIAL_NODES_PER_COST = 16
+QUEUES = ('auto', 'buckets') + tuple(HEAPS)
 
 # Dijkstra's Algorithm Implementation
 class CUS1(SearchAlgorithms):
-  def search(self, step_callback=None):
+  def __init__(self, graph, tree_cache=None, queue='auto'):
+    super().__init__(graph)
+    if queue not in QUEUES:
+        raise ValueError(f"Unknown queue: {queue}")
+    # 'auto' uses Dial's bucket queue when every edge cost is an integer in the range
+    # dial_pays_off accepts, else the lazy heap; 'heap' picks the indexed heap, which
+    # queues fewer entries but is slower. All of them settle nodes in the same order
+    self.queue = queue
+    # Optional ShortestPathTreeCache: when given, a full shortest-path tree is built once
+    # per origin and later queries from that origin are answered by walking it
+    self.tree_cache = tree_cache
+    # Most nodes queued at once during the last search()
+    self.max_queue_size = 0
+
+  def make_queue(self):
+    if self.queue in HEAPS:
+        return HEAPS[self.queue]()
+    max_cost = max_edge_cost(self.graph)
+    if self.queue == 'buckets' and max_cost is None:
+        raise ValueError("A bucket queue needs non-negative integer edge costs")
+    if max_cost is not None and (self.queue == 'buckets' or self.dial_pays_off(max_cost)):
+        return BucketQueue(max_cost)
+    return HEAPS['lazy']()
+
+  def dial_pays_off(self, max_cost):
+    """Whether a bucket queue beats the heap for integer edge costs up to max_cost"""
+    return max_cost <= DIAL_MAX_COST and max_cost * DIAL_NODES_PER_COST <= len(self.graph['adjacency_list'])
+
+  def search(self):
+    if self.tree_cache is not None:
+        tree = self.tree_cache.get(self.graph, self.start)
+        if tree is None:
+            tree = self.build_tree()
+            self.tree_cache.put(self.graph, self.start, tree)
+        return tree.answer(self.goals)
+    return super().search()
+
+  def steps(self, observe):
     visited = set()
     number_of_nodes = 1  # Count the origin node
     distances = defaultdict(lambda: math.inf)
     distances[self.start] = 0.0
 
+    # parent[n] is the predecessor of n on the cheapest known path. A node already
+    # on that path can never be improved upon, so no separate cycle check is needed
+    parent = {self.start: None}
+
     counter = 0 # counter is used to ensure nodes that are pushed earlier are popped earlier in case of ties
-    min_heap = [(0, counter, self.start, [self.start])]  # (cost, current_node, path_to_current_node)
+    # Entries keyed (cost, counter); a cheaper route lowers a queued node's key
+    min_heap = self.make_queue()
+    min_heap.push(self.start, (0, counter))
+    push, pop = self.observe_queue(min_heap.push, min_heap.pop, min_heap.__len__)
+    # entry_of[n] is the event entry (counter) of n's latest, cheapest generation, kept only when observed
+    if observe:
+        entry_of = {self.start: 0}
+        yield SearchEvent('generate', self.start, 0, g=0.0)
 
     while min_heap:
-        cost, _counter, current_node, path = heapq.heappop(min_heap)
+        (cost, _counter), current_node = pop()
 
         is_goal = current_node in self.goals
 
         # If goal is found, return immediately after showing the solution
-    
-        self.frontier.remove(current_node)
-
         if is_goal:
-            for node in min_heap:
-                if node[2] not in self.frontier:
-                    self.frontier.append(node[2])
-            if step_callback:
-                step_callback(current_node, None, path, self.frontier, is_goal, None)
-            return [number_of_nodes, path, current_node]
+            path = self.trace_path(parent, current_node)
+            if observe:
+                yield SearchEvent('goal', current_node, entry_of[current_node], g=cost, path=path)
+            self.max_queue_size = min_heap.max_size
+            return self.finish_stats([number_of_nodes, path, current_node], parents=(parent,))
+        if observe:
+            yield SearchEvent('expand', current_node, entry_of[current_node], g=cost)
 
         for neighbor, edge_cost in self.graph['adjacency_list'][current_node]:
-            if neighbor not in path:
                 
-                new_cost = cost + edge_cost
-                if new_cost < distances[neighbor]:
-                    number_of_nodes += 1
-                    new_path = path + [neighbor]
-                    distances[neighbor] = new_cost
-                    counter += 1
-                    heapq.heappush(min_heap, (new_cost, counter, neighbor, new_path))
-
-                    for node in min_heap:
-                        if node[2] not in self.frontier:
-                            self.frontier.append(node[2])
-                    if step_callback:
-                        step_callback(current_node ,neighbor, new_path, self.frontier, is_goal, new_cost)
-
-    return [number_of_nodes, None, None]  # No path found
+            new_cost = cost + edge_cost
+            if new_cost < distances[neighbor]:
+                number_of_nodes += 1
+                distances[neighbor] = new_cost
+                parent[neighbor] = current_node
+                counter += 1
+                inserted = push(neighbor, (new_cost, counter))
+
+                if observe:
+                    if not inserted:
+                        # The queued node's key was lowered: it now stands for a new route
+                        yield SearchEvent('prune', neighbor, entry_of[neighbor])
+                    entry_of[neighbor] = counter
+                    yield SearchEvent('generate', neighbor, counter, entry_of[current_node], g=new_cost)
+
+    self.max_queue_size = min_heap.max_size
+    return self.finish_stats([number_of_nodes, None, None], parents=(parent,))  # No path found
+
+  def build_tree(self):
+    """Run Dijkstra from the origin to exhaustion and keep the whole shortest-path tree.
+
+    Pushes and tie-breaking are exactly those of search(), so the tree also records,
+    for each node, the order it was settled in and the node count search() reports
+    when it pops that node.
+    """
+    number_of_nodes = 1
+    distances = defaultdict(lambda: math.inf)
+    distances[self.start] = 0.0
+    parent = {self.start: None}
+    # CSR indices are dense, so their ranks fit an array; node IDs need a dict
+    if isinstance(self.graph, CSRGraph):
+        rank = array('q', [-1]) * len(self.graph)
+    else:
+        rank = {}
+
+    nodes = array('q')
+    parents = array('q')
+    settled_distances = array('d')
+    generated = array('q')
+
+    counter = 0
+    min_heap = self.make_queue()
+    min_heap.push(self.start, (0, counter))
+
+    while min_heap:
+        (cost, _counter), current_node = min_heap.pop()
+        rank[current_node] = len(nodes)
+        nodes.append(current_node)
+        parents.append(-1 if parent[current_node] is None else rank[parent[current_node]])
+        settled_distances.append(cost)
+        generated.append(number_of_nodes)
+
+        for neighbor, edge_cost in self.graph['adjacency_list'][current_node]:
+            new_cost = cost + edge_cost
+            if new_cost < distances[neighbor]:
+                number_of_nodes += 1
+                distances[neighbor] = new_cost
+                parent[neighbor] = current_node
+                counter += 1
+                min_heap.push(neighbor, (new_cost, counter))
+
+    return ShortestPathTree(nodes, parents, settled_distances, generated, number_of_nodes, rank)
+
+
+class ShortestPathTree:
+  """Full shortest-path tree from one origin, stored by settle order (rank).
+
+  nodes[r] is the r-th node Dijkstra settled, parents[r] the rank of its tree
+  parent (-1 for the origin), distances[r] its shortest distance and generated[r]
+  the node count CUS1.search reports when it pops that node. rank maps a node to its
+  rank: an array indexed by node (-1 if unreached) on CSR graphs, else a dict.
+  """
+  def __init__(self, nodes, parents, distances, generated, total_generated, rank):
+    self.nodes = nodes
+    self.parents = parents
+    self.distances = distances
+    self.generated = generated
+    self.total_generated = total_generated
+    self.rank = rank
+    self.size = self.measure()
+
+  def rank_of(self, node):
+    """node's rank, -1 if the tree does not reach it"""
+    if isinstance(self.rank, array):
+        return self.rank[node] if 0 <= node < len(self.rank) else -1
+    return self.rank.get(node, -1)
+
+  def answer(self, goals):
+    """The [number_of_nodes, path, goal] CUS1.search would return for these goals"""
+    ranks = [r for r in map(self.rank_of, goals) if r != -1]
+    if not ranks:
+        return [self.total_generated, None, None]
+
+    # search() stops at whichever goal it settles first
+    best = min(ranks)
+    path = []
+    r = best
+    while r != -1:
+        path.append(self.nodes[r])
+        r = self.parents[r]
+    path.reverse()
+    return [self.generated[best], path, self.nodes[best]]
+
+  def distance(self, node):
+    r = self.rank_of(node)
+    return self.distances[r] if r != -1 else math.inf
+
+  def nbytes(self):
+    return self.size
+
+  def measure(self):
+    arrays = [self.nodes, self.parents, self.distances, self.generated]
+    if isinstance(self.rank, array):
+        arrays.append(self.rank)
+        extra = 0
+    else:
+        # The dict's keys are the graph's own node objects, but every rank past the
+        # small-int cache is an int object of its own
+        extra = sys.getsizeof(self.rank) + sum(sys.getsizeof(r) for r in self.rank.values() if r > 256)
+    return sum(a.itemsize * len(a) for a in arrays) + extra
+
+
+class ShortestPathTreeCache:
+  """LRU cache of ShortestPathTrees keyed by (graph, origin), bounded by a byte budget.
+
+  Graphs are identified by their adjacency_list object, which the per-query
+  views made by batch.query_graph share with the graph they came from. get and put
+  hold a lock, so server threads can share one cache; trees are built outside it.
+  """
+  def __init__(self, budget_bytes=64 * 1024 * 1024):
+    self.lock = threading.Lock()
+    self.budget_bytes = budget_bytes
+    self.trees = OrderedDict()
+    self.adjacency = {}  # keeps keyed adjacency objects alive so their ids stay unique
+    self.nbytes = 0
+    self.hits = 0
+    self.misses = 0
+
+  def key(self, graph, origin):
+    adjacency = graph['adjacency_list']
+    self.adjacency[id(adjacency)] = adjacency
+    return id(adjacency), origin
+
+  def get(self, graph, origin):
+    with self.lock:
+        key = self.key(graph, origin)
+        tree = self.trees.get(key)
+        if tree is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.trees.move_to_end(key)
+        return tree
+
+  def put(self, graph, origin, tree):
+    size = tree.nbytes()
+    if size > self.budget_bytes:
+        return
+    with self.lock:
+        key = self.key(graph, origin)
+        if key in self.trees:
+            self.nbytes -= self.trees.pop(key).nbytes()
+        self.trees[key] = tree
+        self.nbytes += size
+        while self.nbytes > self.budget_bytes:
+            _key, evicted = self.trees.popitem(last=False)
+            self.nbytes -= evicted.nbytes()
@@ -1,53 +1,84 @@
-from search_algorithms import SearchAlgorithms
+from search_algorithms import SearchAlgorithms, SearchEvent, TreePath
+from functools import partial
 import heapq
 from utils import make_heuristics
 
 class GBFS(SearchAlgorithms):
-  def search(self, step_callback=None):
-    h = make_heuristics(self.coords, self.goals)
+  def __init__(self, graph, graph_search=False, precompute_heuristics=False):
+    super().__init__(graph)
+    # Graph search expands each node at most once instead of only avoiding cycles on the current path
+    self.graph_search = graph_search
+    self.precompute_heuristics = precompute_heuristics
+
+  def steps(self, observe):
+    with self.stats_phase('heuristics'):
+        h = self.observe_heuristic(make_heuristics(self.coords, self.goals, precompute=self.precompute_heuristics))
     min_heap = []
 
+    # Search tree stored as parallel arrays, heap entries hold indices into them
+    tree_nodes = [self.start]
+    tree_parents = [-1]
+    tree_depths = [0]
+    # Nodes on the path to the entry being expanded, for the cycle check in tree search
+    tree_path = TreePath(tree_nodes, tree_parents, tree_depths)
+
     counter = 0
-    heapq.heappush(min_heap, (h(self.start), counter, self.start, [self.start]))
-    visited = set()
+    heapq.heappush(min_heap, (h(self.start), counter, 0))
+    explored = set()
+    push, pop = self.observe_queue(partial(heapq.heappush, min_heap), partial(heapq.heappop, min_heap), min_heap.__len__,
+                                   stale=(lambda item: tree_nodes[item[2]] in explored) if self.graph_search else None)
     number_of_nodes = 1
-
-    
+    # Tree indices double as the event entries
+    if observe:
+        yield SearchEvent('generate', self.start, 0, h=min_heap[0][0])
 
     while min_heap:
 
-        _, _counter, current_node, path = heapq.heappop(min_heap)
-
+        _, _counter, index = pop()
+        current_node = tree_nodes[index]
 
-        self.frontier.remove(current_node)
+        if self.graph_search:
+            if current_node in explored:
+                if observe:
+                    yield SearchEvent('prune', current_node, index)
+                continue
+            explored.add(current_node)
 
         is_goal = current_node in self.goals
 
         # If goal is found, return immediately after showing the solution
         if is_goal:
-            for node in min_heap:
-                if node[2] not in self.frontier:
-                    self.frontier.append(node[2])
-            if step_callback:
-                step_callback(current_node, None, path, self.frontier, is_goal, None, h(current_node))
-            return [number_of_nodes, path, current_node]
+            path = self.trace_tree_path(tree_nodes, tree_parents, index)
+            if observe:
+                yield SearchEvent('goal', current_node, index, path=path)
+            return self.finish_stats([number_of_nodes, path, current_node], tree_parents=tree_parents)
+
+        # Neighbors to skip: ancestors of current_node in tree search, every expanded node in graph search
+        if self.graph_search:
+            on_path = explored
+        else:
+            on_path = tree_path.move_to(index)
+            depth = tree_depths[index] + 1
+
+        if observe:
+            yield SearchEvent('expand', current_node, index)
         
         # expand neighbors in ascending id
         for neighbor, cost in self.graph['adjacency_list'][current_node]:
-            if neighbor in path:
+            if neighbor in on_path:
                 continue
 
-            new_path = path + [neighbor]
+            tree_nodes.append(neighbor)
+            tree_parents.append(index)
+            if not self.graph_search:
+                tree_depths.append(depth)
 
             heuristic_cost = h(neighbor)
             counter += 1
-            heapq.heappush(min_heap, (heuristic_cost, counter, neighbor, new_path))
+            push((heuristic_cost, counter, len(tree_nodes) - 1))
             number_of_nodes += 1
 
-            for node in min_heap:
-                if node[2] not in self.frontier:
-                    self.frontier.append(node[2])
-            if step_callback:
-                step_callback(current_node, neighbor, new_path, self.frontier, is_goal, None, heuristic_cost)
+            if observe:
+                yield SearchEvent('generate', neighbor, len(tree_nodes) - 1, index, h=heuristic_cost)
 
-    return [number_of_nodes, None, None]
\ No newline at end of file
+    return self.finish_stats([number_of_nodes, None, None], tree_parents=tree_parents)
@@ -0,0 +1,231 @@
+from array import array
+import math
+import os
+import random
+
+# Lines buffered between writes to the output file
+WRITE_BLOCK = 65536
+# Distance between neighbouring lattice points; edge costs are never below the straight-line
+# distance, so the straight-line heuristic stays admissible on every generated graph
+SPACING = 10
+GENERATORS = ('geometric', 'grid', 'road')
+
+
+class ProblemWriter:
+    """Streams a Nodes/Edges/Origin/Destinations problem file without holding it in memory.
+
+    Sections must be written in file order: node() lines, then edge() lines, then finish().
+    The file is written under a temporary name and moved into place by finish(), so an
+    interrupted run never leaves a truncated problem file behind.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.temp_path = f"{path}.{os.getpid()}.tmp"
+        self.file = open(self.temp_path, 'w')
+        self.lines = []
+        self.section = None
+        self.nodes = 0
+        self.edges = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.file.close()
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+    def start_section(self, section):
+        if self.section != section:
+            self.lines.append(f"{section}:\n")
+            self.section = section
+
+    def flush(self):
+        self.file.write(''.join(self.lines))
+        self.lines.clear()
+
+    def node(self, node_id, x, y):
+        self.start_section('Nodes')
+        self.lines.append(f"{node_id}: ({x},{y})\n")
+        self.nodes += 1
+        if len(self.lines) >= WRITE_BLOCK:
+            self.flush()
+
+    def edge(self, from_node, to_node, cost):
+        self.start_section('Edges')
+        self.lines.append(f"({from_node},{to_node}): {cost}\n")
+        self.edges += 1
+        if len(self.lines) >= WRITE_BLOCK:
+            self.flush()
+
+    def finish(self, origin, destinations):
+        """Write Origin and Destinations, then move the file into place; returns a summary dict"""
+        self.start_section('Edges')
+        self.lines.append(f"Origin:\n{origin}\nDestinations:\n{'; '.join(map(str, destinations))}\n")
+        self.flush()
+        self.file.close()
+        os.replace(self.temp_path, self.path)
+        return {'path': self.path, 'nodes': self.nodes, 'edges': self.edges,
+                'origin': origin, 'destinations': list(destinations)}
+
+
+def edge_cost(rng, distance, stretch):
+    """Whole-number cost of at least distance (and 1), stretched by a random factor in [1, 1 + stretch]"""
+    return max(1, math.ceil(distance * (1 + rng.random() * stretch)))
+
+
+def random_geometric(path, nodes, degree=6, destinations=1, seed=0, stretch=0.5):
+    """Random geometric graph: nodes uniform in a square, edges both ways between nodes within
+    the radius that gives about degree neighbours each.
+
+    Neighbours are found through a uniform grid of radius-sized cells, stored as one
+    counting-sorted array, so memory stays a few arrays of n integers.
+    """
+    if degree <= 0:
+        raise ValueError("The average degree must be positive")
+    rng = random.Random(seed)
+    side = max(1, int(math.sqrt(nodes) * SPACING))
+    xs = array('i', (rng.randrange(side) for _ in range(nodes)))
+    ys = array('i', (rng.randrange(side) for _ in range(nodes)))
+    radius = math.sqrt(degree * side * side / (math.pi * max(nodes, 1)))
+    columns = int(side / radius) + 1
+
+    def cell_of(i):
+        return int(ys[i] / radius) * columns + int(xs[i] / radius)
+
+    # members[cell_start[c]:cell_start[c + 1]] are the nodes (0-based) in cell c
+    cell_start = array('q', [0]) * (columns * columns + 1)
+    for i in range(nodes):
+        cell_start[cell_of(i) + 1] += 1
+    for c in range(columns * columns):
+        cell_start[c + 1] += cell_start[c]
+    members = array('q', [0]) * nodes
+    filled = array('q', cell_start)
+    for i in range(nodes):
+        c = cell_of(i)
+        members[filled[c]] = i
+        filled[c] += 1
+    del filled
+
+    limit = radius * radius
+    with ProblemWriter(path) as writer:
+        for i in range(nodes):
+            writer.node(i + 1, xs[i], ys[i])
+        for i in range(nodes):
+            x, y = xs[i], ys[i]
+            row, column = int(y / radius), int(x / radius)
+            for r in range(max(row - 1, 0), min(row + 2, columns)):
+                for c in range(max(column - 1, 0), min(column + 2, columns)):
+                    cell = r * columns + c
+                    for j in members[cell_start[cell]:cell_start[cell + 1]]:
+                        squared = (xs[j] - x) ** 2 + (ys[j] - y) ** 2
+                        if j != i and squared <= limit:
+                            writer.edge(i + 1, j + 1, edge_cost(rng, math.sqrt(squared), stretch))
+        origin, goals = pick_endpoints(rng, range(1, nodes + 1), destinations)
+        return writer.finish(origin, goals)
+
+
+def grid_with_obstacles(path, width, height, obstacles=0.2, destinations=1, seed=0):
+    """width x height 4-connected grid with a random fraction of cells blocked.
+
+    Open cell (x, y) is node y * width + x + 1 at (x * SPACING, y * SPACING); edges run
+    both ways between open neighbours and cost SPACING to 2 * SPACING - 1.
+    """
+    rng = random.Random(seed)
+    blocked = bytearray(rng.random() < obstacles for _ in range(width * height))
+
+    def node_id(x, y):
+        return y * width + x + 1
+
+    with ProblemWriter(path) as writer:
+        for y in range(height):
+            for x in range(width):
+                if not blocked[y * width + x]:
+                    writer.node(node_id(x, y), x * SPACING, y * SPACING)
+        for y in range(height):
+            for x in range(width):
+                if blocked[y * width + x]:
+                    continue
+                for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+                    if 0 <= nx < width and 0 <= ny < height and not blocked[ny * width + nx]:
+                        writer.edge(node_id(x, y), node_id(nx, ny), SPACING + rng.randrange(SPACING))
+        if not writer.nodes:
+            raise ValueError("Every cell of the grid is blocked")
+
+        def open_cell():
+            # Draw random cells until one is open, rather than listing every open cell
+            while True:
+                i = rng.randrange(width * height)
+                if not blocked[i]:
+                    return i + 1
+
+        origin = open_cell()
+        goals = []
+        while len(goals) < min(destinations, writer.nodes - 1):
+            goal = open_cell()
+            if goal != origin and goal not in goals:
+                goals.append(goal)
+        return writer.finish(origin, goals)
+
+
+def road_network(path, nodes, destinations=1, seed=0, highway_every=10, drop=0.15, one_way=0.1):
+    """Road-like planar graph: a jittered lattice where every highway_every-th row and column is
+    a highway costing the straight-line distance, and the remaining streets cost 1.3 to 2 times
+    it, with a drop fraction removed and a one_way fraction open in one direction only.
+
+    Jitter stays under half the lattice spacing, so no two streets cross.
+    """
+    rng = random.Random(seed)
+    side = max(1, math.ceil(math.sqrt(nodes)))
+    spacing = 10 * SPACING
+    jitter = spacing * 3 // 10
+    xs = array('i', ((i % side) * spacing + rng.randint(-jitter, jitter) for i in range(nodes)))
+    ys = array('i', ((i // side) * spacing + rng.randint(-jitter, jitter) for i in range(nodes)))
+
+    with ProblemWriter(path) as writer:
+        for i in range(nodes):
+            writer.node(i + 1, xs[i], ys[i])
+        for i in range(nodes):
+            row, column = divmod(i, side)
+            # Right and down neighbours; each street is decided once, from its upper-left end
+            for j, highway in ((i + 1, row % highway_every == 0), (i + side, column % highway_every == 0)):
+                if j >= nodes or (j == i + 1 and column + 1 == side):
+                    continue
+                distance = math.hypot(xs[j] - xs[i], ys[j] - ys[i])
+                if highway:
+                    writer.edge(i + 1, j + 1, max(1, math.ceil(distance)))
+                    writer.edge(j + 1, i + 1, max(1, math.ceil(distance)))
+                    continue
+                if rng.random() < drop:
+                    continue
+                cost = max(1, math.ceil(distance * rng.uniform(1.3, 2.0)))
+                if rng.random() < one_way:
+                    a, b = (i, j) if rng.random() < 0.5 else (j, i)
+                    writer.edge(a + 1, b + 1, cost)
+                else:
+                    writer.edge(i + 1, j + 1, cost)
+                    writer.edge(j + 1, i + 1, cost)
+        origin, goals = pick_endpoints(rng, range(1, nodes + 1), destinations)
+        return writer.finish(origin, goals)
+
+
+def pick_endpoints(rng, candidates, destinations):
+    """Random origin and up to destinations distinct other nodes from a range of node IDs"""
+    if not len(candidates):
+        raise ValueError("The generated graph has no nodes")
+    origin = rng.choice(candidates)
+    picked = rng.sample(candidates, min(destinations + 1, len(candidates)))
+    return origin, [node for node in picked if node != origin][:destinations]
+
+
+def generate(kind, path, nodes=1000, width=None, height=None, degree=6, obstacles=0.2, destinations=1, seed=0):
+    """Write one generated problem file; kind is one of GENERATORS. Grid size defaults to a square of about nodes cells."""
+    if kind == 'geometric':
+        return random_geometric(path, nodes, degree=degree, destinations=destinations, seed=seed)
+    if kind == 'grid':
+        width = width or max(1, math.isqrt(nodes))
+        height = height or width
+        return grid_with_obstacles(path, width, height, obstacles=obstacles, destinations=destinations, seed=seed)
+    if kind == 'road':
+        return road_network(path, nodes, destinations=destinations, seed=seed)
+    raise ValueError(f"Unknown generator: {kind}")
@@ -0,0 +1,366 @@
+from array import array
+from itertools import accumulate, repeat
+from operator import add, sub
+import copy
+import mmap
+import os
+import struct
+import sys
+
+# Binary cache layout: HEADER, then node_ids q[n], xs d[n], ys d[n], offsets q[n + 1],
+# costs q[m], destinations q[k], targets i[m]; every array starts 8-byte aligned
+CACHE_MAGIC = b'CSRGRAPH'
+CACHE_VERSION = 1
+CACHE_HEADER = struct.Struct('=8sIIqqqqqq32s')
+
+
+class CSRGraph:
+    """Compact compressed-sparse-row graph.
+
+    Node IDs are interned to dense indices 0..n-1 in ascending ID order, so
+    neighbours come out in the same ascending-ID order as the dict graph. The
+    graph lives in index space: searches run over it unchanged and return
+    indices, which to_ids() maps back to the IDs in the problem file.
+
+    Indexing with 'nodes', 'adjacency_list', 'origin' or 'destinations'
+    gives the same views the dict graph provides, so every SearchAlgorithms
+    subclass can take a CSRGraph in place of the dict.
+    """
+    def __init__(self, node_ids, xs, ys, offsets, targets, costs, origin, destinations, buffer=None):
+        self.node_ids = node_ids      # array('q'): index -> node ID
+        self.xs = xs                  # array('d'): x coordinate per index
+        self.ys = ys                  # array('d'): y coordinate per index
+        self.offsets = offsets        # array('q'): edges of u are offsets[u]:offsets[u + 1]
+        self.targets = targets        # array('i'): edge target index
+        self.costs = costs            # array('q'): edge cost
+        self.origin = origin
+        self.destinations = destinations
+        self.buffer = buffer          # mmap backing the arrays when loaded from a cache file
+
+        # Built lazily by index_of, so opening a cached graph stays O(1)
+        n = len(node_ids)
+        self.contiguous = n == 0 or node_ids[n - 1] - node_ids[0] + 1 == n
+        self.id_index = None
+
+        self.views = {
+            'nodes': CoordinateView(self),
+            'adjacency_list': AdjacencyView(offsets, targets, costs),
+        }
+
+    @classmethod
+    def from_edges(cls, coords, edges, origin, destinations):
+        """Build from {node_id: (x, y)}, an iterable of (from_id, to_id, cost) and raw origin/destination IDs"""
+        raw_from = array('q')
+        raw_to = array('q')
+        costs = array('q')
+        for from_node, to_node, cost in edges:
+            raw_from.append(from_node)
+            raw_to.append(to_node)
+            costs.append(cost)
+        return cls.from_arrays(coords, raw_from, raw_to, costs, origin, destinations)
+
+    @classmethod
+    def from_arrays(cls, coords, raw_from, raw_to, costs, origin, destinations):
+        """Build from parallel arrays of (unsorted) edge source IDs, target IDs and costs"""
+        ids = set(coords)
+        ids.update(raw_from)
+        ids.update(raw_to)
+        if origin is not None:
+            ids.add(origin)
+        ids.update(destinations)
+        node_ids = array('q', sorted(ids))
+        index = {node_id: i for i, node_id in enumerate(node_ids)}
+        n = len(node_ids)
+
+        nan = float('nan')
+        xs = array('d', [coords[node_id][0] if node_id in coords else nan for node_id in node_ids])
+        ys = array('d', [coords[node_id][1] if node_id in coords else nan for node_id in node_ids])
+
+        # Intern edge endpoints; contiguous IDs (the usual 1..n) are a plain offset
+        if n and node_ids[-1] - node_ids[0] + 1 == n:
+            first = repeat(node_ids[0])
+            sources = array('q', map(sub, raw_from, first))
+            ends = array('i', map(sub, raw_to, first))
+        else:
+            sources = array('q', map(index.__getitem__, raw_from))
+            ends = array('i', map(index.__getitem__, raw_to))
+
+        # Stable sort by (source, target): neighbours come out in ascending ID order
+        # and duplicate edges keep their file order, as with the dict loader
+        keys = list(map(add, map(n.__mul__, sources), ends))
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        targets = array('i', map(ends.__getitem__, order))
+        sorted_costs = array('q', map(costs.__getitem__, order))
+
+        counts = [0] * (n + 1)
+        for u in sources:
+            counts[u + 1] += 1
+        offsets = array('q', accumulate(counts))
+
+        return cls(
+            node_ids, xs, ys, offsets, targets, sorted_costs,
+            index[origin] if origin is not None else None,
+            [index[d] for d in destinations],
+        )
+
+    @classmethod
+    def from_dict(cls, graph):
+        """Build from the dict graph produced by loader.load_graph"""
+        edges = (
+            (from_node, to_node, cost)
+            for from_node, neighbors in graph['adjacency_list'].items()
+            for to_node, cost in neighbors
+        )
+        return cls.from_edges(graph['nodes'], edges, graph['origin'], graph['destinations'])
+
+    def __getitem__(self, key):
+        if key == 'origin':
+            return self.origin
+        if key == 'destinations':
+            return self.destinations
+        if key == 'reverse_adjacency_list' and key not in self.views:
+            self.views[key] = self.reverse_view()
+        if key == 'max_edge_cost' and key not in self.views:
+            self.views[key] = integer_cost_bound(self.costs)
+        return self.views[key]
+
+    def reverse_view(self):
+        """AdjacencyView of the reversed edges: view[v] lists (u, cost) for every edge u -> v"""
+        n = len(self.node_ids)
+        sources = array('i', [0]) * len(self.targets)
+        offsets = self.offsets
+        for u in range(n):
+            sources[offsets[u]:offsets[u + 1]] = array('i', [u]) * (offsets[u + 1] - offsets[u])
+
+        # Stable sort by target keeps each reversed list in ascending source order
+        order = sorted(range(len(self.targets)), key=self.targets.__getitem__)
+        reverse_targets = array('i', map(sources.__getitem__, order))
+        reverse_costs = array('q', map(self.costs.__getitem__, order))
+
+        counts = [0] * (n + 1)
+        for v in self.targets:
+            counts[v + 1] += 1
+        return AdjacencyView(array('q', accumulate(counts)), reverse_targets, reverse_costs)
+
+    def __len__(self):
+        return len(self.node_ids)
+
+    @property
+    def edge_count(self):
+        return len(self.targets)
+
+    def with_endpoints(self, origin, destinations):
+        """Shallow copy sharing all arrays, with a different origin and destination index list"""
+        graph = copy.copy(self)
+        graph.origin = origin
+        graph.destinations = list(destinations)
+        return graph
+
+    def index_of(self, node_id):
+        """Dense index of a node ID; KeyError if the graph has no such node"""
+        node_ids = self.node_ids
+        if self.contiguous:
+            i = node_id - node_ids[0] if len(node_ids) else -1
+            if 0 <= i < len(node_ids):
+                return i
+            raise KeyError(node_id)
+        if self.id_index is None:
+            self.id_index = {node_id: i for i, node_id in enumerate(node_ids)}
+        return self.id_index[node_id]
+
+    def save(self, path, source_key=(0, 0, b'')):
+        """Write the binary cache file; source_key is (size, mtime_ns, digest) of the text file"""
+        source_size, source_mtime_ns, source_digest = source_key
+        destinations = array('q', self.destinations)
+        header = CACHE_HEADER.pack(
+            CACHE_MAGIC, CACHE_VERSION, sys.byteorder == 'little',
+            len(self.node_ids), len(self.targets),
+            -1 if self.origin is None else self.origin, len(destinations),
+            source_size, source_mtime_ns, source_digest,
+        )
+
+        # Write beside the target and rename, so readers never see a partial file
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, 'wb') as file:
+                file.write(header)
+                for a in (self.node_ids, self.xs, self.ys, self.offsets, self.costs, destinations, self.targets):
+                    file.write(a)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    @staticmethod
+    def read_cache_header(path):
+        """Header fields of a cache file as a dict, or None if it is missing or unusable"""
+        try:
+            with open(path, 'rb') as file:
+                raw = file.read(CACHE_HEADER.size)
+        except OSError:
+            return None
+        if len(raw) != CACHE_HEADER.size:
+            return None
+        (magic, version, little_endian, n, m, origin, k,
+         source_size, source_mtime_ns, source_digest) = CACHE_HEADER.unpack(raw)
+        if magic != CACHE_MAGIC or version != CACHE_VERSION or little_endian != (sys.byteorder == 'little'):
+            return None
+        return {
+            'nodes': n, 'edges': m, 'origin': origin, 'destinations': k,
+            'source_size': source_size, 'source_mtime_ns': source_mtime_ns,
+            'source_digest': source_digest,
+        }
+
+    @classmethod
+    def load(cls, path):
+        """Memory-map a cache file written by save(); the arrays are zero-copy views of the file"""
+        header = cls.read_cache_header(path)
+        if header is None:
+            raise ValueError(f"Not a graph cache file: {path}")
+        n, m, k = header['nodes'], header['edges'], header['destinations']
+
+        with open(path, 'rb') as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(buffer)
+        position = CACHE_HEADER.size
+
+        def take(typecode, count):
+            nonlocal position
+            size = struct.calcsize(typecode) * count
+            if position + size > len(view):
+                raise ValueError(f"Truncated graph cache file: {path}")
+            a = view[position:position + size].cast(typecode)
+            position += size
+            return a
+
+        node_ids = take('q', n)
+        xs = take('d', n)
+        ys = take('d', n)
+        offsets = take('q', n + 1)
+        costs = take('q', m)
+        destinations = take('q', k).tolist()
+        targets = take('i', m)
+        origin = None if header['origin'] == -1 else header['origin']
+        return cls(node_ids, xs, ys, offsets, targets, costs, origin, destinations, buffer=buffer)
+
+    def to_ids(self, path):
+        """Map a path of indices (or None) back to node IDs"""
+        if path is None:
+            return None
+        node_ids = self.node_ids
+        return [node_ids[i] for i in path]
+
+    def to_id(self, node):
+        return None if node is None else self.node_ids[node]
+
+    def nbytes(self):
+        """Bytes held by the CSR and coordinate arrays"""
+        arrays = (self.node_ids, self.xs, self.ys, self.offsets, self.targets, self.costs)
+        return sum(a.itemsize * len(a) for a in arrays)
+
+
+def reverse_adjacency(graph):
+    """graph's edges reversed, as an adjacency mapping: result[v] lists (u, cost) for every edge u -> v.
+
+    A CSRGraph builds this on first use and shares it with every with_endpoints copy, and
+    loaded dict graphs keep it in their shared 'derived' dict the same way; other dict
+    graphs are rebuilt on each call.
+    """
+    if isinstance(graph, CSRGraph) or 'reverse_adjacency_list' in graph:
+        return graph['reverse_adjacency_list']
+    derived = graph.get('derived')
+    if derived is not None and 'reverse_adjacency_list' in derived:
+        return derived['reverse_adjacency_list']
+
+    adjacency = graph['adjacency_list']
+    reverse = {}
+    for from_node in sorted(adjacency):
+        for to_node, cost in adjacency[from_node]:
+            reverse.setdefault(to_node, []).append((from_node, cost))
+    if derived is not None:
+        derived['reverse_adjacency_list'] = reverse
+    return reverse
+
+
+def integer_cost_bound(costs):
+    """Largest of costs if all are non-negative integers (0 if there are none), else None"""
+    if isinstance(costs, (array, memoryview)):
+        if not len(costs):
+            return 0
+        return max(costs) if min(costs) >= 0 else None
+
+    highest = 0
+    for cost in costs:
+        if type(cost) is not int or cost < 0:
+            return None
+        if cost > highest:
+            highest = cost
+    return highest
+
+
+def max_edge_cost(graph):
+    """graph's largest edge cost if every cost is a non-negative integer, else None.
+
+    Loaded graphs carry it as 'max_edge_cost' (a CSRGraph computes it once and shares it
+    with every with_endpoints copy); other dict graphs are scanned on each call.
+    """
+    if isinstance(graph, CSRGraph) or 'max_edge_cost' in graph:
+        return graph['max_edge_cost']
+    return integer_cost_bound(cost for neighbors in graph['adjacency_list'].values() for _neighbor, cost in neighbors)
+
+
+class AdjacencyView:
+    """adjacency_list stand-in: view[u] is the [(neighbor, cost), ...] list of index u"""
+    def __init__(self, offsets, targets, costs):
+        self.offsets = offsets
+        self.targets = targets
+        self.costs = costs
+
+    def __getitem__(self, u):
+        start, end = self.offsets[u], self.offsets[u + 1]
+        return list(zip(self.targets[start:end], self.costs[start:end]))
+
+    def get(self, u, default=None):
+        if u in self:
+            return self[u]
+        return default
+
+    def __contains__(self, u):
+        return isinstance(u, int) and 0 <= u < len(self.offsets) - 1
+
+    def __iter__(self):
+        return iter(range(len(self.offsets) - 1))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def items(self):
+        return ((u, self[u]) for u in self)
+
+
+class CoordinateView:
+    """nodes stand-in: view[u] is the (x, y) coordinate of index u"""
+    def __init__(self, graph):
+        self.xs = graph.xs
+        self.ys = graph.ys
+
+    def __getitem__(self, u):
+        if u not in self:
+            raise KeyError(u)
+        return (self.xs[u], self.ys[u])
+
+    def __contains__(self, u):
+        # Nodes that only appear in Edges/Origin/Destinations have NaN coordinates
+        return isinstance(u, int) and 0 <= u < len(self.xs) and self.xs[u] == self.xs[u]
+
+    def __iter__(self):
+        return iter(range(len(self.xs)))
+
+    def __len__(self):
+        return len(self.xs)
+
+    def values(self):
+        return zip(self.xs, self.ys)
+
+    def items(self):
+        return enumerate(zip(self.xs, self.ys))
@@ -1,6 +1,6 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-from collections import deque
+from collections import deque, defaultdict
 import threading
 import time
 
@@ -10,6 +10,104 @@ from dijkstra import CUS1
 from gbfs import GBFS
 from astar import AS
 from idastar import CUS2
+from bidirectional import BiDijkstra, BiAS
+from loader import load_graph
+from search_algorithms import Frontier
+
+# The search thread queues steps and render_frame draws at most one per frame at this rate
+FRAME_RATE = 30
+FRAME_MS = 1000 // FRAME_RATE
+
+# Search tree layout: each level is centred on TREE_CENTER, nodes TREE_SPACING apart. A level
+# is centred on the next power of two of its width, so it only shifts whenever it doubles
+TREE_CENTER = 400
+TREE_SPACING = 80
+TREE_LEVEL_HEIGHT = 80
+TREE_TOP = 40
+TREE_RADIUS = 16
+
+
+class SearchTree:
+    """The search tree the GUI draws, kept up to date from SearchEvents in O(1) per event.
+
+    records maps an event entry to its record, children a parent entry (None for the roots)
+    to its child entries in generation order, and levels[d] lists the entries at depth d in
+    drawing order. Levels that gained entries and records whose state changed are collected
+    in dirty_levels and dirty_records, so a redraw only touches those.
+    """
+    def __init__(self, reverse_children=False):
+        # DFS draws each node's children right to left
+        self.reverse_children = reverse_children
+        self.clear()
+
+    def clear(self):
+        self.records = {}
+        self.children = defaultdict(list)
+        self.levels = []
+        self.current = None
+        self.dirty_levels = set()
+        self.dirty_records = set()
+        self.cleared = True  # whatever was drawn of the tree must be discarded
+
+    def __len__(self):
+        return len(self.records)
+
+    def set_state(self, entry, state):
+        record = self.records.get(entry)
+        if record is not None and record['state'] != state:
+            record['state'] = state
+            self.dirty_records.add(entry)
+
+    def apply(self, event):
+        kind = event.kind
+        if kind == 'bound':
+            self.clear()
+        elif kind == 'generate':
+            parent = self.records.get(event.parent)
+            depth = 0 if parent is None else parent['depth'] + 1
+            self.records[event.entry] = {
+                'id': event.entry,
+                'node': event.node,
+                'parent': event.parent,
+                'depth': depth,
+                'state': 'frontier',
+                'g': event.g,
+                'h': event.h
+            }
+            self.children[event.parent].append(event.entry)
+            if depth == len(self.levels):
+                self.levels.append([])
+            self.dirty_levels.add(depth)
+        elif kind == 'expand':
+            if self.current is not None:
+                self.set_state(self.current, 'visited')
+            self.set_state(event.entry, 'current')
+            self.current = event.entry
+        elif kind == 'prune':
+            self.set_state(event.entry, 'visited')
+        elif kind == 'goal':
+            # A path joining two trees has no single goal entry and stays uncoloured here
+            entry = event.entry
+            while entry in self.records:
+                self.set_state(entry, 'solution')
+                entry = self.records[entry]['parent']
+
+    def layout_levels(self):
+        """Reorder the dirty levels from the level above each; returns their depths.
+
+        New entries never reorder the ones already placed above them, so a level without
+        new entries keeps its order and is skipped.
+        """
+        depths = sorted(self.dirty_levels)
+        self.dirty_levels.clear()
+        for depth in depths:
+            parents = [None] if depth == 0 else self.levels[depth - 1]
+            order = []
+            for parent in parents:
+                children = self.children.get(parent, ())
+                order.extend(reversed(children) if self.reverse_children and parent is not None else children)
+            self.levels[depth] = order
+        return depths
 
 
 class GUI:
@@ -19,12 +117,27 @@ class GUI:
         self.root.geometry("1600x900")
         
         self.graph = None
-        self.search_tree = []
         self.solution_path = None
         self.is_running = False
         self.is_paused = False
-        self.node_counter = 0
-        self.node_ids = {}
+        # Search tree applied from the events render_frame takes off each step, the events
+        # the search thread has not attached to a step yet, and the tree's canvas items and
+        # positions per entry, made by draw_search_tree
+        self.tree = SearchTree()
+        self.tree_events = []
+        self.tree_items = {}
+        self.tree_positions = {}
+        # Frontier rebuilt from the events by render_frame along with the tree, and the parent
+        # of every entry, kept by the search thread to tell which events are shown as steps
+        self.frontier = Frontier()
+        self.entry_parents = {}
+
+        # Steps queued by the search thread for render_frame, which draws at most one per frame.
+        # deque append/popleft are atomic, so the two threads need no lock
+        self.pending_steps = deque()
+        self.pending_results = None
+        self.dropped_steps = 0
+        self.frame_times = deque()  # when each of the last second's frames was drawn
 
         # Tooltip management
         self.hover_tooltip = None
@@ -33,8 +146,12 @@ class GUI:
         self.tooltip_alpha = 0.0
         self.current_hover_node = None
         self.bound = None
+
+        # Canvas items of the loaded graph, made by build_graph_canvas
+        self.node_items = None
         
         self.setup_ui()
+        self.root.after(FRAME_MS, self.render_frame)
     
     def setup_ui(self):
         # Top control panel
@@ -50,15 +167,16 @@ class GUI:
         # Algorithm selection
         ttk.Label(control_frame, text="Algorithm:").grid(row=0, column=3, padx=5)
         self.algorithm_var = tk.StringVar(value="bfs")
-        algorithms = ["bfs", "dfs", "dijkstra", "gbfs", "astar", "idastar"]
+        algorithms = ["bfs", "dfs", "dijkstra", "gbfs", "astar", "idastar", "bi-dijkstra", "bi-astar"]
         algo_menu = ttk.Combobox(control_frame, textvariable=self.algorithm_var, 
                                  values=algorithms, state="readonly", width=15)
         algo_menu.grid(row=0, column=4, padx=5)
         
-        # Speed control
+        # Speed control: seconds between steps; at 0 the search runs flat out and each
+        # frame shows only the latest step
         ttk.Label(control_frame, text="Speed (s):").grid(row=0, column=5, padx=5)
         self.speed_var = tk.DoubleVar(value=0.5)
-        speed_scale = ttk.Scale(control_frame, from_=0.1, to=2.0, variable=self.speed_var, 
+        speed_scale = ttk.Scale(control_frame, from_=0.0, to=2.0, variable=self.speed_var, 
                                orient=tk.HORIZONTAL, length=100)
         speed_scale.grid(row=0, column=6, padx=5)
         self.speed_label = ttk.Label(control_frame, text="0.5")
@@ -74,6 +192,10 @@ class GUI:
         
         self.reset_button = ttk.Button(control_frame, text="↺ Reset", command=self.reset_visualization, state=tk.DISABLED)
         self.reset_button.grid(row=0, column=10, padx=5)
+
+        # Render rate readout
+        self.render_label = ttk.Label(control_frame, text="0 fps, queue 0")
+        self.render_label.grid(row=0, column=11, padx=5)
         
         # Main content area
         content_frame = ttk.Frame(self.root)
@@ -151,81 +273,25 @@ class GUI:
     
     def load_graph(self, filename):
         try:
-            self.graph = self.open_file(filename)
-            self.draw_graph()
-            messagebox.showinfo("Success", "Graph loaded successfully!")
+            self.graph, stats = load_graph(filename)
+            self.build_graph_canvas()
+            messagebox.showinfo("Success", f"Graph loaded successfully!\n{stats}")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to load graph: {str(e)}")
             print(e)
     
-    def open_file(self, fname):
-        graph = {
-            'nodes': {},
-            'adjacency_list': {},
-            'origin': None,
-            'destinations': []
-        }
-        
-        with open(fname, 'r') as file:
-            lines = file.readlines()
-        
-        current_section = None
-        
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            
-            if line == "Nodes:":
-                current_section = "nodes"
-                continue
-            elif line == "Edges:":
-                current_section = "edges"
-                continue
-            elif line == "Origin:":
-                current_section = "origin"
-                continue
-            elif line == "Destinations:":
-                current_section = "destinations"
-                continue
-            
-            if current_section == "nodes":
-                parts = line.split(': ')
-                node_id = int(parts[0])
-                coords = parts[1].strip('()').split(',')
-                x, y = int(coords[0]), int(coords[1])
-                graph['nodes'][node_id] = (x, y)
-                graph['adjacency_list'][node_id] = []
-            
-            elif current_section == "edges":
-                parts = line.split(': ')
-                edge = parts[0].strip('()').split(',')
-                from_node = int(edge[0])
-                to_node = int(edge[1])
-                cost = int(parts[1])
-                
-                if from_node not in graph['adjacency_list']:
-                    graph['adjacency_list'][from_node] = []
-                graph['adjacency_list'][from_node].append((to_node, cost))
-            
-            elif current_section == "origin":
-                graph['origin'] = int(line)
-            
-            elif current_section == "destinations":
-                dest_list = line.split(';')
-                graph['destinations'] = [int(d.strip()) for d in dest_list]
-        
-        for node in graph['adjacency_list']:
-            graph['adjacency_list'][node].sort(key=lambda x: x[0])
-        
-        return graph
-    
-    def draw_graph(self, highlight_current=None, highlight_frontier=None, highlight_path=None):
-        if not self.graph:
-            return
-        
+    def build_graph_canvas(self):
+        """Lay out the loaded graph and create every canvas item once.
+
+        Node positions, edge costs and the items of each node are kept, so draw_graph
+        only recolours nodes whose highlight changed instead of redrawing the graph.
+        """
         self.graph_canvas.delete("all")
-        
+        self.node_items = {}
+        self.node_styles = {}
+        self.highlighted = set()
+        self.shown_path = None
+
         nodes = self.graph['nodes']
         if not nodes:
             return
@@ -254,225 +320,65 @@ class GUI:
         
         # Set scroll region
         self.graph_canvas.config(scrollregion=(0, 0, scroll_width, scroll_height))
-        
-        def transform(x, y):
-            tx = padding + (x - min_x) * scale
-            ty = scroll_height - (padding + (y - min_y) * scale)
-            return tx, ty
-        
-        # Helper function to check if edge is bidirectional
-        def is_bidirectional(from_node, to_node):
-            """Check if there's a reverse edge"""
-            if to_node in self.graph['adjacency_list']:
-                for neighbor, _ in self.graph['adjacency_list'][to_node]:
-                    if neighbor == from_node:
-                        return True
-            return False
-        
-        # Draw solution path edges first (if available)
-        if highlight_path:
-            for i in range(len(highlight_path) - 1):
-                from_node = highlight_path[i]
-                to_node = highlight_path[i + 1]
-                x1, y1 = transform(*nodes[from_node])
-                x2, y2 = transform(*nodes[to_node])
-                
-                # Calculate direction vector
-                dx = x2 - x1
-                dy = y2 - y1
-                length = (dx**2 + dy**2)**0.5
-                
-                r = 22
-                
-                if length > 0:
-                    ux = dx / length
-                    uy = dy / length
-                    start_x = x1 + ux * r
-                    start_y = y1 + uy * r
-                    end_x = x2 - ux * r
-                    end_y = y2 - uy * r
-                else:
-                    start_x, start_y = x1, y1
-                    end_x, end_y = x2, y2
-                
-                # Check if bidirectional
-                bidirectional = is_bidirectional(from_node, to_node)
-                
-                if bidirectional:
-                    # No arrow for bidirectional
-                    self.graph_canvas.create_line(start_x, start_y, end_x, end_y,
-                                                 fill="yellow", width=4)
-                else:
-                    # Arrow at 25% point for unidirectional
-                    arrow_x = start_x + (end_x - start_x) * 0.25
-                    arrow_y = start_y + (end_y - start_y) * 0.25
-                    
-                    # Draw line in two parts: before arrow and after arrow
-                    self.graph_canvas.create_line(start_x, start_y, arrow_x, arrow_y,
-                                                 fill="yellow", width=4, arrow=tk.LAST,
-                                                 arrowshape=(10, 12, 5))
-                    self.graph_canvas.create_line(arrow_x, arrow_y, end_x, end_y,
-                                                 fill="yellow", width=4)
+
+        self.layout = {
+            node: (padding + (x - min_x) * scale, scroll_height - (padding + (y - min_y) * scale))
+            for node, (x, y) in nodes.items()
+        }
+        # (from, to) -> cost; an edge is bidirectional when its reverse is in here too
+        self.edge_costs = {(from_node, to_node): cost
+                           for from_node, neighbors in self.graph['adjacency_list'].items()
+                           for to_node, cost in neighbors}
         
         # Draw edges
         drawn_edges = set()  # Track drawn edges to avoid duplicates
         
-        for from_node, neighbors in self.graph['adjacency_list'].items():
-            x1, y1 = transform(*nodes[from_node])
-            for to_node, cost in neighbors:
-                # Skip if we've already drawn this edge pair
-                if (min(from_node, to_node), max(from_node, to_node)) in drawn_edges:
-                    continue
-                
-                x2, y2 = transform(*nodes[to_node])
-                
-                # Calculate direction vector
-                dx = x2 - x1
-                dy = y2 - y1
-                length = (dx**2 + dy**2)**0.5
-                
-                # Node radius
-                r = 22
-                
-                # Calculate start and end points (outside the node circles)
-                if length > 0:
-                    # Unit vector
-                    ux = dx / length
-                    uy = dy / length
-                    
-                    # Start point (just outside from_node)
-                    start_x = x1 + ux * r
-                    start_y = y1 + uy * r
-                    
-                    # End point (just at edge of to_node)
-                    end_x = x2 - ux * r
-                    end_y = y2 - uy * r
-                else:
-                    start_x, start_y = x1, y1
-                    end_x, end_y = x2, y2
+        for (from_node, to_node), cost in self.edge_costs.items():
+            # Skip if we've already drawn this edge pair
+            if (min(from_node, to_node), max(from_node, to_node)) in drawn_edges:
+                continue
+            
+            bidirectional = (to_node, from_node) in self.edge_costs
+            self.draw_edge(from_node, to_node, "gray", 2, bidirectional)
+            if bidirectional:
+                drawn_edges.add((min(from_node, to_node), max(from_node, to_node)))
+
+            x1, y1 = self.layout[from_node]
+            x2, y2 = self.layout[to_node]
+            dx = x2 - x1
+            dy = y2 - y1
+            length = (dx**2 + dy**2)**0.5
+            
+            # Calculate midpoint for cost label
+            mid_x, mid_y = (x1 + x2) / 2, (y1 + y2) / 2
+            
+            # Calculate perpendicular offset
+            if length > 0:
+                # Perpendicular vector (rotated 90 degrees)
+                perp_x = -dy / length
+                perp_y = dx / length
                 
-                # Check if bidirectional
-                bidirectional = is_bidirectional(from_node, to_node)
+                # Offset distance from the line
+                offset = 12
                 
                 if bidirectional:
-                    # Draw simple line without arrow for bidirectional edges
-                    self.graph_canvas.create_line(start_x, start_y, end_x, end_y,
-                                                 fill="gray", width=2)
-                    drawn_edges.add((min(from_node, to_node), max(from_node, to_node)))
+                    # For bidirectional: show both costs
+                    self.draw_cost_label(mid_x - perp_x * offset, mid_y - perp_y * offset, cost)
+                    self.draw_cost_label(mid_x + perp_x * offset, mid_y + perp_y * offset,
+                                         self.edge_costs[(to_node, from_node)])
                 else:
-                    # Arrow at 25% point for unidirectional edges
-                    arrow_x = start_x + (end_x - start_x) * 0.25
-                    arrow_y = start_y + (end_y - start_y) * 0.25
-                    
-                    # Draw line in two parts: before arrow and after arrow
-                    self.graph_canvas.create_line(start_x, start_y, arrow_x, arrow_y,
-                                                 fill="gray", width=2, arrow=tk.LAST,
-                                                 arrowshape=(10, 12, 5))
-                    self.graph_canvas.create_line(arrow_x, arrow_y, end_x, end_y,
-                                                 fill="gray", width=2)
-                
-                # Calculate midpoint for cost label
-                mid_x, mid_y = (x1 + x2) / 2, (y1 + y2) / 2
-                
-                # Calculate perpendicular offset
-                if length > 0:
-                    # Perpendicular vector (rotated 90 degrees)
-                    perp_x = -dy / length
-                    perp_y = dx / length
-                    
-                    # Offset distance from the line
-                    offset = 12
-                    
-                    if bidirectional:
-                        # For bidirectional: show both costs
-                        
-                        text_x_top = mid_x - perp_x * offset
-                        text_y_top = mid_y - perp_y * offset
-                        
-                        label_top = tk.Label(
-                            self.graph_canvas, 
-                            text=str(cost), 
-                            bg="white", 
-                            fg="blue", 
-                            font=("Arial", 9, "bold")
-                        )
-                        self.graph_canvas.create_window(text_x_top, text_y_top, window=label_top)
-                        
-                        
-                        reverse_cost = None
-                        if to_node in self.graph['adjacency_list']:
-                            for neighbor, edge_cost in self.graph['adjacency_list'][to_node]:
-                                if neighbor == from_node:
-                                    reverse_cost = edge_cost
-                                    break
-                        
-                        
-                        if reverse_cost is not None:
-                            text_x_bottom = mid_x + perp_x * offset
-                            text_y_bottom = mid_y + perp_y * offset
-                            
-                            label_bottom = tk.Label(
-                                self.graph_canvas, 
-                                text=str(reverse_cost), 
-                                bg="white", 
-                                fg="blue", 
-                                font=("Arial", 9, "bold")
-                            )
-                            self.graph_canvas.create_window(text_x_bottom, text_y_bottom, window=label_bottom)
-                    else:
-                        # For unidirectional: show single cost
-                        text_x = mid_x + perp_x * offset
-                        text_y = mid_y + perp_y * offset
-                        
-                        label = tk.Label(
-                            self.graph_canvas, 
-                            text=str(cost), 
-                            bg="white", 
-                            fg="blue", 
-                            font=("Arial", 9, "bold")
-                        )
-                        self.graph_canvas.create_window(text_x, text_y, window=label)
-                else:
-                    text_x = mid_x
-                    text_y = mid_y + 12
-                    
-                    label = tk.Label(
-                        self.graph_canvas, 
-                        text=str(cost), 
-                        bg="white", 
-                        fg="blue", 
-                        font=("Arial", 9, "bold")
-                    )
-                    self.graph_canvas.create_window(text_x, text_y, window=label)
+                    # For unidirectional: show single cost
+                    self.draw_cost_label(mid_x + perp_x * offset, mid_y + perp_y * offset, cost)
+            else:
+                self.draw_cost_label(mid_x, mid_y + 12, cost)
         
         # Draw nodes
-        for node_id, (x, y) in nodes.items():
-            tx, ty = transform(x, y)
-            
-            # Determine color
-            if highlight_current and node_id == highlight_current:
-                color = "orange"
-                outline_width = 4
-            elif highlight_path and node_id in highlight_path:
-                color = "yellow"
-                outline_width = 3
-            elif highlight_frontier and node_id in highlight_frontier:
-                color = "lightyellow"
-                outline_width = 3
-                outline_width = 2
-            elif node_id == self.graph['origin']:
-                color = "green"
-                outline_width = 2
-            elif node_id in self.graph['destinations']:
-                color = "red"
-                outline_width = 2
-            else:
-                color = "white"
-                outline_width = 2
-            
-            r = 22
-            self.graph_canvas.create_oval(tx - r, ty - r, tx + r, ty + r, 
-                                         fill=color, outline="black", width=outline_width)
+        r = 22
+        for node_id, (tx, ty) in self.layout.items():
+            color, outline_width = self.node_style(node_id)
+            self.node_items[node_id] = self.graph_canvas.create_oval(tx - r, ty - r, tx + r, ty + r,
+                                                                     fill=color, outline="black", width=outline_width)
+            self.node_styles[node_id] = (color, outline_width)
             self.graph_canvas.create_text(tx, ty, text=str(node_id), 
                                          font=("Arial", 12, "bold"))
         
@@ -496,6 +402,102 @@ class GUI:
             self.graph_canvas.create_text(legend_x + 95, y_offset + 9, text=label, anchor=tk.W,
                                          font=("Arial", 9))
 
+    def draw_edge(self, from_node, to_node, color, width, bidirectional, tags=()):
+        """Line between two nodes' circles, with an arrow a quarter of the way along unless bidirectional"""
+        x1, y1 = self.layout[from_node]
+        x2, y2 = self.layout[to_node]
+        
+        # Calculate direction vector
+        dx = x2 - x1
+        dy = y2 - y1
+        length = (dx**2 + dy**2)**0.5
+        
+        # Node radius
+        r = 22
+        
+        # Calculate start and end points (outside the node circles)
+        if length > 0:
+            # Unit vector
+            ux = dx / length
+            uy = dy / length
+            start_x = x1 + ux * r
+            start_y = y1 + uy * r
+            end_x = x2 - ux * r
+            end_y = y2 - uy * r
+        else:
+            start_x, start_y = x1, y1
+            end_x, end_y = x2, y2
+        
+        if bidirectional:
+            # Draw simple line without arrow for bidirectional edges
+            self.graph_canvas.create_line(start_x, start_y, end_x, end_y,
+                                         fill=color, width=width, tags=tags)
+        else:
+            # Arrow at 25% point for unidirectional edges
+            arrow_x = start_x + (end_x - start_x) * 0.25
+            arrow_y = start_y + (end_y - start_y) * 0.25
+            
+            # Draw line in two parts: before arrow and after arrow
+            self.graph_canvas.create_line(start_x, start_y, arrow_x, arrow_y,
+                                         fill=color, width=width, arrow=tk.LAST,
+                                         arrowshape=(10, 12, 5), tags=tags)
+            self.graph_canvas.create_line(arrow_x, arrow_y, end_x, end_y,
+                                         fill=color, width=width, tags=tags)
+
+    def draw_cost_label(self, x, y, cost):
+        label = tk.Label(
+            self.graph_canvas, 
+            text=str(cost), 
+            bg="white", 
+            fg="blue", 
+            font=("Arial", 9, "bold")
+        )
+        self.graph_canvas.create_window(x, y, window=label)
+
+    def node_style(self, node_id, current=None, frontier=(), path=()):
+        """(fill colour, outline width) of a node for the given highlights"""
+        if current is not None and node_id == current:
+            return "orange", 4
+        if node_id in path:
+            return "yellow", 3
+        if node_id in frontier:
+            return "lightyellow", 2
+        if node_id == self.graph['origin']:
+            return "green", 2
+        if node_id in self.graph['destinations']:
+            return "red", 2
+        return "white", 2
+
+    def draw_graph(self, highlight_current=None, highlight_frontier=None, highlight_path=None):
+        """Show a step's highlights, recolouring only the nodes whose style changes"""
+        if not self.graph:
+            return
+        if self.node_items is None:
+            self.build_graph_canvas()
+
+        frontier = set(highlight_frontier or ())
+        path = set(highlight_path or ())
+        wanted = frontier | path
+        if highlight_current is not None:
+            wanted.add(highlight_current)
+
+        # Nodes highlighted last time or now are the only ones that can change
+        for node_id in self.highlighted | wanted:
+            style = self.node_style(node_id, highlight_current, frontier, path)
+            if style != self.node_styles[node_id]:
+                color, outline_width = style
+                self.graph_canvas.itemconfig(self.node_items[node_id], fill=color, width=outline_width)
+                self.node_styles[node_id] = style
+        self.highlighted = wanted
+
+        # Solution path edges, kept beneath the other edges
+        if highlight_path != self.shown_path:
+            self.graph_canvas.delete("solution")
+            for from_node, to_node in zip(highlight_path or (), (highlight_path or ())[1:]):
+                self.draw_edge(from_node, to_node, "yellow", 4, (to_node, from_node) in self.edge_costs, tags="solution")
+            self.graph_canvas.tag_lower("solution")
+            self.shown_path = list(highlight_path) if highlight_path else None
+
     
     def run_search(self):
         if not self.graph:
@@ -512,9 +514,12 @@ class GUI:
         self.reset_button.config(state=tk.NORMAL)
         
         # Reset tree tracking
-        self.search_tree = []
-        self.node_counter = 0
-        self.node_ids = {}
+        self.tree = SearchTree(reverse_children=self.algorithm_var.get() == 'dfs')
+        self.tree_events = []
+        self.frontier = Frontier()
+        self.pending_steps.clear()
+        self.pending_results = None
+        self.dropped_steps = 0
         
         # Run search in separate thread
         thread = threading.Thread(target=self.execute_search)
@@ -530,7 +535,9 @@ class GUI:
             'dijkstra': CUS1,
             'gbfs': GBFS,
             'astar': AS,
-            'idastar': CUS2
+            'idastar': CUS2,
+            'bi-dijkstra': BiDijkstra,
+            'bi-astar': BiAS
         }
         
         try:
@@ -538,15 +545,22 @@ class GUI:
                 searcher = algorithm_map[algorithm](self.graph)
 
                 self.current_bound = None
+                self.entry_parents = {}
 
-                
-                # Run with callback
-                number_of_nodes, path, goal = searcher.search(step_callback=self.step_callback)
+                # Pull the search one event at a time; a reset simply stops pulling
+                for event in searcher.events():
+                    if not self.is_running:
+                        return
+                    self.handle_event(event)
+                if self.tree_events:
+                    # Events after the last step, e.g. the start's expansion when it has no children
+                    self.pending_steps.append({'events': self.take_tree_events()})
+                number_of_nodes, path, goal = searcher.result
                 
                 self.solution_path = path
                 
-                # Display final results
-                self.root.after(0, self.display_results, algorithm, number_of_nodes, path, goal)
+                # Display final results once render_frame has drawn the last step
+                self.pending_results = (algorithm, number_of_nodes, path, goal)
             
         except Exception as e:
             import traceback
@@ -557,151 +571,126 @@ class GUI:
             self.root.after(0, self.run_button.config, {"state": tk.NORMAL})
             self.root.after(0, self.pause_button.config, {"state": tk.DISABLED})
     
-    def step_callback(self, current_node, neighbor, path, frontier, is_goal, g_cost=None, h_cost=None, bound=None, pruned=False):
-        """Called by search algorithm at each step"""
+    def handle_event(self, event):
+        """Queue a SearchEvent, showing it as a step when it generates, prunes or reaches a node below the root"""
+        self.tree_events.append(event)
+        if event.kind == 'bound':
+            self.entry_parents.clear()
+            self.show_step(event)
+        elif event.kind == 'generate':
+            self.entry_parents[event.entry] = event.parent
+            if event.parent is not None:
+                self.show_step(event)
+        elif event.kind == 'prune':
+            if self.entry_parents[event.entry] is not None:
+                self.show_step(event)
+        elif event.kind == 'goal':
+            self.show_step(event)
+
+    def show_step(self, event):
+        """Queue the step event ends with, pausing and then waiting out the speed delay.
+
+        Only the events are queued: render_frame builds the frontier and path for the steps
+        it draws, so dropped steps cost the search thread nothing.
+        """
         # Wait if paused
         while self.is_paused and self.is_running:
             time.sleep(0.1)
         
         if not self.is_running:
             return
-        
-        # For IDAstar reset step
-        if current_node is None and not path:
-            # reset internal tree state
-            self.search_tree = []
-            self.node_counter = 0
-            self.node_ids = {}
 
-            # prepare empty step data to update GUI (clears tree_canvas and redraws graph)
-            step_data = {
-                'current_node': None,
-                'neighbor': None,
-                'path': [],
-                'frontier': frontier or [],
-                'is_goal': False,
-                'tree_data': [],
-                'g_cost': None,
-                'h_cost': None,
-                'bound': bound,
-                'pruned': False
-            }
-            # update GUI on main thread
-            self.root.after(0, self.update_visualization_step, step_data)
-            return
-        
-        # Build tree structure
-        self.build_tree_from_path(path, current_node, neighbor, is_goal, g_cost, h_cost, pruned)
+        # Hand to render_frame on the main thread
+        self.pending_steps.append({'event': event, 'events': self.take_tree_events()})
 
+        # IDA* reset steps are not delayed
+        if event.kind == 'bound':
+            return
         
+        # Delay for visualization
+        delay = self.speed_var.get()
+        if delay > 0:
+            time.sleep(delay)
 
-        # Create step data
-        step_data = {
-            'current_node': current_node,
-            'neighbor': neighbor,
-            'path': path,
-            'frontier': frontier,
-            'is_goal': is_goal,
-            'tree_data': [node.copy() for node in self.search_tree],
-            'g_cost': g_cost,
-            'h_cost': h_cost,
-            'bound': bound,
-            'pruned': pruned
-        }
-
+    def take_tree_events(self):
+        """The events handled since the last step, for the step being queued"""
+        events, self.tree_events = self.tree_events, []
+        return events
 
-        # Update GUI in main thread
-        self.root.after(0, self.update_visualization_step, step_data)
-        
-        # Delay for visualization
-        time.sleep(self.speed_var.get())
-    
-    # ...existing code...
+    def render_frame(self):
+        """Draw at most one queued step, then schedule the next frame.
 
-    def build_tree_from_path(self, path, current_node, neighbor, is_goal, g_cost=None, h_cost=None, pruned=False):
-        """Build/update search tree from current path"""
-        
-        # Add nodes in path if not already added
-        for i, node in enumerate(path):
-            
-            node_key = (node, i)  # Key is (node_value, depth) to differentiate same nodes in different paths
-            
-            if node_key not in self.node_ids:
-                node_id = self.node_counter
-                self.node_counter += 1
-                self.node_ids[node_key] = node_id
-                
-                parent_id = None
-                if i > 0:
-                    parent_key = (path[i-1], i-1)
-                    parent_id = self.node_ids.get(parent_key)
-                
-                # Determine initial state based on THIS specific path
-                if is_goal and node == current_node and i == len(path) - 1:
-                    # Only mark as solution if it's the last node in the goal path
-                    state = 'solution'
-                elif node == current_node and i == len(path) - 1:
-                    # Currently being expanded (last node in current path)
-                    state = 'current'
-                elif node == neighbor and i == len(path) - 1:
-                    if pruned:
-                        state = 'visited'  # Pruned - exceeds bound  (ONLY FOR IDASTAR)
-                    else:
-                        state = 'frontier'  # Normal frontier node
-                else:
-                    # Nodes earlier in the path
-                    state = 'visited'
-                
-                node_g = g_cost if node == neighbor and i == len(path) - 1 else None
-                node_h = h_cost if node == neighbor and i == len(path) - 1 else None
-                
-                self.search_tree.append({
-                    'id': node_id,
-                    'node': node,
-                    'parent': parent_id,
-                    'cost': i,
-                    'state': state,
-                    'g': node_g,
-                    'h': node_h,
-                    'path_id': id(path)  # Store path identifier
-                })
+        With the speed slider at its minimum every step but the latest is dropped; otherwise
+        steps are drawn in order, one per frame, unless more than a second of them has piled up.
+        """
+        pending = self.pending_steps
+        if pending:
+            # Only pop what is queued now; the search thread may still be appending
+            count = len(pending) if self.speed_var.get() <= 0 or len(pending) > FRAME_RATE else 1
+            for _ in range(count):
+                step = pending.popleft()
+                # Dropped steps are not drawn, but the tree and frontier still need their events
+                for event in step['events']:
+                    self.apply_event(event)
+            self.dropped_steps += count - 1
+            if 'event' in step:
+                self.update_visualization_step(self.step_data(step['event']))
             else:
-                # Update state of existing node in THIS specific path position
-                node_id = self.node_ids[node_key]
-               
-                for tree_node in self.search_tree:
-                    if tree_node['id'] == node_id:
-                        # Only update if it's part of the current operation
-                        if is_goal and node in path:
-                            tree_node['state'] = 'solution'
-                        elif node == neighbor:
-                            tree_node['g'] = g_cost
-                            tree_node['h'] = h_cost
+                self.draw_search_tree()
+            self.frame_times.append(time.perf_counter())
+        elif self.pending_results is not None:
+            results, self.pending_results = self.pending_results, None
+            self.display_results(*results)
 
-                            # This is for IDASTAR
-                            if pruned:
-                                tree_node['state'] = 'visited'
-                            else:
-                                tree_node['state'] = 'frontier'
-                        elif i < len(path) - 1:  # Nodes before current in path
-                            tree_node['state'] = 'visited'
+        now = time.perf_counter()
+        while self.frame_times and now - self.frame_times[0] > 1.0:
+            self.frame_times.popleft()
+        self.render_label.config(text=f"{len(self.frame_times)} fps, queue {len(pending)}, dropped {self.dropped_steps}")
+        self.root.after(FRAME_MS, self.render_frame)
+    
+    def apply_event(self, event):
+        """Follow the search tree and frontier through one SearchEvent"""
+        self.tree.apply(event)
+        if event.kind == 'generate':
+            self.frontier.add(event.node)
+        elif event.kind == 'bound':
+            self.frontier.clear()
+        else:
+            self.frontier.remove(event.node)
 
-                        break
-        
-        # Mark all nodes in solution path when goal is found
-        if is_goal:
-            # Only mark nodes in THIS specific path
-            for i, node in enumerate(path):
-                node_key = (node, i)
-                if node_key in self.node_ids:
-                    node_id = self.node_ids[node_key]
-                    for node_data in self.search_tree:
-                        if node_data['id'] == node_id:
-                            node_data['state'] = 'solution'
-                            break
+    def entry_path(self, entry):
+        """Nodes from the root of the search tree down to an event entry"""
+        records = self.tree.records
+        path = []
+        while entry is not None:
+            record = records[entry]
+            path.append(record['node'])
+            entry = record['parent']
+        path.reverse()
+        return path
 
+    def step_data(self, event):
+        """What update_visualization_step shows for the step ending with event, once its events are applied"""
+        step_data = {
+            'current_node': None,
+            'neighbor': None,
+            'path': [],
+            'frontier': self.frontier.snapshot(),
+            'is_goal': False,
+            'g_cost': event.g,
+            'h_cost': event.h,
+            'bound': event.bound,
+            'pruned': event.kind == 'prune'
+        }
+        if event.kind == 'goal':
+            step_data.update(current_node=event.node, path=event.path, is_goal=True)
+        elif event.kind != 'bound':
+            # A generated or pruned entry, shown from its parent
+            parent = self.tree.records[event.entry]['parent']
+            step_data.update(current_node=self.tree.records[parent]['node'], neighbor=event.node,
+                             path=self.entry_path(event.entry))
+        return step_data
 
-    
     def update_visualization_step(self, step_data):
         """Update GUI with current step"""
         # Update graph
@@ -716,7 +705,6 @@ class GUI:
         )
         
         # Update search tree
-        self.search_tree = step_data['tree_data']
         self.draw_search_tree()
         
         # Update status
@@ -731,7 +719,7 @@ class GUI:
         status += f"Frontier: {step_data['frontier'][:10]}"
         if len(step_data['frontier']) > 10:
             status += f"... (+{len(step_data['frontier']) - 10} more)"
-        status += f"\nTree Nodes: {len(step_data['tree_data'])}\n"
+        status += f"\nTree Nodes: {len(self.tree)}\n"
 
         if step_data.get('g_cost') is not None:
             status += f"g(n): {step_data['g_cost']:.2f}\n"
@@ -752,17 +740,20 @@ class GUI:
     def reset_visualization(self):
         self.is_running = False
         self.is_paused = False
-        self.search_tree = []
+        self.pending_steps.clear()
+        self.pending_results = None
         self.solution_path = None
-        self.node_counter = 0
-        self.node_ids = {}
+        self.tree.clear()
+        self.tree_events = []
+        self.frontier.clear()
         
         self.tree_canvas.delete("all")
         self.status_text.delete(1.0, tk.END)
         self.results_text.delete(1.0, tk.END)
         
         if self.graph:
-            self.draw_graph()
+            # Re-laid out, so the graph also fits a window resized since it was loaded
+            self.build_graph_canvas()
         
         self.run_button.config(state=tk.NORMAL)
         self.pause_button.config(state=tk.DISABLED, text="⏸ Pause")
@@ -791,152 +782,155 @@ class GUI:
         self.results_text.insert(1.0, result_text)
     
     def draw_search_tree(self):
-        if not self.search_tree:
-            # Even if tree is empty, draw bound if it exists (for IDA* between iterations)
-            if self.current_bound is not None and self.algorithm_var.get() == 'idastar':
-                self.tree_canvas.delete("all")
-                self.draw_bound_label()
-            return
-        
-        self.tree_canvas.delete("all")
-        
-        levels = self.organize_tree_by_levels()
-        
-        if not levels:
-            return
-        
-        level_height = 80  # Increased for labels
-        node_spacing = 80  # Increased for labels
-        start_y = 40
-        
-        max_width = max(len(level) for level in levels) * node_spacing
-        canvas_width = max(800, max_width + 100)
-        canvas_height = len(levels) * level_height + 100
-        
-        self.tree_canvas.config(scrollregion=(0, 0, canvas_width, canvas_height))
-        
-        node_positions = {}
-        
-        # Draw tree level by level
-        for level_idx, level_nodes in enumerate(levels):
-            y = start_y + level_idx * level_height
-            num_nodes = len(level_nodes)
-            total_width = num_nodes * node_spacing
-            start_x = (canvas_width - total_width) / 2
-            
-            for idx, node_data in enumerate(level_nodes):
-                x = start_x + idx * node_spacing
-                node_positions[node_data['id']] = (x, y)
-                
-                # Draw edge to parent with arrow
-                if node_data['parent'] is not None and node_data['parent'] in node_positions:
-                    px, py = node_positions[node_data['parent']]
-                    edge_color = "yellow" if node_data['state'] == 'solution' else "gray"
-                    edge_width = 3 if node_data['state'] == 'solution' else 2
-                    
-                    # Calculate direction vector
-                    dx = x - px
-                    dy = y - py
-                    length = (dx**2 + dy**2)**0.5
-                    
-                    r = 16  # Node radius
-                    
-                    if length > 0:
-                        # Unit vector
-                        ux = dx / length
-                        uy = dy / length
-                        
-                        # Start point (just outside parent node)
-                        start_x_edge = px + ux * r
-                        start_y_edge = py + uy * r
-                        
-                        # End point (just at edge of child node)
-                        end_x = x - ux * r
-                        end_y = y - uy * r
-                        
-                        # Draw line with arrow pointing to child
-                        self.tree_canvas.create_line(start_x_edge, start_y_edge, end_x, end_y, 
-                                                    fill=edge_color, width=edge_width,
-                                                    arrow=tk.LAST, arrowshape=(10, 12, 5))
-                    else:
-                        # Fallback if nodes are at same position
-                        self.tree_canvas.create_line(px, py, x, y, fill=edge_color, width=edge_width)
-                
-                # Determine node color based on THIS node's specific state in its path
-                state = node_data.get('state', 'frontier')
-                if state == 'solution':
-                    color = "yellow"
-                elif state == 'visited':
-                    color = "lightblue"
-                elif state == 'frontier':
-                    color = "lightyellow"
-                elif state == 'current':
-                    color = "orange"
-                else:
-                    # Check if this specific node instance is origin or destination
-                    if node_data['node'] == self.graph['origin'] and node_data.get('cost', 0) == 0:
-                        color = "green"
-                    elif node_data['node'] in self.graph['destinations']:
-                        color = "red"
-                    else:
-                        color = "white"
-                
-                # Draw node
-                r = 16
-                self.tree_canvas.create_oval(x - r, y - r, x + r, y + r, 
-                                            fill=color, outline="black", width=2)
-                self.tree_canvas.create_text(x, y, text=str(node_data['node']), 
-                                            font=("Arial", 9, "bold"))
-                
-                # Draw g, h, f values to the right of the node if they exist
-                if node_data.get('g') is not None or node_data.get('h') is not None:
-                    value_lines = []
-                    
-                    if node_data.get('g') is not None:
-                        value_lines.append(f"g={node_data['g']:.2f}")
-                    
-                    if node_data.get('h') is not None:
-                        value_lines.append(f"h={node_data['h']:.2f}")
-                    
-                    if node_data.get('g') is not None and node_data.get('h') is not None:
-                        f_val = node_data['g'] + node_data['h']
-                        value_lines.append(f"f={f_val:.2f}")
-                    
-                    # Draw values to the right of node
-                    value_text = "\n".join(value_lines)
-                    text_x = x + r + 5  # 5 pixels to the right of node
-                    
-                    # Create background for better readability
-                    temp_text = self.tree_canvas.create_text(
-                        text_x, y,
-                        text=value_text,
-                        font=("Arial", 7, "bold"),
-                        anchor=tk.W
-                    )
-                    bbox = self.tree_canvas.bbox(temp_text)
-                    self.tree_canvas.delete(temp_text)
-                    
-                    if bbox:
-                        # Draw white background rectangle
-                        padding = 2
-                        self.tree_canvas.create_rectangle(
-                            bbox[0] - padding, bbox[1] - padding,
-                            bbox[2] + padding, bbox[3] + padding,
-                            fill="white", outline="gray", width=1
-                        )
-                    
-                    # Draw text on top of background
-                    self.tree_canvas.create_text(
-                        text_x, y,
-                        text=value_text,
-                        font=("Arial", 7, "bold"),
-                        anchor=tk.W,
-                        fill="darkblue"
-                    )
-        
+        """Bring the tree canvas up to date with self.tree.
+
+        Items are created once per entry and kept by id, since Tk finds items by tag with a scan
+        of the whole canvas. Only entries in reordered levels are moved (with the edges to their
+        parent and children) and only entries whose state changed are recoloured.
+        """
+        tree = self.tree
+        canvas = self.tree_canvas
+        if tree.cleared:
+            canvas.delete("all")
+            self.tree_items = {}
+            self.tree_positions = {}
+            tree.cleared = False
+
+        # Positions of the entries in the levels that gained entries
+        moved = []
+        for depth in tree.layout_levels():
+            level = tree.levels[depth]
+            y = TREE_TOP + depth * TREE_LEVEL_HEIGHT
+            start_x = TREE_CENTER - (self.tree_slots(len(level)) - 1) * TREE_SPACING / 2
+            for index, entry in enumerate(level):
+                position = (start_x + index * TREE_SPACING, y)
+                old_position = self.tree_positions.get(entry)
+                if old_position != position:
+                    self.tree_positions[entry] = position
+                    moved.append((entry, old_position))
+
+        for entry, old_position in moved:
+            if old_position is None:
+                self.create_tree_node(tree.records[entry])
+            else:
+                x, y = self.tree_positions[entry]
+                for item in self.tree_items[entry]['node']:
+                    canvas.move(item, x - old_position[0], y - old_position[1])
+                self.place_tree_edge(entry)
+                for child in tree.children.get(entry, ()):
+                    self.place_tree_edge(child)
+
+        for entry in tree.dirty_records:
+            self.colour_tree_node(tree.records[entry])
+        tree.dirty_records.clear()
+
+        widest = self.tree_slots(max(map(len, tree.levels), default=0))
+        half_width = max(TREE_CENTER, (widest - 1) * TREE_SPACING / 2 + 50)
+        canvas.config(scrollregion=(TREE_CENTER - half_width, 0, TREE_CENTER + half_width,
+                                    len(tree.levels) * TREE_LEVEL_HEIGHT + 100))
+
         # Draw IDA* bound at bottom left if applicable
         if self.current_bound is not None and self.algorithm_var.get() == 'idastar':
+            canvas.delete("bound_label")
             self.draw_bound_label()
+
+    def tree_slots(self, width):
+        """Positions a level of width entries is laid out over"""
+        return 1 << max(width - 1, 0).bit_length()
+
+    def tree_node_colour(self, record):
+        state = record['state']
+        if state == 'solution':
+            return "yellow"
+        elif state == 'visited':
+            return "lightblue"
+        elif state == 'frontier':
+            return "lightyellow"
+        elif state == 'current':
+            return "orange"
+        # Check if this specific node instance is origin or destination
+        if record['node'] == self.graph['origin'] and record['depth'] == 0:
+            return "green"
+        elif record['node'] in self.graph['destinations']:
+            return "red"
+        return "white"
+
+    def tree_edge_coords(self, entry):
+        """Line from the parent's node to the edge of entry's node, None for a root"""
+        parent = self.tree.records[entry]['parent']
+        if parent is None:
+            return None
+        px, py = self.tree_positions[parent]
+        x, y = self.tree_positions[entry]
+        dx = x - px
+        dy = y - py
+        # Children are always a level below, so length > 0
+        length = (dx**2 + dy**2)**0.5
+        ux = dx / length
+        uy = dy / length
+        r = TREE_RADIUS
+        return (px + ux * r, py + uy * r, x - ux * r, y - uy * r)
+
+    def place_tree_edge(self, entry):
+        items = self.tree_items.get(entry)
+        if items is not None and items['edge'] is not None:
+            self.tree_canvas.coords(items['edge'], *self.tree_edge_coords(entry))
+
+    def create_tree_node(self, record):
+        """Create the canvas items of one search tree entry at its position"""
+        canvas = self.tree_canvas
+        entry = record['id']
+        x, y = self.tree_positions[entry]
+        r = TREE_RADIUS
+
+        # Edge from the parent with an arrow pointing to the child
+        edge = None
+        coords = self.tree_edge_coords(entry)
+        if coords is not None:
+            edge = canvas.create_line(*coords, fill="gray", width=2, arrow=tk.LAST, arrowshape=(10, 12, 5))
+
+        oval = canvas.create_oval(x - r, y - r, x + r, y + r,
+                                  fill=self.tree_node_colour(record), outline="black", width=2)
+        node_items = [oval, canvas.create_text(x, y, text=str(record['node']), font=("Arial", 9, "bold"))]
+        self.tree_items[entry] = {'oval': oval, 'edge': edge, 'node': node_items}
+
+        # Draw g, h, f values to the right of the node if they exist
+        if record['g'] is not None or record['h'] is not None:
+            value_lines = []
+            if record['g'] is not None:
+                value_lines.append(f"g={record['g']:.2f}")
+            if record['h'] is not None:
+                value_lines.append(f"h={record['h']:.2f}")
+            if record['g'] is not None and record['h'] is not None:
+                value_lines.append(f"f={record['g'] + record['h']:.2f}")
+
+            value_text = "\n".join(value_lines)
+            text_x = x + r + 5  # 5 pixels to the right of node
+            text = canvas.create_text(text_x, y, text=value_text, font=("Arial", 7, "bold"),
+                                      anchor=tk.W, fill="darkblue")
+            node_items.append(text)
+
+            # White background behind the text for better readability
+            bbox = canvas.bbox(text)
+            if bbox:
+                padding = 2
+                background = canvas.create_rectangle(
+                    bbox[0] - padding, bbox[1] - padding,
+                    bbox[2] + padding, bbox[3] + padding,
+                    fill="white", outline="gray", width=1
+                )
+                canvas.tag_lower(background, text)
+                node_items.append(background)
+
+    def colour_tree_node(self, record):
+        items = self.tree_items.get(record['id'])
+        if items is None:
+            return
+        self.tree_canvas.itemconfig(items['oval'], fill=self.tree_node_colour(record))
+        if items['edge'] is not None:
+            solution = record['state'] == 'solution'
+            self.tree_canvas.itemconfig(items['edge'], fill="yellow" if solution else "gray",
+                                        width=3 if solution else 2)
     
     def draw_bound_label(self):
         """Draw the current bound label at the fixed bottom-left corner of the visible canvas"""
@@ -954,12 +948,11 @@ class GUI:
         # Calculate the visible region coordinates
         scroll_region = self.tree_canvas.cget('scrollregion').split()
         if scroll_region:
-            total_width = float(scroll_region[2])
-            total_height = float(scroll_region[3])
+            left, top, right, bottom = map(float, scroll_region)
             
             # Calculate visible area in canvas coordinates
-            visible_left = x_view[0] * total_width
-            visible_top = y_view[0] * total_height
+            visible_left = left + x_view[0] * (right - left)
+            visible_top = top + y_view[0] * (bottom - top)
             visible_bottom = visible_top + canvas_height
             
             # Position bound label at bottom-left of visible area
@@ -1008,53 +1001,3 @@ class GUI:
             self.tree_canvas.delete("bound_label")
             # Redraw at new position
             self.draw_bound_label()
-    
-                
-    def organize_tree_by_levels(self):
-        if not self.search_tree:
-            return []
-        
-        levels = []
-        visited = set()
-        queue = deque()
-        
-        # Find root
-        root = None
-        for node in self.search_tree:
-            if node['parent'] is None:
-                root = node
-                break
-        
-        if not root:
-            return []
-        
-        queue.append((root, 0))
-        visited.add(root['id'])
-        
-        while queue:
-            node, level = queue.popleft()
-            
-            if level >= len(levels):
-                levels.append([])
-            
-            levels[level].append(node)
-            
-            # Find children
-            children = []
-            for child in self.search_tree:
-                if child['parent'] == node['id'] and child['id'] not in visited:
-                    children.append(child)
-                    visited.add(child['id'])
-            
-            # For DFS, reverse children order to show right-to-left
-            
-            if self.algorithm_var.get() == 'dfs':
-                children.reverse()
-            
-            # Add children to queue
-            for child in children:
-                queue.append((child, level + 1))
-        
-        return levels
-
-
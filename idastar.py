@@ -1,125 +1,280 @@
-from search_algorithms import SearchAlgorithms
+from search_algorithms import SearchAlgorithms, SearchEvent
 from utils import make_heuristics
 import math
+import random
+
+# How the bound grows between iterations:
+#   exact       - to the smallest f-cost that exceeded it (classic IDA*)
+#   exponential - to at least bound * growth
+#   cr          - as in IDA*-CR, to the f-cost that admits about (growth - 1) times
+#                 the nodes this iteration expanded, estimated from a sample of exceeded f-costs
+# The inexact policies can overshoot the optimal cost, so once they reach a goal a final
+# branch-and-bound pass under that goal's cost looks for a cheaper one.
+BOUND_POLICIES = ('exact', 'exponential', 'cr')
+# Exceeded f-costs kept per iteration by the cr policy
+EXCEEDED_SAMPLE_SIZE = 1024
 
 # IDA* Algorithm Implementation
 class CUS2(SearchAlgorithms):
-    def __init__(self, graph):
+    def __init__(self, graph, precompute_heuristics=False, landmarks=None, euclidean=True, transposition_size=0,
+                 bound_policy='exact', bound_growth=2.0):
         super().__init__(graph)
+        if bound_policy not in BOUND_POLICIES:
+            raise ValueError(f"Unknown bound policy: {bound_policy}")
+        if bound_policy != 'exact' and bound_growth <= 1:
+            raise ValueError("bound_growth must be greater than 1")
         self.total_generated_nodes = 0
-        self.h = make_heuristics(self.coords, self.goals)
-
-    def iterate(self, current_node, g, bound, path, step_callback=None):
+        # landmarks is an optional landmarks.LandmarkTable for the ALT bound (see utils.make_heuristics)
+        self.h = make_heuristics(self.coords, self.goals, precompute=precompute_heuristics,
+                                 landmarks=landmarks, euclidean=euclidean)
 
+        # transposition_size > 0 keeps up to that many node -> best g entries per iteration,
+        # and an arrival no cheaper than the best so far is pruned instead of expanded
+        self.transposition_size = transposition_size
 
-        
-        """Recursive DFS with f-cost bound"""
-        self.frontier.remove(current_node)
-        f = g + self.h(current_node)
+        self.bound_policy = bound_policy
+        self.bound_growth = bound_growth
+        self.reset_run()
 
-        
-        if current_node in self.goals:
-            return True, current_node, path
+    def reset_run(self):
+        """Clear the counters and exceeded sample of a previous search on this instance"""
+        # max_depth is the deepest expanded node, in edges from the start
+        self.stats = {'iterations': 0, 'expanded': 0, 're_expanded': 0, 'pruned': 0, 'max_depth': 0}
+        # For search_stats: the deepest generated node (in edges) and the most stack frames at once
+        self.generated_depth = 0
+        self.max_frames = 0
+        # Reservoir sample of the f-costs that exceeded the bound this iteration (cr policy only)
+        self.exceeded = [] if self.bound_policy == 'cr' else None
+        self.exceeded_count = 0
+        self.sampler = random.Random(0)
 
-        # Exceeds bound - return new threshold
+    def iterate(self, bound, observe=False, incumbent=None):
+        """Depth-first search from the start with f-cost bound, on an explicit stack.
 
-        if f > bound:
-            return f, None, None
+        A generator like steps(): returns (True, goal, path, entry) when a goal is reached,
+        else (min_excess, None, None, None) where min_excess is the smallest f-cost that
+        exceeded the bound. Entries number the nodes entered this iteration, the start being 0.
 
+        With incumbent, a [cost, goal, path, entry] list, the search is branch and bound instead:
+        every goal reached more cheaply replaces the incumbent and lowers the bound to its cost.
+        The incumbent's entry stays open for the final goal event; None when not (re)reached.
+        """
+        adjacency = self.graph['adjacency_list']
+        goals = self.goals
+        h = self.observe_heuristic(self.h)
+        stats = self.stats
+        table = {self.start: 0.0} if self.transposition_size > 0 else None
 
-        min_excess = math.inf
-        neighbor_list = []
-        # Explore neighbors
-        for neighbor, cost in self.graph['adjacency_list'][current_node]:
-            if neighbor in path:
-                continue
-            
-            neighbor_list.append((neighbor, cost))
-            self.total_generated_nodes += 1
+        path = [self.start]
+        on_path = {self.start}
+        # One frame per node on path that is being expanded:
+        # [node, g, children, next child, min excess, entry of the first child]
+        frames = []
+        g = 0.0
+        entry = next_entry = 0
 
-            
-            self.frontier.append(neighbor)
-            
-            if step_callback:
-                step_callback(current_node, neighbor, path + [neighbor], self.frontier, False, g + cost, self.h(neighbor), bound, False)
+        while True:
+            # Enter path[-1] at cost g
+            current_node = path[-1]
+            f = g + h(current_node)
 
-        
-        for neighbor, cost in neighbor_list:
-            result, goal_node, goal_path = self.iterate(
-                neighbor, 
-                g + cost, 
-                bound, 
-                path + [neighbor],
-                step_callback=step_callback
-            )
+            if current_node in goals:
+                if incumbent is None:
+                    return True, current_node, list(path), entry
+                if g < incumbent[0]:
+                    if observe and incumbent[3] is not None:
+                        yield SearchEvent('prune', incumbent[1], incumbent[3], g=incumbent[0], bound=bound)
+                    incumbent[:] = [g, current_node, list(path), entry]
+                    bound = g
+                elif observe:
+                    if incumbent[3] is None and path == incumbent[2]:
+                        # The goal this pass started from, reached again: its entry is reported at the end
+                        incumbent[3] = entry
+                    else:
+                        yield SearchEvent('prune', current_node, entry, g=g, h=f - g, bound=bound)
+                result = math.inf
 
-            # Goal found
-            if result is True:
-                return True, goal_node, goal_path
+            # Exceeds bound - return new threshold
+            elif f > bound:
+                result = f
+                if self.exceeded is not None:
+                    self.sample_exceeded(f)
+                if observe:
+                    yield SearchEvent('prune', current_node, entry, g=g, h=f - g, bound=bound)
             else:
-                if step_callback:
-                    step_callback(current_node, neighbor, path + [neighbor], self.frontier, False, g + cost, self.h(neighbor), bound, True)
-        
-            
-            # Track minimum f-cost that exceeded bound
-            if isinstance(result, (int, float)) and result < min_excess:
-                min_excess = result
-            
-            
-        return min_excess, None, None
-
-    def search(self, step_callback=None):
+                stats['expanded'] += 1
+                depth = len(path) - 1
+                if depth > stats['max_depth']:
+                    stats['max_depth'] = depth
+                if observe:
+                    yield SearchEvent('expand', current_node, entry, g=g, h=f - g, bound=bound)
+                    first_child = next_entry + 1
+                children = []
+                for neighbor, cost in adjacency[current_node]:
+                    if neighbor in on_path:
+                        continue
+                    children.append((neighbor, cost))
+                    self.total_generated_nodes += 1
+
+                    if observe:
+                        next_entry += 1
+                        yield SearchEvent('generate', neighbor, next_entry, entry, g=g + cost, h=h(neighbor), bound=bound)
+                if children and depth >= self.generated_depth:
+                    self.generated_depth = depth + 1
+                frames.append([current_node, g, children, 0, math.inf, first_child if observe else 0])
+                if len(frames) > self.max_frames:
+                    self.max_frames = len(frames)
+                result = None
+
+            # Hand result back up the stack until some frame has another child to enter
+            while True:
+                if not frames:
+                    return result, None, None, None
+                frame = frames[-1]
+                node, node_g, children, index, _min_excess, first_child = frame
+
+                if result is not None:
+                    # Returning from children[index - 1]
+                    child, cost = children[index - 1]
+                    path.pop()
+                    on_path.discard(child)
+                    # Track minimum f-cost that exceeded bound
+                    if result < frame[4]:
+                        frame[4] = result
+
+                if index < len(children):
+                    child, cost = children[index]
+                    frame[3] = index + 1
+                    g = node_g + cost
+                    path.append(child)
+                    on_path.add(child)
+                    entry = first_child + index
+
+                    if table is not None:
+                        best = table.get(child)
+                        if best is not None and g >= best:
+                            # Reached before at no greater cost this iteration: its subtree was already searched
+                            stats['pruned'] += 1
+                            if observe:
+                                yield SearchEvent('prune', child, entry, g=g, bound=bound)
+                            result = math.inf
+                            continue
+                        if best is not None or len(table) < self.transposition_size:
+                            table[child] = g
+                    break
+
+                frames.pop()
+                result = frame[4]
+
+    def sample_exceeded(self, f):
+        self.exceeded_count += 1
+        if len(self.exceeded) < EXCEEDED_SAMPLE_SIZE:
+            self.exceeded.append(f)
+        else:
+            i = self.sampler.randrange(self.exceeded_count)
+            if i < EXCEEDED_SAMPLE_SIZE:
+                self.exceeded[i] = f
+
+    def next_bound(self, bound, min_excess, expanded):
+        """Bound for the next iteration under self.bound_policy; never below min_excess"""
+        if self.bound_policy == 'exponential':
+            return max(min_excess, bound * self.bound_growth)
+
+        if self.bound_policy == 'cr':
+            sample = sorted(self.exceeded)
+            wanted = max(1, expanded * (self.bound_growth - 1))
+            fraction = min(1.0, wanted / self.exceeded_count)
+            new_bound = sample[max(0, math.ceil(fraction * len(sample)) - 1)]
+            self.exceeded.clear()
+            self.exceeded_count = 0
+            return max(min_excess, new_bound)
+
+        return min_excess
+
+    def path_cost(self, path):
+        cost = 0
+
+        # Calculate g cost of the found path
+        for i in range(len(path) - 1):
+            from_node = path[i]
+            to_node = path[i + 1]
+            for neighbor, edge_cost in self.graph['adjacency_list'].get(from_node, []):
+                if neighbor == to_node:
+                    cost += edge_cost
+                    break
+        return cost
+
+    def finish_stats(self, result, goal_popped=None, tree_parents=None, parents=()):
+        """IDA* has no queue to observe, so search_stats is filled from self.stats instead"""
+        search_stats = self.search_stats
+        if search_stats is not None:
+            search_stats.expansions = self.stats['expanded']
+            # Every iteration regenerates the start once; the remaining generations are children
+            search_stats.generations = self.total_generated_nodes - max(self.stats['iterations'], 1)
+            search_stats.max_depth = self.generated_depth
+            # The explicit stack holds one frame per node being expanded on the current path
+            search_stats.max_frontier = self.max_frames
+        return result
+
+    def steps(self, observe):
         """IDA* search with iterative deepening"""
+        self.reset_run()
         # Initial bound is heuristic estimate from start
         bound = self.h(self.start)
         self.total_generated_nodes = 1
         path = [self.start]
 
         if self.start in self.goals:
-            return [self.total_generated_nodes, path, self.start]
-        
+            if observe:
+                yield SearchEvent('generate', self.start, 0, g=0.0, h=bound, bound=bound)
+                yield SearchEvent('goal', self.start, 0, g=0.0, h=bound, bound=bound, path=path)
+            return self.finish_stats([self.total_generated_nodes, path, self.start])
+
         while True:
-            
+
             if self.total_generated_nodes != 1:
                 self.total_generated_nodes += 1
-            
-            
-            outcome, goal_node, goal_path = self.iterate(
-                self.start, 
-                0.0, 
-                bound, 
-                path,
-                step_callback=step_callback
-            )
-            
+
+            self.stats['iterations'] += 1
+            expanded_before = self.stats['expanded']
+            if observe:
+                yield from self.start_events(bound)
+            outcome, goal_node, goal_path, goal_entry = yield from self.iterate(bound, observe)
+
             # Goal found
             is_goal = goal_node in self.goals
 
             # If goal is found, return immediately after showing the solution
             if is_goal:
-                cost = 0
+                cost = self.path_cost(goal_path)
 
-                # Calculate g cost of the found path
-                for i in range(len(goal_path) - 1):
-                    from_node = goal_path[i]
-                    to_node = goal_path[i + 1]
-                    for neighbor, edge_cost in self.graph['adjacency_list'].get(from_node, []):
-                        if neighbor == to_node:
-                            cost += edge_cost
-                            break
+                if self.bound_policy != 'exact':
+                    # The bound may have jumped past the optimal cost: search everything cheaper than this goal
+                    bound = cost
+                    self.total_generated_nodes += 1
+                    self.stats['iterations'] += 1
+                    if observe:
+                        yield from self.start_events(bound)
+                    # goal_entry numbered the previous iteration's tree; iterate finds it again
+                    incumbent = [cost, goal_node, goal_path, None]
+                    yield from self.iterate(bound, observe, incumbent)
+                    cost, goal_node, goal_path, goal_entry = incumbent
 
-                if step_callback:
-                    step_callback(goal_node, None, goal_path, self.frontier,  is_goal, cost, self.h(goal_node), bound)
-                return [self.total_generated_nodes, goal_path, goal_node]
+                if observe:
+                    yield SearchEvent('goal', goal_node, goal_entry, g=cost, h=self.h(goal_node), bound=bound, path=goal_path)
+                return self.finish_stats([self.total_generated_nodes, goal_path, goal_node])
 
             # No solution exists
             if outcome == math.inf:
-                return [self.total_generated_nodes, None, None]
-            
-            # Increase bound and try again
-            bound = outcome
+                return self.finish_stats([self.total_generated_nodes, None, None])
+
+            # Every expansion of a finished iteration is repeated by the next one
+            self.stats['re_expanded'] += self.stats['expanded'] - expanded_before
 
-            self.frontier = [self.start]
+            # Increase bound and try again
+            bound = self.next_bound(bound, outcome, self.stats['expanded'] - expanded_before)
 
-            if step_callback:
-                step_callback(None, None, [], self.frontier, False, None, None, bound)
+    def start_events(self, bound):
+        """Events opening an iteration: the new bound, then the start as entry 0"""
+        yield SearchEvent('bound', bound=bound)
+        yield SearchEvent('generate', self.start, 0, g=0.0, h=self.h(self.start), bound=bound)
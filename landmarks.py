@@ -0,0 +1,250 @@
+from array import array
+import heapq
+import math
+import mmap
+import os
+import random
+import struct
+import sys
+
+from graph import CSRGraph
+from loader import file_digest, load_graph
+
+# Landmark file layout: HEADER, then node_ids q[n], landmarks q[k], distances from each
+# landmark <typecode>[k * n], distances to each landmark <typecode>[k * n]; -1 is unreachable
+LANDMARK_MAGIC = b'ALTTABLE'
+LANDMARK_VERSION = 1
+LANDMARK_HEADER = struct.Struct('=8sIIqqqqq32s')
+LANDMARK_SUFFIX = '.alt'
+DEFAULT_LANDMARKS = 8
+
+
+def shortest_distances(adjacency, source):
+    """Dijkstra distances from source over a CSR AdjacencyView, as a list (inf when unreachable)"""
+    offsets, targets, costs = adjacency.offsets, adjacency.targets, adjacency.costs
+    distances = [math.inf] * (len(offsets) - 1)
+    distances[source] = 0
+    min_heap = [(0, source)]
+    while min_heap:
+        d, u = heapq.heappop(min_heap)
+        if d > distances[u]:
+            continue
+        start, end = offsets[u], offsets[u + 1]
+        for v, cost in zip(targets[start:end], costs[start:end]):
+            new_distance = d + cost
+            if new_distance < distances[v]:
+                distances[v] = new_distance
+                heapq.heappush(min_heap, (new_distance, v))
+    return distances
+
+
+class LandmarkTable:
+    """Shortest distances from and to K landmark nodes, for the ALT lower bound.
+
+    By the triangle inequality, d(n, t) >= d(L, t) - d(L, n) and d(n, t) >= d(n, L) - d(t, L)
+    for every landmark L, so the largest of these over all landmarks is an admissible
+    estimate of the remaining cost. Tables are indexed like a CSRGraph (ascending node
+    ID order) and hold integer distances, with -1 for unreachable.
+    """
+    def __init__(self, node_ids, landmarks, from_distances, to_distances, buffer=None):
+        self.node_ids = node_ids
+        self.landmarks = landmarks
+        n = len(node_ids)
+        # One row of n distances per landmark
+        self.from_rows = [from_distances[i * n:(i + 1) * n] for i in range(len(landmarks))]
+        self.to_rows = [to_distances[i * n:(i + 1) * n] for i in range(len(landmarks))]
+        self.from_distances = from_distances
+        self.to_distances = to_distances
+        self.buffer = buffer  # mmap backing the tables when loaded from a file
+
+        self.contiguous = n == 0 or node_ids[n - 1] - node_ids[0] + 1 == n
+        self.id_index = None
+
+    @classmethod
+    def build(cls, graph, k=DEFAULT_LANDMARKS, seed=0):
+        """Pick k landmarks on a CSRGraph by farthest-point selection and run Dijkstra from and to each.
+
+        The first landmark is the node farthest from a random start; each next one is the
+        node farthest from all landmarks chosen so far, which spreads them to the map's edges.
+        """
+        n = len(graph)
+        forward, backward = graph['adjacency_list'], graph['reverse_adjacency_list']
+        rng = random.Random(seed)
+
+        def farthest(distances, exclude):
+            best, best_distance = None, -1
+            for v, d in enumerate(distances):
+                if d != math.inf and d > best_distance and v not in exclude:
+                    best, best_distance = v, d
+            return best
+
+        landmarks = []
+        from_rows, to_rows = [], []
+        if n:
+            candidate = farthest(shortest_distances(forward, rng.randrange(n)), ())
+            nearest = [math.inf] * n
+            while len(landmarks) < min(k, n):
+                if candidate is None:
+                    candidate = rng.choice([v for v in range(n) if v not in landmarks])
+                landmarks.append(candidate)
+                from_rows.append(shortest_distances(forward, candidate))
+                to_rows.append(shortest_distances(backward, candidate))
+                nearest = list(map(min, nearest, from_rows[-1]))
+                candidate = farthest(nearest, set(landmarks))
+
+        finite = [d for row in from_rows + to_rows for d in row if d != math.inf]
+        typecode = 'i' if not finite or max(finite) < 2 ** 31 else 'q'
+
+        def pack(rows):
+            return array(typecode, [-1 if d == math.inf else d for row in rows for d in row])
+
+        return cls(array('q', graph.node_ids), array('q', landmarks), pack(from_rows), pack(to_rows))
+
+    def __len__(self):
+        return len(self.node_ids)
+
+    def index_of(self, node_id):
+        node_ids = self.node_ids
+        if self.contiguous:
+            i = node_id - node_ids[0] if len(node_ids) else -1
+            if 0 <= i < len(node_ids):
+                return i
+            raise KeyError(node_id)
+        if self.id_index is None:
+            self.id_index = {node_id: i for i, node_id in enumerate(node_ids)}
+        return self.id_index[node_id]
+
+    def lower_bound(self, goals, dense):
+        """Return f(n): the ALT lower bound on the cost from n to its nearest goal.
+
+        dense=True takes CSR indices, otherwise node IDs. A node that provably
+        cannot reach any goal gets inf.
+        """
+        index_of = (lambda node: node) if dense else self.index_of
+        rows = list(zip(self.from_rows, self.to_rows))
+        goal_columns = [
+            [(from_row[t], to_row[t]) for from_row, to_row in rows]
+            for t in map(index_of, goals)
+        ]
+
+        def bound(node):
+            i = index_of(node)
+            columns = [(from_row[i], to_row[i]) for from_row, to_row in rows]
+            best = math.inf
+            for goal_column in goal_columns:
+                estimate = 0
+                for (from_n, to_n), (from_t, to_t) in zip(columns, goal_column):
+                    if from_t >= 0:
+                        if from_n >= 0 and from_t - from_n > estimate:
+                            estimate = from_t - from_n
+                    elif from_n >= 0:
+                        estimate = math.inf  # the landmark reaches n but not t, so n cannot reach t
+                        break
+                    if to_n >= 0:
+                        if to_t >= 0 and to_n - to_t > estimate:
+                            estimate = to_n - to_t
+                    elif to_t >= 0:
+                        estimate = math.inf  # t reaches the landmark but n cannot, so n cannot reach t
+                        break
+                if estimate < best:
+                    best = estimate
+            return best
+        return bound
+
+    def save(self, path, source_key=(0, 0, b'')):
+        """Write the landmark file; source_key is (size, mtime_ns, digest) of the problem file"""
+        source_size, source_mtime_ns, source_digest = source_key
+        header = LANDMARK_HEADER.pack(
+            LANDMARK_MAGIC, LANDMARK_VERSION, sys.byteorder == 'little',
+            len(self.node_ids), len(self.landmarks), self.from_distances.itemsize,
+            source_size, source_mtime_ns, source_digest,
+        )
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(temp_path, 'wb') as file:
+                file.write(header)
+                for a in (self.node_ids, self.landmarks, self.from_distances, self.to_distances):
+                    file.write(a)
+            os.replace(temp_path, path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    @staticmethod
+    def read_header(path):
+        """Header fields of a landmark file as a dict, or None if it is missing or unusable"""
+        try:
+            with open(path, 'rb') as file:
+                raw = file.read(LANDMARK_HEADER.size)
+        except OSError:
+            return None
+        if len(raw) != LANDMARK_HEADER.size:
+            return None
+        (magic, version, little_endian, n, k, itemsize,
+         source_size, source_mtime_ns, source_digest) = LANDMARK_HEADER.unpack(raw)
+        if magic != LANDMARK_MAGIC or version != LANDMARK_VERSION or little_endian != (sys.byteorder == 'little'):
+            return None
+        return {
+            'nodes': n, 'landmarks': k, 'itemsize': itemsize,
+            'source_size': source_size, 'source_mtime_ns': source_mtime_ns,
+            'source_digest': source_digest,
+        }
+
+    @classmethod
+    def load(cls, path):
+        """Memory-map a landmark file written by save()"""
+        header = cls.read_header(path)
+        if header is None:
+            raise ValueError(f"Not a landmark file: {path}")
+        n, k = header['nodes'], header['landmarks']
+        typecode = 'i' if header['itemsize'] == 4 else 'q'
+
+        with open(path, 'rb') as file:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(buffer)
+        position = LANDMARK_HEADER.size
+
+        def take(typecode, count):
+            nonlocal position
+            size = struct.calcsize(typecode) * count
+            if position + size > len(view):
+                raise ValueError(f"Truncated landmark file: {path}")
+            a = view[position:position + size].cast(typecode)
+            position += size
+            return a
+
+        node_ids = take('q', n)
+        landmarks = take('q', k)
+        from_distances = take(typecode, k * n)
+        to_distances = take(typecode, k * n)
+        return cls(node_ids, landmarks, from_distances, to_distances, buffer=buffer)
+
+
+def landmark_path(fname):
+    return fname + LANDMARK_SUFFIX
+
+
+def load_landmarks(fname, k=DEFAULT_LANDMARKS, graph=None, rebuild=False):
+    """LandmarkTable for problem file fname, from its sidecar landmark file.
+
+    A missing file, one built with a different k (capped at the node count, as build
+    does), or one older than the problem file is rebuilt (from graph if it is a CSRGraph,
+    else from a fresh CSR load) and saved; if it cannot be written the built table is
+    still returned.
+    """
+    path = landmark_path(fname)
+    source = os.stat(fname)
+
+    header = None if rebuild else LandmarkTable.read_header(path)
+    if (header and header['landmarks'] == min(k, header['nodes']) and header['source_size'] == source.st_size
+            and header['source_mtime_ns'] == source.st_mtime_ns):
+        return LandmarkTable.load(path)
+
+    if not isinstance(graph, CSRGraph):
+        graph, _stats = load_graph(fname, csr=True)
+    table = LandmarkTable.build(graph, k)
+    try:
+        table.save(path, (source.st_size, source.st_mtime_ns, file_digest(fname)))
+    except OSError:
+        pass
+    return table
@@ -0,0 +1,220 @@
+from array import array
+from operator import itemgetter
+import glob
+import hashlib
+import os
+import time
+
+from graph import CSRGraph, integer_cost_bound
+
+# "1: (4,1)" -> "1   4 1 " and "(2,1): 4" -> " 2 1   4", so one split() yields the fields
+SEPARATORS = bytes.maketrans(b'(),:', b'    ')
+SECTIONS = {b'Nodes:': 'nodes', b'Edges:': 'edges', b'Origin:': 'origin', b'Destinations:': 'destinations'}
+CHUNK_SIZE = 1 << 22
+CACHE_SUFFIX = '.csr'
+
+
+class LoadStats:
+    """Size and timing of one problem-file parse"""
+    def __init__(self, bytes_read, seconds, nodes, edges, cached=False):
+        self.bytes_read = bytes_read
+        self.seconds = seconds
+        self.nodes = nodes
+        self.edges = edges
+        self.cached = cached  # True when mapped from the binary cache instead of parsed
+
+    @property
+    def mb_per_sec(self):
+        return self.bytes_read / (1024 * 1024) / self.seconds if self.seconds else float('inf')
+
+    @property
+    def edges_per_sec(self):
+        return self.edges / self.seconds if self.seconds else float('inf')
+
+    def __str__(self):
+        if self.cached:
+            return f"{self.nodes} nodes, {self.edges} edges mapped from binary cache in {self.seconds * 1000:.2f} ms"
+        return (f"{self.nodes} nodes, {self.edges} edges in {self.seconds * 1000:.2f} ms "
+                f"({self.mb_per_sec:.2f} MB/s, {self.edges_per_sec:.0f} edges/s)")
+
+
+def parse_file(fname, chunk_size=CHUNK_SIZE, hasher=None):
+    """Stream a Nodes/Edges/Origin/Destinations problem file in a single pass.
+
+    The file is read in binary chunks cut at line boundaries; each run of node or
+    edge lines in a chunk is converted with one translate/split/int pass.
+
+    Returns (coords, edge_from, edge_to, edge_costs, origin, destinations, stats)
+    where coords is {node_id: (x, y)} and the edges are parallel arrays in file order.
+    If hasher (a hashlib object) is given it is fed the raw file bytes.
+    """
+    start_time = time.perf_counter()
+
+    coords = {}
+    edge_from = array('q')
+    edge_to = array('q')
+    edge_costs = array('q')
+    origin = None
+    destinations = []
+
+    current_section = None
+    bytes_read = 0
+    carry = b''
+
+    with open(fname, 'rb') as file:
+        while carry is not None:
+            chunk = file.read(chunk_size)
+            bytes_read += len(chunk)
+            if hasher is not None:
+                hasher.update(chunk)
+            if chunk:
+                text = carry + chunk
+                cut = text.rfind(b'\n') + 1
+                text, carry = text[:cut], text[cut:]
+            else:
+                text, carry = carry, None
+
+            for section, body in split_sections(text, current_section):
+                current_section = section
+                if section == 'nodes':
+                    fields = list(map(int, body.translate(SEPARATORS).split()))
+                    check_fields(fields, fname, 'node')
+                    coords.update(zip(fields[0::3], zip(fields[1::3], fields[2::3])))
+                elif section == 'edges':
+                    fields = array('q', map(int, body.translate(SEPARATORS).split()))
+                    check_fields(fields, fname, 'edge')
+                    edge_from.extend(fields[0::3])
+                    edge_to.extend(fields[1::3])
+                    edge_costs.extend(fields[2::3])
+                elif section == 'origin':
+                    for line in body.split():
+                        origin = int(line)
+                elif section == 'destinations':
+                    # Format: "5; 4"
+                    for line in body.splitlines():
+                        if line.strip():
+                            destinations = [int(d) for d in line.split(b';') if d.strip()]
+
+    stats = LoadStats(bytes_read, time.perf_counter() - start_time, len(coords), len(edge_costs))
+    return coords, edge_from, edge_to, edge_costs, origin, destinations, stats
+
+
+def split_sections(text, current_section):
+    """Yield (section, body) runs of a chunk of whole lines, starting in current_section"""
+    pos = 0
+    while True:
+        # Data lines hold only digits and punctuation, so any header word starts a header line
+        found = [(text.find(header, pos), header) for header in SECTIONS]
+        found = [(at, header) for at, header in found if at != -1]
+        if not found:
+            yield current_section, text[pos:]
+            return
+        at, header = min(found)
+        yield current_section, text[pos:at]
+        current_section = SECTIONS[header]
+        pos = at + len(header)
+
+
+def check_fields(fields, fname, kind):
+    if len(fields) % 3:
+        raise ValueError(f"Malformed {kind} line in {fname}")
+
+
+def load_graph(fname, csr=False, cache=False):
+    """Load a problem file as the dict graph used by the GUI and CLI, or as a CSRGraph.
+
+    cache=True returns a CSRGraph through the sidecar binary cache (see load_cached_graph).
+    Returns (graph, stats); stats covers the text parse or the cache mapping only.
+    """
+    if cache:
+        return load_cached_graph(fname)
+
+    coords, edge_from, edge_to, edge_costs, origin, destinations, stats = parse_file(fname)
+
+    if csr:
+        graph = CSRGraph.from_arrays(coords, edge_from, edge_to, edge_costs, origin, destinations)
+        return graph, stats
+
+    adjacency_list = {node_id: [] for node_id in coords}
+    for from_node, to_node, cost in zip(edge_from, edge_to, edge_costs):
+        neighbors = adjacency_list.get(from_node)
+        if neighbors is None:
+            neighbors = adjacency_list[from_node] = []
+        neighbors.append((to_node, cost))
+
+    # Neighbours are expanded in ascending ID order; the sort is stable for duplicate edges
+    by_neighbor = itemgetter(0)
+    for neighbors in adjacency_list.values():
+        if len(neighbors) > 1:
+            neighbors.sort(key=by_neighbor)
+
+    graph = {
+        'nodes': coords,
+        'adjacency_list': adjacency_list,
+        'origin': origin,
+        'destinations': destinations,
+        # Lets CUS1 pick a bucket queue without rescanning the edges (see graph.max_edge_cost)
+        'max_edge_cost': integer_cost_bound(edge_costs),
+        # Structures built on first use (see graph.reverse_adjacency); query_graph copies share the dict
+        'derived': {},
+    }
+    return graph, stats
+
+
+def cache_path(fname):
+    return fname + CACHE_SUFFIX
+
+
+def load_cached_graph(fname, rebuild=False):
+    """CSRGraph for fname, memory-mapped from its sidecar cache file.
+
+    The cache is keyed by the text file's size and mtime (its BLAKE2b digest is
+    stored too, for verify_cache). A missing or stale cache is rebuilt from the
+    text file; if it cannot be written the parsed graph is still returned.
+    """
+    start_time = time.perf_counter()
+    path = cache_path(fname)
+    source = os.stat(fname)
+
+    header = None if rebuild else CSRGraph.read_cache_header(path)
+    if header and header['source_size'] == source.st_size and header['source_mtime_ns'] == source.st_mtime_ns:
+        graph = CSRGraph.load(path)
+        stats = LoadStats(os.path.getsize(path), time.perf_counter() - start_time,
+                          len(graph), graph.edge_count, cached=True)
+        return graph, stats
+
+    hasher = hashlib.blake2b(digest_size=32)
+    coords, edge_from, edge_to, edge_costs, origin, destinations, stats = parse_file(fname, hasher=hasher)
+    graph = CSRGraph.from_arrays(coords, edge_from, edge_to, edge_costs, origin, destinations)
+    try:
+        graph.save(path, (source.st_size, source.st_mtime_ns, hasher.digest()))
+    except OSError:
+        pass
+    return graph, stats
+
+
+def verify_cache(fname):
+    """True if fname's cache exists and was built from exactly the current file contents"""
+    header = CSRGraph.read_cache_header(cache_path(fname))
+    if header is None:
+        return False
+    return header['source_digest'] == file_digest(fname)
+
+
+def file_digest(fname):
+    """BLAKE2b digest of a file's contents, as stored in cache headers"""
+    hasher = hashlib.blake2b(digest_size=32)
+    with open(fname, 'rb') as file:
+        for chunk in iter(lambda: file.read(CHUNK_SIZE), b''):
+            hasher.update(chunk)
+    return hasher.digest()
+
+
+def precompile(directory, pattern='*.txt', force=False):
+    """Build or refresh the binary cache of every problem file in directory.
+
+    Yields (fname, stats) per file; stats.cached is True when the cache was already fresh.
+    """
+    for fname in sorted(glob.glob(os.path.join(directory, pattern))):
+        _graph, stats = load_cached_graph(fname, rebuild=force)
+        yield fname, stats
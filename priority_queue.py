@@ -0,0 +1,227 @@
+from collections import deque
+import heapq
+
+
+class IndexedHeap:
+    """Binary min-heap holding at most one entry per item, with decrease-key.
+
+    Items are node IDs or CSR indices; position maps each queued item to its slot,
+    so a cheaper route updates the existing entry in place instead of pushing a stale
+    duplicate the way a lazy heapq does. Keys are compared as-is, so tuples such as
+    (cost, counter) break ties exactly like the heapq entries they replace.
+    """
+    def __init__(self):
+        self.keys = []
+        self.items = []
+        self.position = {}
+        self.max_size = 0
+
+    def __len__(self):
+        return len(self.items)
+
+    def __bool__(self):
+        return bool(self.items)
+
+    def __contains__(self, item):
+        return item in self.position
+
+    def key_of(self, item):
+        return self.keys[self.position[item]]
+
+    def peek(self):
+        """(key, item) with the smallest key, without removing it"""
+        return self.keys[0], self.items[0]
+
+    def push(self, item, key):
+        """Queue item with key, or lower its key if it is already queued.
+
+        Returns True when item was newly inserted. A key that is not lower than
+        the queued one is ignored.
+        """
+        i = self.position.get(item)
+        if i is not None:
+            if key < self.keys[i]:
+                self.keys[i] = key
+                self._sift_up(i)
+            return False
+
+        self.keys.append(key)
+        self.items.append(item)
+        i = len(self.items) - 1
+        self.position[item] = i
+        if i >= self.max_size:
+            self.max_size = i + 1
+        self._sift_up(i)
+        return True
+
+    decrease_key = push
+
+    def pop(self):
+        """Remove and return (key, item) with the smallest key"""
+        keys, items = self.keys, self.items
+        key, item = keys[0], items[0]
+        del self.position[item]
+
+        last_key, last_item = keys.pop(), items.pop()
+        if items:
+            keys[0], items[0] = last_key, last_item
+            self.position[last_item] = 0
+            self._sift_down(0)
+        return key, item
+
+    def _sift_up(self, i):
+        keys, items, position = self.keys, self.items, self.position
+        key, item = keys[i], items[i]
+        while i > 0:
+            parent = (i - 1) >> 1
+            if not key < keys[parent]:
+                break
+            keys[i], items[i] = keys[parent], items[parent]
+            position[items[i]] = i
+            i = parent
+        keys[i], items[i] = key, item
+        position[item] = i
+
+    def _sift_down(self, i):
+        keys, items, position = self.keys, self.items, self.position
+        size = len(items)
+        key, item = keys[i], items[i]
+        while True:
+            child = 2 * i + 1
+            if child >= size:
+                break
+            if child + 1 < size and keys[child + 1] < keys[child]:
+                child += 1
+            if not keys[child] < key:
+                break
+            keys[i], items[i] = keys[child], items[child]
+            position[items[i]] = i
+            i = child
+        keys[i], items[i] = key, item
+        position[item] = i
+
+
+class LazyHeap:
+    """heapq of (key, item) entries where a lowered key pushes a new entry.
+
+    The push/pop interface matches IndexedHeap's, so searches can switch between them.
+    The old entry stays behind and pop skips it, which holds more entries than the
+    indexed heap but leaves the sifting to heapq's C code and is the faster choice on
+    graphs of modest degree. Keys must be unique, as (cost, counter) tuples are, so
+    items are never compared.
+    """
+    def __init__(self):
+        self.heap = []
+        self.queued = {}  # item -> its live key
+        self.max_size = 0
+
+    def __len__(self):
+        return len(self.queued)
+
+    def __bool__(self):
+        return bool(self.queued)
+
+    def __contains__(self, item):
+        return item in self.queued
+
+    def key_of(self, item):
+        return self.queued[item]
+
+    def push(self, item, key):
+        """Queue item with key, or lower its key if it is already queued; True when newly inserted"""
+        old_key = self.queued.get(item)
+        if old_key is not None and not key < old_key:
+            return False
+        self.queued[item] = key
+        heapq.heappush(self.heap, (key, item))
+        if len(self.heap) > self.max_size:
+            self.max_size = len(self.heap)
+        return old_key is None
+
+    decrease_key = push
+
+    def pop(self):
+        """Remove and return (key, item) with the smallest key"""
+        heap, queued = self.heap, self.queued
+        while True:
+            key, item = heapq.heappop(heap)
+            if queued.get(item) is key:
+                del queued[item]
+                return key, item
+
+
+class BucketQueue:
+    """Dial's bucket queue for keys (cost, counter) where costs are whole numbers.
+
+    Every queued cost lies within max_cost of the smallest one, which holds in Dijkstra
+    when max_cost is the largest edge cost, so max_cost + 1 buckets used cyclically keep
+    each bucket to a single cost. Keys are pushed in counter order, so popping a bucket
+    first in first out gives the same order as a heap on (cost, counter). A lowered key
+    leaves its old entry behind, which is skipped when it comes up. A bucket's deque is
+    only made when a cost first lands in it, so a short search on a wide cost range does
+    not pay for max_cost + 1 of them, and a pop scans at most as many empty buckets as
+    there are queued items before jumping to the smallest queued cost.
+    """
+    def __init__(self, max_cost):
+        self.buckets = [None] * (max_cost + 1)
+        self.queued = {}  # item -> its live key
+        self.current = 0  # bucket of the smallest live cost
+        self.max_size = 0
+
+    def __len__(self):
+        return len(self.queued)
+
+    def __bool__(self):
+        return bool(self.queued)
+
+    def __contains__(self, item):
+        return item in self.queued
+
+    def key_of(self, item):
+        return self.queued[item]
+
+    def push(self, item, key):
+        """Queue item with key, or lower its key if it is already queued; True when newly inserted"""
+        old_key = self.queued.get(item)
+        if old_key is not None and not key < old_key:
+            return False
+        self.queued[item] = key
+        slot = int(key[0]) % len(self.buckets)
+        bucket = self.buckets[slot]
+        if bucket is None:
+            bucket = self.buckets[slot] = deque()
+        bucket.append((key, item))
+        if old_key is not None:
+            return False
+        if len(self.queued) > self.max_size:
+            self.max_size = len(self.queued)
+        return True
+
+    decrease_key = push
+
+    def pop(self):
+        """Remove and return (key, item) with the smallest key"""
+        buckets, queued = self.buckets, self.queued
+        current = self.current
+        size = len(buckets)
+        scanned = 0
+        while True:
+            bucket = buckets[current]
+            while bucket:
+                key, item = bucket.popleft()
+                if queued.get(item) is key:
+                    del queued[item]
+                    self.current = current
+                    return key, item
+            current += 1
+            if current == size:
+                current = 0
+            scanned += 1
+            if scanned > len(queued):
+                # The gap to the next cost is wider than the queue: jump straight to it
+                current = int(min(queued.values())[0]) % size
+                scanned = 0
+
+
+# Heap choices for searches whose keys need not be integers
+HEAPS = {'lazy': LazyHeap, 'heap': IndexedHeap}
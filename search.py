@@ -1,6 +1,12 @@
 import tkinter as tk
 from gui import GUI
-from cli import CLI
+from cli import CLI, MEASURE_MODES, precompile
+from batch import batch
+from server import serve
+from contraction import contract
+from benchmark import bench, heap_benchmark
+from generator import GENERATORS, generate
+import argparse
 import sys
 
 
@@ -11,20 +17,174 @@ if __name__ == "__main__":
         app = GUI(root)
         root.mainloop()
 
+    elif sys.argv[1] == "precompile":
+        # Build binary caches: search.py precompile <directory> [--force]
+        parser = argparse.ArgumentParser(prog="search.py precompile")
+        parser.add_argument("directory")
+        parser.add_argument("--force", action="store_true", help="rebuild caches that are already up to date")
+        parser.add_argument("--landmarks", type=int, metavar="K", help="also build an ALT table with K landmarks per file")
+        args = parser.parse_args(sys.argv[2:])
+
+        precompile(args.directory, force=args.force, landmarks=args.landmarks)
+
+    elif sys.argv[1] == "generate":
+        # Write a synthetic problem file: search.py generate <geometric|grid|road> <output> [options]
+        parser = argparse.ArgumentParser(prog="search.py generate")
+        parser.add_argument("kind", choices=GENERATORS)
+        parser.add_argument("output")
+        parser.add_argument("--nodes", type=int, default=1000, help="number of nodes (default: 1000)")
+        parser.add_argument("--width", type=int, help="grid only: columns (default: about sqrt(nodes))")
+        parser.add_argument("--height", type=int, help="grid only: rows (default: width)")
+        parser.add_argument("--degree", type=int, default=6, help="geometric only: average out-degree (default: 6)")
+        parser.add_argument("--obstacles", type=float, default=0.2, help="grid only: fraction of blocked cells (default: 0.2)")
+        parser.add_argument("--destinations", type=int, default=1)
+        parser.add_argument("--seed", type=int, default=0)
+        args = parser.parse_args(sys.argv[2:])
+
+        try:
+            summary = generate(args.kind, args.output, nodes=args.nodes, width=args.width, height=args.height,
+                               degree=args.degree, obstacles=args.obstacles, destinations=args.destinations,
+                               seed=args.seed)
+        except ValueError as e:
+            raise SystemExit(str(e))
+        print(f"{summary['path']}: {summary['nodes']} nodes, {summary['edges']} edges, "
+              f"origin {summary['origin']}, destinations {summary['destinations']}")
+
+    elif sys.argv[1] == "contract":
+        # Build the contraction hierarchy used by the ch method: search.py contract <filename> [--force]
+        parser = argparse.ArgumentParser(prog="search.py contract")
+        parser.add_argument("filename")
+        parser.add_argument("--force", action="store_true", help="rebuild a hierarchy that is already up to date")
+        args = parser.parse_args(sys.argv[2:])
+
+        contract(args.filename, force=args.force)
+
+    elif sys.argv[1] == "bench":
+        # Time every method over problem files and generated graphs: search.py bench [files...] [options]
+        parser = argparse.ArgumentParser(prog="search.py bench")
+        parser.add_argument("files", nargs="*", help="problem files to benchmark")
+        parser.add_argument("--generate", action="append", default=[], metavar="SPEC",
+                            help="also benchmark a generated graph (repeatable): random:NODES:DEGREE[:SEED] "
+                                 "or geometric, grid or road:NODES[:SEED]")
+        parser.add_argument("--methods", help="comma-separated methods (default: every method)")
+        parser.add_argument("--warmup", type=int, default=1, help="untimed runs before timing (default: 1)")
+        parser.add_argument("--repeat", type=int, default=5, help="timed runs per method (default: 5)")
+        parser.add_argument("--csr", action="store_true")
+        parser.add_argument("--time-limit", type=float, default=10.0, metavar="S",
+                            help="give up on a method after S seconds in one run (default: 10, 0 for none)")
+        parser.add_argument("--preprocess-limit", type=float, default=600.0, metavar="S",
+                            help="give up on ch after S seconds of contraction (default: 600, 0 for none)")
+        parser.add_argument("--json", metavar="PATH", help="write the results as JSON")
+        parser.add_argument("--csv", metavar="PATH", help="write the results as CSV")
+        parser.add_argument("--baseline", metavar="PATH",
+                            help="JSON or CSV from an earlier bench; exits with status 1 on any regression")
+        parser.add_argument("--threshold", type=float, default=0.10,
+                            help="median slowdown counted as a regression (default: 0.10)")
+        args = parser.parse_args(sys.argv[2:])
+        if not args.files and not args.generate:
+            parser.error("give problem files or --generate specs")
+
+        try:
+            regressions = bench(args.files, args.generate, methods=args.methods.split(",") if args.methods else None,
+                                warmup=args.warmup, repeat=args.repeat, csr=args.csr, time_limit=args.time_limit,
+                                preprocess_limit=args.preprocess_limit, json_path=args.json, csv_path=args.csv, baseline=args.baseline, threshold=args.threshold)
+        except ValueError as e:
+            raise SystemExit(str(e))
+        if regressions:
+            sys.exit(1)
+
+    elif sys.argv[1] == "bench-heap":
+        # CUS1 and AS queues against the old lazy heapq code on a dense random graph: search.py bench-heap [options]
+        parser = argparse.ArgumentParser(prog="search.py bench-heap")
+        parser.add_argument("--nodes", type=int, default=20000)
+        parser.add_argument("--degree", type=int, default=32, help="out-edges per node")
+        parser.add_argument("--queries", type=int, default=5)
+        parser.add_argument("--repeat", type=int, default=3, help="runs per query; the median is reported")
+        parser.add_argument("--seed", type=int, default=0)
+        args = parser.parse_args(sys.argv[2:])
+
+        heap_benchmark(args.nodes, args.degree, queries=args.queries, repeat=args.repeat, seed=args.seed)
+
+    elif sys.argv[1] == "batch":
+        # Many queries on one loaded graph: search.py batch <filename> [queries|-] [options]
+        parser = argparse.ArgumentParser(prog="search.py batch")
+        parser.add_argument("filename")
+        parser.add_argument("queries", nargs="?", default="-",
+                            help="file of '<origin> <dest>[;<dest>...] <method>' lines (default: stdin)")
+        parser.add_argument("--workers", type=int, default=1, help="number of worker processes")
+        parser.add_argument("--graph-search", action="store_true")
+        parser.add_argument("--csr", action="store_true")
+        parser.add_argument("--cache", action="store_true")
+        parser.add_argument("--precompute-h", action="store_true")
+        parser.add_argument("--spt-cache", type=float, metavar="MB",
+                            help="keep dijkstra shortest-path trees per origin, up to MB megabytes per process")
+        parser.add_argument("--landmarks", type=int, metavar="K")
+        parser.add_argument("--heuristic", choices=["euclid", "alt", "max"])
+        args = parser.parse_args(sys.argv[2:])
+
+        batch(args.filename, args.queries, workers=args.workers, csr=args.csr, cache=args.cache,
+              graph_search=args.graph_search, precompute_heuristics=args.precompute_h,
+              spt_cache_mb=args.spt_cache, landmarks=args.landmarks, heuristic=args.heuristic)
+
+    elif sys.argv[1] == "serve":
+        # Query daemon: search.py serve <graph>... [--port N | --socket PATH] [options]
+        parser = argparse.ArgumentParser(prog="search.py serve")
+        parser.add_argument("graphs", nargs="+", help="problem files, optionally as name=path")
+        parser.add_argument("--port", type=int, default=8765, help="localhost TCP port (default: 8765)")
+        parser.add_argument("--socket", help="listen on this Unix socket path instead of TCP")
+        parser.add_argument("--workers", type=int, default=1, help="number of worker processes")
+        parser.add_argument("--csr", action="store_true")
+        parser.add_argument("--cache", action="store_true")
+        parser.add_argument("--spt-cache", type=float, metavar="MB",
+                            help="keep dijkstra shortest-path trees per origin, up to MB megabytes per process")
+        args = parser.parse_args(sys.argv[2:])
+
+        serve(args.graphs, port=args.port, socket_path=args.socket, workers=args.workers,
+              csr=args.csr, cache=args.cache, spt_cache_mb=args.spt_cache)
+
     else:
 
         # CLI mode (make sure to enter search.py <filename> <method>)
-        if len(sys.argv) != 3:
-            raise SystemExit("Usage: python search.py <filename> <method>")
-        
-      
-
-        filename = sys.argv[1]
-        method = sys.argv[2]      
+        parser = argparse.ArgumentParser(usage="python search.py <filename> <method> [options]")
+        parser.add_argument("filename")
+        parser.add_argument("method")
+        parser.add_argument("--graph-search", action="store_true",
+                            help="expand each node at most once (bfs, dfs and gbfs only)")
+        parser.add_argument("--csr", action="store_true",
+                            help="load the graph into compact CSR arrays instead of dicts of lists")
+        parser.add_argument("--cache", action="store_true",
+                            help="load through the binary sidecar cache (implies --csr), building it if stale")
+        parser.add_argument("--precompute-h", action="store_true",
+                            help="compute the heuristic for every node before searching (gbfs, astar and idastar only)")
+        parser.add_argument("--landmarks", type=int, metavar="K",
+                            help="use an ALT table with K landmarks (astar and idastar only), built beside the file if stale")
+        parser.add_argument("--heuristic", choices=["euclid", "alt", "max"],
+                            help="straight-line, ALT or the larger of both (default: max with --landmarks, else euclid)")
+        parser.add_argument("--tt-size", type=int, default=0, metavar="N",
+                            help="idastar only: prune repeated arrivals with a transposition table of up to N nodes")
+        parser.add_argument("--bound-policy", choices=["exact", "exponential", "cr"], default="exact",
+                            help="idastar only: grow the bound to the next f-cost (exact), by --bound-growth (exponential), "
+                                 "or to admit about --bound-growth times the nodes (cr); inexact policies finish "
+                                 "with a pass that keeps the path optimal")
+        parser.add_argument("--bound-growth", type=float, default=2.0, metavar="F",
+                            help="growth factor for --bound-policy exponential and cr (default: 2)")
+        parser.add_argument("--measure", choices=MEASURE_MODES, default="default",
+                            help="default: memory and execution time of one run each; time: wall and CPU time "
+                                 "over --repeat runs; memory: tracemalloc; profile: cProfile")
+        parser.add_argument("--repeat", type=int, default=1, help="timed runs for --measure time (default: 1)")
+        parser.add_argument("--warmup", type=int, default=0, help="untimed runs before timing (default: 0)")
+        parser.add_argument("--profile-out", metavar="PATH", help="with --measure profile, dump the full cProfile stats here")
+        parser.add_argument("--json", action="store_true", help="print the result and measurements as one JSON object")
+        parser.add_argument("--stats", action="store_true",
+                            help="also report search counters (expansions, pushes, stale pops, ...) from one extra run")
+        args = parser.parse_args()
 
-        cli = CLI(filename, method)
-        cli.search()
+        cli = CLI(args.filename, args.method, graph_search=args.graph_search, csr=args.csr, cache=args.cache,
+                  precompute_heuristics=args.precompute_h, landmarks=args.landmarks, heuristic=args.heuristic,
+                  transposition_size=args.tt_size, bound_policy=args.bound_policy, bound_growth=args.bound_growth)
+        cli.search(measure=args.measure, repeat=args.repeat, warmup=args.warmup, profile_out=args.profile_out,
+                   json_output=args.json, stats=args.stats)
 
        
 
-    
\ No newline at end of file
+    
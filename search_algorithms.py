@@ -1,14 +1,285 @@
+from contextlib import contextmanager, nullcontext
+import json
+import time
+
+
+# Kinds of SearchEvent, see its docstring
+EVENT_KINDS = ('expand', 'generate', 'prune', 'bound', 'goal')
+
+
+class SearchEvent:
+    """One step of an observed search, as yielded by SearchAlgorithms.events().
+
+    entry numbers a node's place in the search tree (a node reached by two routes gets
+    two entries) and parent is the entry it was generated from, None for a root, so a
+    consumer can rebuild paths and the frontier without the search building them:
+      generate - entry joins the frontier, with g and h where the search has them
+      expand   - entry leaves the frontier and its children are generated next
+      prune    - entry leaves the frontier unexpanded (stale, superseded or over the bound)
+      bound    - IDA* starts an iteration under bound; earlier entries are discarded
+      goal     - the search stops at goal node; path is the solution, and entry its last
+                 entry unless the path joins two trees (bidirectional searches)
+    """
+    __slots__ = ('kind', 'node', 'entry', 'parent', 'g', 'h', 'bound', 'path')
+
+    def __init__(self, kind, node=None, entry=None, parent=None, g=None, h=None, bound=None, path=None):
+        self.kind = kind
+        self.node = node
+        self.entry = entry
+        self.parent = parent
+        self.g = g
+        self.h = h
+        self.bound = bound
+        self.path = path
+
+    def __repr__(self):
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__[1:]
+                           if getattr(self, name) is not None)
+        return f"SearchEvent({self.kind!r}, {fields})"
+
+
+class Frontier:
+    """Counted multiset of the nodes waiting in a search's queue/stack/heap, for
+    event consumers that follow the frontier (add on generate, remove on the rest).
+
+    add and remove are O(1); the ordered list is only built when snapshot() is called.
+    """
+    def __init__(self, nodes=()):
+        self.counts = {}
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node):
+        self.counts[node] = self.counts.get(node, 0) + 1
+
+    def remove(self, node):
+        count = self.counts.get(node, 0)
+        if count <= 1:
+            self.counts.pop(node, None)
+        else:
+            self.counts[node] = count - 1
+
+    def clear(self):
+        self.counts.clear()
+
+    def snapshot(self):
+        """Distinct frontier nodes in the order they first entered the frontier"""
+        return list(self.counts)
+
+    def __contains__(self, node):
+        return node in self.counts
+
+    def __len__(self):
+        return len(self.counts)
+
+
+class TreePath:
+    """The nodes on the path from the root to one search tree entry, for O(1) cycle checks.
+
+    move_to() only walks the tree edges between the previous entry and the new one,
+    unwinding like DFS's path on backtrack, so moving to a child or a sibling is O(1)
+    instead of rebuilding the set from every ancestor.
+    """
+    def __init__(self, tree_nodes, tree_parents, tree_depths):
+        self.tree_nodes = tree_nodes
+        self.tree_parents = tree_parents
+        self.tree_depths = tree_depths
+        self.entries = []  # tree indices from the root to the current entry
+        self.nodes = set()
+
+    def move_to(self, index):
+        """Make index the current entry; returns the set of nodes on its path"""
+        entries = self.entries
+        depths = self.tree_depths
+        # Climb from index to the deepest entry it shares with the current path
+        branch = []
+        while index != -1 and (depths[index] >= len(entries) or entries[depths[index]] != index):
+            branch.append(index)
+            index = self.tree_parents[index]
+        keep = 0 if index == -1 else depths[index] + 1
+        while len(entries) > keep:
+            self.nodes.discard(self.tree_nodes[entries.pop()])
+        for index in reversed(branch):
+            entries.append(index)
+            self.nodes.add(self.tree_nodes[index])
+        return self.nodes
+
+
+class SearchStats:
+    """Counters and phase timings for one search, collected only after enable_stats().
+
+    generations counts frontier insertions (pushes) after the roots the search starts
+    with; expansions are pops that were neither stale nor the goal; max_depth is the deepest generated node in edges
+    from the origin. Phase timings are in milliseconds.
+    """
+    COUNTERS = ('expansions', 'generations', 'pushes', 'pops', 'stale_pops',
+                'heuristic_evaluations', 'max_frontier', 'max_depth')
+
+    def __init__(self):
+        for counter in self.COUNTERS:
+            setattr(self, counter, 0)
+        self.phases = {}
+
+    @contextmanager
+    def phase(self, name):
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + (time.perf_counter() - start_time) * 1000
+
+    def as_dict(self):
+        stats = {counter: getattr(self, counter) for counter in self.COUNTERS}
+        stats['phases_ms'] = dict(self.phases)
+        return stats
+
+    def to_json(self):
+        return json.dumps(self.as_dict())
+
+
 class SearchAlgorithms:
     def __init__(self, graph):
         self.graph = graph
         self.start = graph['origin']
         self.goals = set(graph['destinations'])
         self.coords = graph['nodes']
-        self.frontier = [self.start]  # Initialize frontier with start node
+        # [number_of_nodes, path, goal] of the last search run through events()
+        self.result = None
 
+        # SearchStats when enable_stats() was called. The observe_* helpers hand back the
+        # plain queue operations and heuristic while it is None, so the search loops pay
+        # nothing for the counters unless they are wanted
+        self.search_stats = None
 
-    def search(self):
+
+    def steps(self, observe):
+        """The search as a generator returning [number_of_nodes, path, goal].
+
+        It yields SearchEvents only when observe is true; every yield sits behind an
+        `if observe`, so unobserved it runs straight through without building any.
+        """
         raise NotImplementedError("This method should be overridden by subclasses.")
-    
 
- 
+    def search(self):
+        """Run the search unobserved; returns [number_of_nodes, path, goal]"""
+        steps = self.steps(False)
+        try:
+            next(steps)
+        except StopIteration as finished:
+            return finished.value
+        raise RuntimeError(f"{type(self).__name__}.steps yielded an event while unobserved")
+
+    def events(self):
+        """Run the search lazily as a generator of SearchEvents.
+
+        Its return value, also kept in self.result, is the search() result.
+        """
+        self.result = yield from self.steps(True)
+        return self.result
+
+    def enable_stats(self):
+        """Collect SearchStats on the following searches; returns the (reset) stats object"""
+        self.search_stats = SearchStats()
+        return self.search_stats
+
+    def stats_phase(self, name):
+        """Context manager timing a phase of the search when stats are enabled"""
+        if self.search_stats is None:
+            return nullcontext()
+        return self.search_stats.phase(name)
+
+    def observe_queue(self, push, pop, size, stale=None, depth=None):
+        """(push, pop) for a frontier, wrapped to count into search_stats when it is enabled.
+
+        size() is the frontier's length; stale(item) tells whether a popped item will be
+        skipped, and depth(item) the depth of a pushed item, when the search has them.
+        """
+        stats = self.search_stats
+        if stats is None:
+            return push, pop
+
+        def counted_push(*args):
+            stats.pushes += 1
+            stats.generations += 1
+            result = push(*args)
+            length = size()
+            if length > stats.max_frontier:
+                stats.max_frontier = length
+            if depth is not None and depth(args[-1]) > stats.max_depth:
+                stats.max_depth = depth(args[-1])
+            return result
+
+        def counted_pop(*args):
+            stats.pops += 1
+            item = pop(*args)
+            if stale is not None and stale(item):
+                stats.stale_pops += 1
+            return item
+
+        return counted_push, counted_pop
+
+    def observe_heuristic(self, h):
+        """h, wrapped to count evaluations into search_stats when it is enabled"""
+        stats = self.search_stats
+        if stats is None:
+            return h
+
+        def counted_h(node):
+            stats.heuristic_evaluations += 1
+            return h(node)
+        return counted_h
+
+    def finish_stats(self, result, goal_popped=None, tree_parents=None, parents=()):
+        """Complete search_stats from the final search state and return result unchanged.
+
+        goal_popped defaults to whether result has a path; tree_parents (parallel parent
+        index array) or parents (node -> parent maps) give max_depth for searches that do
+        not report depths as they push.
+        """
+        stats = self.search_stats
+        if stats is None:
+            return result
+        if goal_popped is None:
+            goal_popped = result[1] is not None
+        stats.expansions = stats.pops - stats.stale_pops - (1 if goal_popped else 0)
+
+        if tree_parents is not None:
+            # Parents always precede their children in the arrays
+            depths = []
+            for parent_index in tree_parents:
+                depths.append(0 if parent_index == -1 else depths[parent_index] + 1)
+            stats.max_depth = max(stats.max_depth, max(depths, default=0))
+        for parent in parents:
+            depths = {}
+            for node in parent:
+                chain = []
+                while node is not None and node not in depths:
+                    chain.append(node)
+                    node = parent[node]
+                depth = -1 if node is None else depths[node]
+                for node in reversed(chain):
+                    depth += 1
+                    depths[node] = depth
+            stats.max_depth = max(stats.max_depth, max(depths.values(), default=0))
+        return result
+
+    def trace_path(self, parent, node):
+        """Rebuild the path to node from a node -> parent map (start maps to None)"""
+        path = []
+        while node is not None:
+            path.append(node)
+            node = parent[node]
+        path.reverse()
+        return path
+
+    def trace_tree_path(self, tree_nodes, tree_parents, index):
+        """Rebuild the path to a search tree entry from parallel node/parent-index arrays"""
+        path = []
+        while index != -1:
+            path.append(tree_nodes[index])
+            index = tree_parents[index]
+        path.reverse()
+        return path
+
+
+
@@ -0,0 +1,286 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+
+from batch import make_tree_cache, run_query
+from contraction import load_hierarchy
+from loader import load_graph
+
+
+class ServerStats:
+    """Request counters and latency figures, shared by all connection threads"""
+    def __init__(self, window=1000):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.by_method = {}
+        self.latencies = deque(maxlen=window)  # most recent search latencies in ms
+
+    def begin(self):
+        with self.lock:
+            self.in_flight += 1
+
+    def end(self, method, latency_ms, error):
+        with self.lock:
+            self.in_flight -= 1
+            self.requests += 1
+            self.errors += bool(error)
+            self.latencies.append(latency_ms)
+            count, total, worst = self.by_method.get(method, (0, 0.0, 0.0))
+            self.by_method[method] = (count + 1, total + latency_ms, max(worst, latency_ms))
+
+    def snapshot(self):
+        with self.lock:
+            ordered = sorted(self.latencies)
+
+            def percentile(p):
+                return ordered[min(len(ordered) - 1, int(p * len(ordered)))] if ordered else None
+
+            return {
+                'uptime_s': round(time.time() - self.started, 3),
+                'requests': self.requests,
+                'errors': self.errors,
+                'in_flight': self.in_flight,
+                'p50_ms': percentile(0.50),
+                'p95_ms': percentile(0.95),
+                'methods': {
+                    method: {'count': count, 'mean_ms': total / count, 'max_ms': worst}
+                    for method, (count, total, worst) in self.by_method.items()
+                },
+            }
+
+
+# Per-process state for the worker pool: each worker holds its own copy of every graph,
+# and maps a graph's contraction hierarchy on its first ch query
+worker_files = {}
+worker_graphs = {}
+worker_hierarchies = {}
+worker_tree_cache = None
+
+
+def init_worker(graph_files, csr, cache, spt_cache_mb=None):
+    global worker_tree_cache
+    worker_files.update(graph_files)
+    for name, path in graph_files.items():
+        worker_graphs[name], _stats = load_graph(path, csr=csr, cache=cache)
+    worker_tree_cache = make_tree_cache(spt_cache_mb)
+
+
+def worker_ready():
+    return len(worker_graphs)
+
+
+def run_worker_query(name, query, options):
+    hierarchy = None
+    if query[2] == 'ch':
+        hierarchy = worker_hierarchies.get(name)
+        if hierarchy is None:
+            hierarchy = worker_hierarchies[name] = load_hierarchy(worker_files[name], worker_graphs[name])
+    return run_query(worker_graphs[name], query, tree_cache=worker_tree_cache, hierarchy=hierarchy, **options)
+
+
+class QueryService:
+    """Keeps graphs hot in memory and answers JSON search requests against them.
+
+    With workers > 1 searches run in a process pool whose workers each load every
+    graph; otherwise they run in the calling thread. A graph's contraction hierarchy is
+    loaded (or built into its sidecar file) on its first ch request and kept until the
+    graph is reloaded, so graphs nobody queries with ch are never contracted.
+    A reload loads the new graphs (or starts a new pool) first and then swaps it in, so
+    requests never wait on a load.
+    spt_cache_mb keeps up to that many megabytes of dijkstra shortest-path trees per
+    process; a reload starts from an empty cache.
+    """
+    def __init__(self, graph_files, workers=1, csr=False, cache=False, spt_cache_mb=None):
+        self.graph_files = dict(graph_files)
+        self.workers = workers
+        self.csr = csr
+        self.cache = cache
+        self.spt_cache_mb = spt_cache_mb
+        self.stats = ServerStats()
+        self.lock = threading.Lock()
+        self.graphs = {}
+        # name -> (graph, its hierarchy); hierarchy_lock keeps concurrent ch requests from contracting twice
+        self.hierarchies = {}
+        self.hierarchy_lock = threading.Lock()
+        self.tree_cache = None
+        self.executor = None
+        self.reload()
+
+    def reload(self, name=None):
+        """Reload one graph (or all of them) from disk and swap it in"""
+        if name is not None and name not in self.graph_files:
+            raise ValueError(f"Unknown graph: {name}")
+
+        if self.workers > 1:
+            executor = ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker,
+                                           initargs=(self.graph_files, self.csr, self.cache, self.spt_cache_mb))
+            # Start the workers and let them load before the pool takes traffic
+            for future in [executor.submit(worker_ready) for _ in range(self.workers)]:
+                future.result()
+            with self.lock:
+                executor, self.executor = self.executor, executor
+            if executor is not None:
+                # Requests already submitted to the old pool still complete
+                executor.shutdown(wait=False)
+            return
+
+        names = self.graph_files if name is None else [name]
+        loaded = {n: load_graph(self.graph_files[n], csr=self.csr, cache=self.cache)[0] for n in names}
+        with self.lock:
+            self.graphs = dict(self.graphs, **loaded)
+            self.tree_cache = make_tree_cache(self.spt_cache_mb)
+
+    def search(self, request):
+        name = request.get('graph')
+        if name is None and len(self.graph_files) == 1:
+            name = next(iter(self.graph_files))
+        if name not in self.graph_files:
+            raise ValueError(f"Unknown graph: {name}")
+
+        destinations = request.get('destinations', [])
+        if not isinstance(destinations, list):
+            destinations = [destinations]
+        query = (request['origin'], destinations, request['method'])
+        options = {
+            'graph_search': bool(request.get('graph_search', False)),
+            'precompute_heuristics': bool(request.get('precompute_h', False)),
+        }
+
+        with self.lock:
+            executor, graph, tree_cache = self.executor, self.graphs.get(name), self.tree_cache
+        if executor is not None:
+            return executor.submit(run_worker_query, name, query, options).result()
+        hierarchy = self.hierarchy(name, graph) if query[2] == 'ch' else None
+        # Connection threads share tree_cache, which locks only its own lookups and inserts
+        return run_query(graph, query, tree_cache=tree_cache, hierarchy=hierarchy, **options)
+
+    def hierarchy(self, name, graph):
+        """Contraction hierarchy of the loaded graph name, loaded on first use"""
+        with self.hierarchy_lock:
+            cached = self.hierarchies.get(name)
+            # A reload swaps in a new graph object, whose hierarchy may differ
+            if cached is None or cached[0] is not graph:
+                cached = self.hierarchies[name] = (graph, load_hierarchy(self.graph_files[name], graph))
+            return cached[1]
+
+    def handle(self, request):
+        """Answer one decoded request dict; never raises"""
+        op = request.get('op', 'search')
+        start_time = time.perf_counter()
+        self.stats.begin()
+        response = None
+        try:
+            if op == 'search':
+                response = self.search(request)
+            elif op == 'stats':
+                response = self.stats.snapshot()
+            elif op == 'graphs':
+                response = {'graphs': self.graph_files}
+            elif op == 'reload':
+                self.reload(request.get('graph'))
+                response = {'reloaded': request.get('graph') or sorted(self.graph_files)}
+            else:
+                response = {'error': f"Unknown op: {op}"}
+        except (KeyError, TypeError, ValueError) as e:
+            response = {'error': f"Bad request: {e}"}
+        except Exception as e:
+            response = {'error': f"{type(e).__name__}: {e}"}
+        finally:
+            latency_ms = (time.perf_counter() - start_time) * 1000
+            error = response is None or 'error' in response
+            self.stats.end(str(request.get('method')) if op == 'search' else op, latency_ms, error)
+
+        response['latency_ms'] = round(latency_ms, 3)
+        return response
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    """Newline-delimited JSON: one request object per line, one response line back"""
+    def handle(self):
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("request must be a JSON object")
+            except ValueError as e:
+                response = {'error': f"Bad request: {e}"}
+            else:
+                response = self.server.service.handle(request)
+            self.wfile.write((json.dumps(response) + '\n').encode())
+            self.wfile.flush()
+
+
+class TCPQueryServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, 'ThreadingUnixStreamServer'):
+    class UnixQueryServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+
+
+def make_server(service, port=None, socket_path=None):
+    """Bind a threaded server for service on localhost:port or on a Unix socket path"""
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = UnixQueryServer(socket_path, RequestHandler)
+    else:
+        server = TCPQueryServer(('127.0.0.1', port or 0), RequestHandler)
+    server.service = service
+    return server
+
+
+def send_request(address, request):
+    """Send one request to a running server; address is a (host, port) tuple or a socket path"""
+    family = socket.AF_UNIX if isinstance(address, str) else socket.AF_INET
+    with socket.socket(family, socket.SOCK_STREAM) as connection:
+        connection.connect(address)
+        connection.sendall((json.dumps(request) + '\n').encode())
+        with connection.makefile('rb') as reply:
+            return json.loads(reply.readline())
+
+
+def parse_graph_specs(specs):
+    """'path' or 'name=path' arguments -> {name: path}; the default name is the file's base name"""
+    graph_files = {}
+    for spec in specs:
+        name, sep, path = spec.partition('=')
+        if not sep:
+            path = spec
+            name = os.path.splitext(os.path.basename(spec))[0]
+        graph_files[name] = path
+    return graph_files
+
+
+def serve(specs, port=None, socket_path=None, workers=1, csr=False, cache=False, spt_cache_mb=None):
+    """CLI serve mode: load the graphs and answer requests until interrupted"""
+    service = QueryService(parse_graph_specs(specs), workers=workers, csr=csr, cache=cache,
+                           spt_cache_mb=spt_cache_mb)
+    server = make_server(service, port=port, socket_path=socket_path)
+    where = socket_path or "%s:%d" % server.server_address[:2]
+    print(f"Serving {', '.join(sorted(service.graph_files))} on {where} ({workers} worker(s))", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        if socket_path and os.path.exists(socket_path):
+            os.remove(socket_path)
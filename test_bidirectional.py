@@ -0,0 +1,34 @@
+import pytest
+
+from bidirectional import BiAS, BiDijkstra
+from conftest import assert_same_cost, random_queries
+from dijkstra import CUS1
+from graph import reverse_adjacency
+from loader import load_graph
+
+
+@pytest.mark.parametrize('csr', [False, True], ids=['dict', 'csr'])
+@pytest.mark.parametrize('algorithm', [BiDijkstra, BiAS])
+def test_bidirectional_paths_are_optimal(problem_file, algorithm, csr):
+    graph, _stats = load_graph(problem_file, csr=csr)
+    for query in random_queries(graph):
+        assert_same_cost(query, algorithm(query).search(), CUS1(query).search())
+
+
+def test_origin_among_destinations_is_a_zero_cost_path(problem_file):
+    graph, _stats = load_graph(problem_file)
+    origin = graph['origin']
+    query = dict(graph, destinations=[origin])
+    for algorithm in (BiDijkstra, BiAS):
+        assert algorithm(query).search()[1:] == [[origin], origin]
+
+
+def test_reverse_adjacency_is_built_once_on_first_use(problem_file):
+    graph, _stats = load_graph(problem_file)
+    assert graph['derived'] == {}
+    first, second = random_queries(graph, count=2)
+    BiDijkstra(first).search()
+    reverse = graph['derived']['reverse_adjacency_list']
+    assert reverse_adjacency(second) is reverse
+    assert sorted((u, v, c) for v, edges in reverse.items() for u, c in edges) == \
+        sorted((u, v, c) for u, edges in graph['adjacency_list'].items() for v, c in edges)
@@ -0,0 +1,45 @@
+import os
+
+import pytest
+
+from conftest import assert_same_cost, random_queries
+from contraction import CH, ContractionHierarchy, hierarchy_path, load_hierarchy
+from dijkstra import CUS1
+from generator import generate
+from loader import load_graph
+
+
+@pytest.mark.parametrize('csr', [False, True], ids=['dict', 'csr'])
+def test_ch_paths_are_optimal(problem_file, csr):
+    graph, _stats = load_graph(problem_file, csr=csr)
+    hierarchy = ContractionHierarchy.build(graph)
+    for query in random_queries(graph):
+        assert_same_cost(query, CH(query, hierarchy=hierarchy).search(), CUS1(query).search())
+
+
+def test_loaded_hierarchy_answers_like_a_built_one(problem_file):
+    graph, _stats = load_graph(problem_file, csr=True)
+    built = load_hierarchy(problem_file, graph)
+    loaded = load_hierarchy(problem_file, graph)
+    assert built.buffer is None and loaded.buffer is not None
+    for query in random_queries(graph):
+        assert CH(query, hierarchy=loaded).search() == CH(query, hierarchy=built).search()
+
+
+def test_hierarchy_file_is_rebuilt_when_stale(tmp_path):
+    fname = str(tmp_path / 'road.txt')
+    generate('road', fname, nodes=100, seed=0)
+    load_hierarchy(fname)
+    assert os.path.exists(hierarchy_path(fname))
+
+    before = os.stat(fname).st_mtime_ns
+    generate('road', fname, nodes=100, seed=1)
+    os.utime(fname, ns=(before + 10 ** 9, before + 10 ** 9))
+    hierarchy = load_hierarchy(fname)
+    assert hierarchy.buffer is None
+
+    # The rebuilt hierarchy answers for the new edges, not the old ones
+    graph, _stats = load_graph(fname)
+    for query in random_queries(graph):
+        assert_same_cost(query, CH(query, hierarchy=hierarchy).search(), CUS1(query).search())
+    assert load_hierarchy(fname).buffer is not None
@@ -0,0 +1,47 @@
+import random
+
+import pytest
+
+from batch import query_graph
+from benchmark import dense_graph
+from dijkstra import CUS1, QUEUES, ShortestPathTreeCache
+from loader import load_graph
+
+
+def queries(graph, count=20):
+    nodes = sorted(graph['nodes'])
+    return [(nodes[i * 7 % len(nodes)], nodes[i * 13 % len(nodes)]) for i in range(count)]
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_every_queue_gives_the_same_result(seed):
+    graph = dense_graph(120, 4, seed)
+    for origin, destination in queries(graph):
+        query = dict(graph, origin=origin, destinations=[destination])
+        results = {queue: CUS1(query, queue=queue).search() for queue in QUEUES}
+        assert len({repr(result) for result in results.values()}) == 1, results
+
+
+def test_bucket_queue_needs_integer_costs():
+    graph = dense_graph(20, 3)
+    graph['adjacency_list'][1] = [(neighbor, cost + 0.5) for neighbor, cost in graph['adjacency_list'][1]]
+    graph['max_edge_cost'] = None
+    with pytest.raises(ValueError):
+        CUS1(graph, queue='buckets').search()
+    with pytest.raises(ValueError):
+        CUS1(graph, queue='fibonacci')
+
+
+
+@pytest.mark.parametrize('csr', [False, True], ids=['dict', 'csr'])
+def test_tree_cache_answers_like_a_search(problem_file, csr):
+    graph, _stats = load_graph(problem_file, csr=csr)
+    node_ids = sorted(load_graph(problem_file)[0]['nodes'])
+    rng = random.Random(0)
+    origin = rng.choice(node_ids)
+    cache = ShortestPathTreeCache()
+    # One origin, so every query after the first is answered from the cached tree
+    for _ in range(30):
+        query = query_graph(graph, origin, rng.sample(node_ids, rng.randint(1, 3)))
+        assert CUS1(query, tree_cache=cache).search() == CUS1(query).search()
+    assert (cache.misses, cache.hits) == (1, 29)
@@ -0,0 +1,98 @@
+import math
+
+import pytest
+
+from conftest import random_queries
+from dijkstra import CUS1
+from generator import generate
+from idastar import CUS2
+from loader import load_graph
+from utils import make_heuristics
+
+
+def recursive_idastar(graph):
+    """The recursive IDA* CUS2 replaced, as the reference for its visiting order and node counts"""
+    goals = set(graph['destinations'])
+    h = make_heuristics(graph['nodes'], goals)
+    generated = 1
+
+    def iterate(node, g, bound, path):
+        nonlocal generated
+        f = g + h(node)
+        if node in goals:
+            return True, node, path
+        if f > bound:
+            return f, None, None
+        children = [(neighbor, cost) for neighbor, cost in graph['adjacency_list'][node] if neighbor not in path]
+        generated += len(children)
+        min_excess = math.inf
+        for neighbor, cost in children:
+            result, goal, goal_path = iterate(neighbor, g + cost, bound, path + [neighbor])
+            if result is True:
+                return True, goal, goal_path
+            min_excess = min(min_excess, result)
+        return min_excess, None, None
+
+    start = graph['origin']
+    bound = h(start)
+    if start in goals:
+        return [generated, [start], start]
+    while True:
+        if generated != 1:
+            generated += 1
+        outcome, goal, path = iterate(start, 0.0, bound, [start])
+        if outcome is True:
+            return [generated, path, goal]
+        if outcome == math.inf:
+            return [generated, None, None]
+        bound = outcome
+
+
+@pytest.fixture(params=[('geometric', 3), ('road', 4)], ids=['geometric', 'road'])
+def small_graph(request, tmp_path):
+    kind, seed = request.param
+    fname = str(tmp_path / f'{kind}.txt')
+    generate(kind, fname, nodes=40, seed=seed)
+    return load_graph(fname)[0]
+
+
+def test_matches_the_recursive_search(small_graph):
+    for query in random_queries(small_graph, count=10):
+        assert CUS2(query).search() == recursive_idastar(query)
+
+
+def test_equal_cost_paths_resolve_to_the_lower_neighbour():
+    coords = {node: (0, 0) for node in range(1, 5)}
+    adjacency_list = {1: [(2, 1), (3, 1)], 2: [(4, 1)], 3: [(4, 1)], 4: []}
+    graph = {'nodes': coords, 'adjacency_list': adjacency_list, 'origin': 1, 'destinations': [4]}
+
+    # 1-2-4 and 1-3-4 both cost 2; the first neighbour's subtree is searched first
+    assert CUS2(graph).search() == recursive_idastar(graph)
+    assert CUS2(graph).search()[1] == [1, 2, 4]
+    graph['adjacency_list'][1] = [(3, 1), (2, 1)]
+    assert CUS2(graph).search()[1] == [1, 3, 4]
+
+def test_repeated_runs_start_from_fresh_counters(small_graph):
+    for query in random_queries(small_graph, count=3):
+        searcher = CUS2(query, bound_policy='cr')
+        first = (searcher.search(), dict(searcher.stats))
+        assert (searcher.search(), searcher.stats) == first
+
+
+def test_depth_counters_are_in_edges_like_other_methods():
+    coords = {node: (0, 0) for node in range(1, 6)}
+    # A chain 1-2-3-4 to the goal, with a dead end 5 hanging off 4's parent
+    adjacency_list = {1: [(2, 1)], 2: [(3, 1)], 3: [(4, 1), (5, 1)], 4: [], 5: []}
+    graph = {'nodes': coords, 'adjacency_list': adjacency_list, 'origin': 1, 'destinations': [4]}
+
+    searcher = CUS2(graph)
+    stats = searcher.enable_stats()
+    searcher.search()
+    dijkstra = CUS1(graph)
+    dijkstra_stats = dijkstra.enable_stats()
+    dijkstra.search()
+
+    # Nodes 1-3 are expanded and 4 and 5 generated, three edges from the start
+    assert searcher.stats['max_depth'] == 2
+    assert stats.max_depth == dijkstra_stats.max_depth == 3
+    assert stats.max_frontier == 3
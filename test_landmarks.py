@@ -0,0 +1,59 @@
+import os
+import shutil
+
+import pytest
+
+from astar import AS
+from conftest import assert_same_cost, random_queries
+from dijkstra import CUS1
+from generator import generate
+from landmarks import LandmarkTable, landmark_path, load_landmarks, shortest_distances
+from loader import load_graph
+
+
+def test_alt_bound_never_overestimates(problem_file):
+    graph, _stats = load_graph(problem_file, csr=True)
+    table = LandmarkTable.build(graph, k=4)
+    for goal in range(0, len(graph), 17):
+        distances = shortest_distances(graph['reverse_adjacency_list'], goal)
+        bound = table.lower_bound([goal], dense=True)
+        for node, distance in enumerate(distances):
+            assert bound(node) <= distance
+
+
+@pytest.mark.parametrize('euclidean', [True, False], ids=['max', 'alt-only'])
+@pytest.mark.parametrize('csr', [False, True], ids=['dict', 'csr'])
+def test_astar_with_landmarks_is_optimal(problem_file, csr, euclidean):
+    graph, _stats = load_graph(problem_file, csr=csr)
+    table = LandmarkTable.build(load_graph(problem_file, csr=True)[0], k=4)
+    for query in random_queries(graph):
+        result = AS(query, landmarks=table, euclidean=euclidean).search()
+        assert_same_cost(query, result, CUS1(query).search())
+
+
+def test_landmark_file_is_rebuilt_when_stale(tmp_path):
+    fname = str(tmp_path / 'road.txt')
+    generate('road', fname, nodes=100, seed=0)
+    table = load_landmarks(fname, k=4)
+    assert os.path.exists(landmark_path(fname)) and table.buffer is None
+
+    # A fresh file is mapped rather than rebuilt; a different k rebuilds it
+    assert load_landmarks(fname, k=4).buffer is not None
+    assert len(load_landmarks(fname, k=3).landmarks) == 3
+
+    # Rewriting the problem file invalidates the table even at the same size
+    before = os.stat(fname).st_mtime_ns
+    generate('road', fname, nodes=100, seed=1)
+    os.utime(fname, ns=(before + 10 ** 9, before + 10 ** 9))
+    table = load_landmarks(fname, k=3)
+    assert table.buffer is None
+    fresh = LandmarkTable.build(load_graph(fname, csr=True)[0], k=3)
+    assert list(table.from_distances) == list(fresh.from_distances)
+    assert list(table.to_distances) == list(fresh.to_distances)
+
+
+def test_landmark_file_with_fewer_nodes_than_k_is_reused(tmp_path):
+    fname = str(tmp_path / 'PathFinder-test.txt')
+    shutil.copy(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'PathFinder-test.txt'), fname)
+    assert len(load_landmarks(fname).landmarks) == 6
+    assert load_landmarks(fname).buffer is not None
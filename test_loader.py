@@ -0,0 +1,74 @@
+import os
+import shutil
+
+import pytest
+
+from loader import cache_path, load_graph, precompile, verify_cache
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture
+def problem(tmp_path):
+    fname = str(tmp_path / 'PathFinder-test.txt')
+    shutil.copy(os.path.join(HERE, 'PathFinder-test.txt'), fname)
+    return fname
+
+
+def edges(graph):
+    return [(u, list(graph['adjacency_list'][u])) for u in range(len(graph))]
+
+
+def rewrite(fname, old, new):
+    """Replace text in fname and move its mtime forward, as an edit a second later would"""
+    before = os.stat(fname).st_mtime_ns
+    with open(fname) as file:
+        text = file.read()
+    with open(fname, 'w') as file:
+        file.write(text.replace(old, new))
+    os.utime(fname, ns=(before + 10 ** 9, before + 10 ** 9))
+
+
+def test_cached_graph_matches_the_parsed_one(problem):
+    parsed, _stats = load_graph(problem, csr=True)
+    built, stats = load_graph(problem, cache=True)
+    assert not stats.cached and os.path.exists(cache_path(problem))
+    mapped, stats = load_graph(problem, cache=True)
+    assert stats.cached
+
+    for graph in (built, mapped):
+        assert list(graph.node_ids) == list(parsed.node_ids)
+        assert edges(graph) == edges(parsed)
+        assert (graph['origin'], graph['destinations']) == (parsed['origin'], parsed['destinations'])
+    assert verify_cache(problem)
+
+
+def test_cache_is_rebuilt_when_the_file_changes(problem):
+    load_graph(problem, cache=True)
+    rewrite(problem, '(2,1): 4', '(2,1): 9')
+
+    graph, stats = load_graph(problem, cache=True)
+    assert not stats.cached
+    assert graph['adjacency_list'][graph.index_of(2)][0] == (graph.index_of(1), 9)
+    assert load_graph(problem, cache=True)[1].cached
+
+
+def test_verify_cache_catches_an_edit_that_keeps_size_and_mtime(problem):
+    load_graph(problem, cache=True)
+    source = os.stat(problem)
+    rewrite(problem, '(2,1): 4', '(2,1): 8')
+    os.utime(problem, ns=(source.st_atime_ns, source.st_mtime_ns))
+
+    # The size and mtime key cannot see this edit; the stored digest can
+    assert load_graph(problem, cache=True)[1].cached
+    assert not verify_cache(problem)
+
+
+def test_precompile_refreshes_only_stale_caches(problem, tmp_path):
+    other = str(tmp_path / 'other.txt')
+    shutil.copy(problem, other)
+    assert [stats.cached for _fname, stats in precompile(str(tmp_path))] == [False, False]
+
+    rewrite(other, '(2,1): 4', '(2,1): 7')
+    assert [(os.path.basename(fname), stats.cached) for fname, stats in precompile(str(tmp_path))] == \
+        [('PathFinder-test.txt', True), ('other.txt', False)]
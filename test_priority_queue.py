@@ -0,0 +1,108 @@
+import random
+
+import pytest
+
+from priority_queue import HEAPS, BucketQueue
+
+
+def drain(queue):
+    items = []
+    while queue:
+        items.append(queue.pop())
+    return items
+
+
+@pytest.mark.parametrize('heap_type', HEAPS.values(), ids=HEAPS.keys())
+def test_heap_pops_in_key_order(heap_type):
+    rng = random.Random(0)
+    heap = heap_type()
+    keys = {item: (rng.randrange(50), item) for item in range(200)}
+    for item, key in keys.items():
+        assert heap.push(item, key)
+
+    assert len(heap) == 200
+    assert drain(heap) == sorted((key, item) for item, key in keys.items())
+    assert not heap
+
+
+@pytest.mark.parametrize('heap_type', HEAPS.values(), ids=HEAPS.keys())
+def test_heap_decrease_key(heap_type):
+    heap = heap_type()
+    heap.push('a', (5, 0))
+    heap.push('b', (3, 1))
+    heap.push('c', (4, 2))
+
+    # A lower key moves the queued item; a higher or equal one is ignored
+    assert not heap.push('a', (1, 3))
+    assert not heap.push('b', (9, 4))
+    assert not heap.push('c', (4, 2))
+    assert len(heap) == 3
+    assert 'a' in heap and heap.key_of('a') == (1, 3)
+    assert drain(heap) == [((1, 3), 'a'), ((3, 1), 'b'), ((4, 2), 'c')]
+
+
+@pytest.mark.parametrize('heap_type', HEAPS.values(), ids=HEAPS.keys())
+def test_heap_matches_sorted_order_under_random_decreases(heap_type):
+    rng = random.Random(1)
+    heap = heap_type()
+    live = {}
+    counter = 0
+    popped = []
+    for _ in range(2000):
+        if live and rng.random() < 0.3:
+            key, item = heap.pop()
+            assert key == min(live.values()) and live.pop(item) == key
+            popped.append(item)
+            continue
+        item = rng.randrange(100)
+        counter += 1
+        key = (rng.randrange(1000), counter)
+        inserted = heap.push(item, key)
+        assert inserted == (item not in live)
+        if item not in live or key < live[item]:
+            live[item] = key
+        assert len(heap) == len(live)
+    assert [item for _key, item in drain(heap)] == sorted(live, key=live.get)
+
+
+def test_lazy_heap_keeps_superseded_entries_out_of_pops():
+    heap = HEAPS['lazy']()
+    heap.push(1, (10, 0))
+    heap.push(1, (2, 1))
+    heap.push(2, (5, 2))
+
+    # The stale (10, 0) entry is held but never returned
+    assert heap.max_size == 3
+    assert drain(heap) == [((2, 1), 1), ((5, 2), 2)]
+
+
+def test_bucket_queue_pops_like_a_heap_within_its_cost_window():
+    rng = random.Random(2)
+    max_cost = 7
+    buckets, heap = BucketQueue(max_cost), HEAPS['lazy']()
+    buckets.push(0, (0, 0))
+    heap.push(0, (0, 0))
+    low = 0
+    for counter in range(1, 3000):
+        if rng.random() < 0.4:
+            key, item = heap.pop()
+            assert buckets.pop() == (key, item)
+            low = key[0]
+        if not heap:
+            break
+        # As in Dijkstra, a new cost lies within max_cost above the cost last popped
+        item, key = rng.randrange(300), (low + rng.randrange(max_cost + 1), counter)
+        assert buckets.push(item, key) == heap.push(item, key)
+    assert drain(buckets) == drain(heap)
+
+
+def test_bucket_queue_skips_a_gap_wider_than_the_queue():
+    queue = BucketQueue(1000)
+    queue.push('a', (0, 0))
+    assert queue.pop() == ((0, 0), 'a')
+    queue.push('b', (990, 1))
+    queue.push('c', (700, 2))
+    queue.push('b', (400, 3))
+    assert drain(queue) == [((400, 3), 'b'), ((700, 2), 'c')]
+    # Buckets are only made for the costs that were used
+    assert sum(bucket is not None for bucket in queue.buckets) == 4
@@ -0,0 +1,36 @@
+import os
+import shutil
+
+import pytest
+
+from contraction import hierarchy_path
+from server import QueryService
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture
+def problem(tmp_path):
+    fname = str(tmp_path / 'PathFinder-test.txt')
+    shutil.copy(os.path.join(HERE, 'PathFinder-test.txt'), fname)
+    return fname
+
+
+@pytest.mark.parametrize('csr', [False, True], ids=['dict', 'csr'])
+def test_hierarchy_is_loaded_on_the_first_ch_request(problem, csr):
+    service = QueryService({'test': problem}, csr=csr)
+    dijkstra = service.handle({'origin': 2, 'destinations': [5, 4], 'method': 'dijkstra'})
+    assert not os.path.exists(hierarchy_path(problem))
+
+    ch = service.handle({'origin': 2, 'destinations': [5, 4], 'method': 'ch'})
+    assert 'error' not in ch and os.path.exists(hierarchy_path(problem))
+    assert (ch['goal'], ch['path']) == (dijkstra['goal'], dijkstra['path'])
+    hierarchy = service.hierarchies['test'][1]
+    service.handle({'origin': 1, 'destinations': [6], 'method': 'ch'})
+    assert service.hierarchies['test'][1] is hierarchy
+
+    # A reloaded graph gets its hierarchy anew on its next ch request
+    service.reload()
+    service.handle({'origin': 1, 'destinations': [6], 'method': 'ch'})
+    assert service.hierarchies['test'][1] is not hierarchy
+    service.close()
@@ -1,18 +1,178 @@
 import math
 
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; precompute falls back to a Python loop
+    np = None
+
+# Above this many destinations the nearest-goal lookup goes through a GoalGrid
+GRID_MIN_GOALS = 16
+# Upper bound on node x goal distances NumPy evaluates at once when precomputing
+VECTOR_BLOCK = 1 << 20
+
 # for greedy best-first search, A* and IDA*
-def make_heuristics(coords, goals):
+def make_heuristics(coords, goals, precompute=False, landmarks=None, euclidean=True):
+  """Return h(n): straight-line distance from node n to its nearest goal.
+
+  Values are memoized as they are first asked for: in a dict for the dict graph,
+  in a dense per-index list for a CSRGraph. precompute=True fills the table for
+  every node up front instead (vectorized with NumPy when it is installed).
+
+  With a landmarks.LandmarkTable, h(n) is the larger of the straight-line and ALT
+  lower bounds, or the ALT bound alone when euclidean=False.
+  """
+  dense = hasattr(coords, 'xs')  # graph.CoordinateView over CSR arrays
+
+  if landmarks is not None:
+      return make_landmark_heuristics(coords, goals, precompute, landmarks, euclidean, dense)
+
   try:
       goal_pts = [coords[goal] for goal in goals]
   except KeyError as e:
       raise SystemExit(f"Goal node {e.args[0]} not found in coordinates.") from e
 
+  nearest = make_nearest_distance(goal_pts)
+
+  if precompute:
+      if dense:
+          table = precompute_dense(coords.xs, coords.ys, goal_pts, nearest)
+      else:
+          table = {n: nearest(x, y) for n, (x, y) in coords.items()}
+      return table.__getitem__
+
+  if dense:
+      table = [None] * len(coords)
+      lookup = table.__getitem__
+  else:
+      table = {}
+      lookup = table.get
+
   def h(n):
-      # n is the current node's coordinates
-      (x,y) = coords[n]
-      return min(euclid((x,y), goal_pt) for goal_pt in goal_pts)
+      value = lookup(n)
+      if value is None:
+          # n is the current node's coordinates
+          (x,y) = coords[n]
+          value = table[n] = nearest(x, y)
+      return value
   return h
 
+def make_landmark_heuristics(coords, goals, precompute, landmarks, euclidean, dense):
+    """make_heuristics with an ALT bound, memoized the same way"""
+    try:
+        alt = landmarks.lower_bound(goals, dense)
+    except (KeyError, IndexError) as e:
+        raise SystemExit(f"Goal node {e.args[0] if e.args else ''} not found in the landmark table.") from e
+
+    if euclidean:
+        straight_line = make_heuristics(coords, goals, precompute)
+        estimate = lambda n: max(straight_line(n), alt(n))
+    else:
+        estimate = alt
+
+    if precompute:
+        if dense:
+            return [estimate(n) for n in range(len(landmarks))].__getitem__
+        return {n: estimate(n) for n in (coords if euclidean else landmarks.node_ids)}.__getitem__
+
+    table = [None] * len(landmarks) if dense else {}
+    lookup = table.__getitem__ if dense else table.get
+
+    def h(n):
+        value = lookup(n)
+        if value is None:
+            value = table[n] = estimate(n)
+        return value
+    return h
+
+def make_nearest_distance(goal_pts):
+    """Return f(x, y): Euclidean distance from (x, y) to the closest of goal_pts"""
+    if len(goal_pts) >= GRID_MIN_GOALS:
+        return GoalGrid(goal_pts).nearest_distance
+
+    hypot = math.hypot
+    def nearest(x, y):
+        return min(hypot(x - gx, y - gy) for gx, gy in goal_pts)
+    return nearest
+
+def precompute_dense(xs, ys, goal_pts, nearest):
+    """h for every index of a CSR graph's coordinate arrays, as a list"""
+    if np is None or not goal_pts or len(goal_pts) >= GRID_MIN_GOALS:
+        return [nearest(x, y) for x, y in zip(xs, ys)]
+
+    node_x = np.frombuffer(xs, dtype=np.float64) if len(xs) else np.empty(0)
+    node_y = np.frombuffer(ys, dtype=np.float64) if len(ys) else np.empty(0)
+    goal_x = np.array([gx for gx, _ in goal_pts], dtype=np.float64)
+    goal_y = np.array([gy for _, gy in goal_pts], dtype=np.float64)
+
+    table = np.empty(len(node_x))
+    step = max(1, VECTOR_BLOCK // len(goal_pts))
+    for start in range(0, len(node_x), step):
+        block_x = node_x[start:start + step, None]
+        block_y = node_y[start:start + step, None]
+        table[start:start + step] = np.hypot(block_x - goal_x, block_y - goal_y).min(axis=1)
+    return table.tolist()
+
+class GoalGrid:
+    """Uniform bucket grid over the goal points for nearest-goal distance queries.
+
+    Cells are sized for about one goal each. A query scans rings of cells outward
+    from its own cell and stops once every unscanned cell is provably farther
+    away than the best goal found, so it returns exactly the brute-force minimum.
+    """
+    def __init__(self, points):
+        xs = [x for x, _ in points]
+        ys = [y for _, y in points]
+        self.min_x, self.min_y = min(xs), min(ys)
+        extent = max(max(xs) - self.min_x, max(ys) - self.min_y)
+        self.cell = extent / math.sqrt(len(points)) if extent > 0 else 1.0
+
+        self.buckets = {}
+        for x, y in points:
+            self.buckets.setdefault(self.cell_of(x, y), []).append((x, y))
+        self.max_cx = max(cx for cx, _ in self.buckets)
+        self.max_cy = max(cy for _, cy in self.buckets)
+
+    def cell_of(self, x, y):
+        return int((x - self.min_x) // self.cell), int((y - self.min_y) // self.cell)
+
+    def nearest_distance(self, x, y):
+        qx, qy = self.cell_of(x, y)
+        buckets = self.buckets
+        hypot = math.hypot
+
+        # Rings closer than the grid's bounding box are empty; start at the first one that is not
+        ring = max(0, -qx, qx - self.max_cx, -qy, qy - self.max_cy)
+        last_ring = max(qx, self.max_cx - qx, qy, self.max_cy - qy)
+        best = math.inf
+
+        while ring <= last_ring:
+            for cell in self.ring_cells(qx, qy, ring):
+                for gx, gy in buckets.get(cell, ()):
+                    d = hypot(x - gx, y - gy)
+                    if d < best:
+                        best = d
+            # Goals in ring + 1 or beyond are at least ring * cell away
+            if best <= ring * self.cell:
+                break
+            ring += 1
+        return best
+
+    def ring_cells(self, qx, qy, ring):
+        """Cells at Chebyshev distance ring from (qx, qy), clipped to the occupied grid"""
+        if ring == 0:
+            yield qx, qy
+            return
+        lo_x, hi_x = max(qx - ring, 0), min(qx + ring, self.max_cx)
+        lo_y, hi_y = max(qy - ring + 1, 0), min(qy + ring - 1, self.max_cy)
+        for cy in (qy - ring, qy + ring):
+            if 0 <= cy <= self.max_cy:
+                for cx in range(lo_x, hi_x + 1):
+                    yield cx, cy
+        for cx in (qx - ring, qx + ring):
+            if 0 <= cx <= self.max_cx:
+                for cy in range(lo_y, hi_y + 1):
+                    yield cx, cy
+
 def euclid(current_coord, goal_coord):
     (x1,y1),(x2,y2) = current_coord, goal_coord
     distance = math.hypot(x1-x2, y1-y2)